@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+录制操作的流式日志（JSONL）
+每个操作到达时立即追加一行并 flush 到操作系统，fsync 按条数/时间批量进行：
+浏览器崩溃或窗口被关闭时已录制的操作不会丢失，录制时间再长内存占用也不增长
+"""
+
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ActionJournal:
+    """
+    追加写入的操作日志
+
+    Args:
+        path: JSONL文件路径
+        fsync_every: 累计多少条未落盘的操作后执行fsync
+        fsync_interval: 距上次fsync超过多少秒后执行fsync
+    """
+
+    def __init__(self, path, fsync_every=20, fsync_interval=1.0):
+        self.path = str(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, action):
+        """追加一个操作"""
+        self._file.write(json.dumps(action, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.count += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+        else:
+            self.sync_if_due()
+
+    def sync_if_due(self):
+        """有未落盘的操作且超过 fsync_interval 时执行fsync（录制空闲时由轮询循环调用）"""
+        if self._unsynced and time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.flush()
+            self.sync()
+            self._file.close()
+
+
+def read_journal(path):
+    """
+    逐行读取操作日志
+
+    崩溃时最后一行可能只写了一半，无法解析的行跳过并给出警告
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"{path} 第 {line_number} 行不完整，已跳过")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+录制操作的编译优化
+在加载 recorded_actions.json 时执行一次，把原始事件流整理成最少的执行步骤：
+- 同一元素连续的多次 input 合并为一次（只保留最终值）
+- 紧接在 input 之前、点击同一输入框的"聚焦点击"删除
+- 连续的 navigate 只保留最后一个，跳转到当前页面的 navigate 删除
+输入值中的 {{NAME}} 占位符也在这里预编译为模板，每条记录只需一次拼接
+"""
+
+import re
+
+# 输入值中的占位符，如 {{ASSET_NUMBER}}
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+# 规范步骤名：fill = 把输入框填为最终值，activate = 点击按钮/链接等，navigate = 页面跳转
+STEP_NAMES = {'input': 'fill', 'click': 'activate', 'navigate': 'navigate'}
+
+# 点击这些类型的输入框只是为了聚焦（复选框、按钮等点击有实际作用，不删除）
+TEXT_INPUT_TYPES = {'', 'text', 'search', 'email', 'number', 'password', 'tel', 'url'}
+
+
+def frame_path(action):
+    """操作所在iframe的 window.frames 序号路径（主页面为空列表）"""
+    return action.get('data', {}).get('framePath') or []
+
+
+def element_key(action):
+    """操作目标元素的标识：所在iframe加上定位器，没有定位器时用录制时的XPath"""
+    frame = tuple(frame_path(action))
+    locator = action.get('locator')
+    if locator:
+        return frame, locator['type'], locator['value']
+    return frame, 'xpath', action.get('data', {}).get('xpath')
+
+
+def is_focus_click(action):
+    """是否为点击文本输入框（聚焦）的操作"""
+    if action['type'] != 'click':
+        return False
+    data = action.get('data', {})
+    tag = (data.get('tagName') or '').upper()
+    if tag == 'TEXTAREA':
+        return True
+    return tag == 'INPUT' and (data.get('inputType') or '').lower() in TEXT_INPUT_TYPES
+
+
+def _merged(previous, current):
+    """用current替换previous，记录被合并的原始操作序号"""
+    merged = dict(current)
+    merged['merged_from'] = previous.get('merged_from', [previous.get('index')]) + [current.get('index')]
+    return merged
+
+
+def compile_actions(actions):
+    """
+    把录制的原始操作编译为优化后的执行计划
+
+    Args:
+        actions: 录制的操作列表（recorded_actions_*.json 的内容）
+
+    Returns:
+        优化后的操作列表，格式与输入相同
+    """
+    plan = []
+    current_url = None      # 当前所在页面
+    origin_url = None       # 最近一段连续跳转之前所在的页面
+
+    for action in actions:
+        action_type = action['type']
+
+        if action_type == 'navigate':
+            url = action.get('data', {}).get('url')
+            if plan and plan[-1]['type'] == 'navigate':
+                # 连续跳转只保留最终页面；若最终回到原页面，整段都是无操作
+                merged = _merged(plan.pop(), action)
+                if url != origin_url:
+                    plan.append(merged)
+            elif url != current_url:
+                origin_url = current_url
+                plan.append(action)
+            current_url = url
+            continue
+
+        if action_type == 'input':
+            key = element_key(action)
+            if plan and is_focus_click(plan[-1]) and element_key(plan[-1]) == key:
+                plan.pop()
+            if plan and plan[-1]['type'] == 'input' and element_key(plan[-1]) == key:
+                plan[-1] = _merged(plan[-1], action)
+                continue
+
+        plan.append(action)
+
+    return plan
+
+
+def summarize_plan(raw, plan):
+    """编译前后的操作数对比文本"""
+    def counts(actions):
+        result = {}
+        for a in actions:
+            result[a['type']] = result.get(a['type'], 0) + 1
+        return result
+
+    before, after = counts(raw), counts(plan)
+    detail = ', '.join(f"{t} {before.get(t, 0)}→{after.get(t, 0)}" for t in sorted(set(before) | set(after)))
+    return f"{len(raw)} 个操作 → {len(plan)} 个步骤（{detail}）"
+
+
+class ValueTemplate:
+    """
+    预编译的输入值模板：文字片段与Excel列引用交替组成
+
+    Args:
+        text: 录制的输入值，可包含 {{NAME}} 占位符
+        placeholders: 占位符名 → Excel列名
+    """
+
+    def __init__(self, text, placeholders):
+        self.text = text
+        self.parts = []         # (是否为列引用, 文字或列名)
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            name = match.group(1)
+            if name not in placeholders:
+                raise ValueError(f"未知占位符 {{{{{name}}}}}（DATA_MAPPING 中没有对应的列）: {text}")
+            if match.start() > position:
+                self.parts.append((False, text[position:match.start()]))
+            self.parts.append((True, placeholders[name]))
+            position = match.end()
+        if position < len(text):
+            self.parts.append((False, text[position:]))
+        self.columns = {value for is_column, value in self.parts if is_column}
+
+    def render(self, record):
+        """用一条记录的数据生成输入值"""
+        if not self.columns:
+            return self.text
+        return ''.join(str(record.get(value, '')) if is_column else value for is_column, value in self.parts)
+
+
+def compile_templates(plan, data_mapping):
+    """
+    为计划中的每个input步骤预编译输入值模板（保存在 action['template']）
+
+    Args:
+        plan: compile_actions() 的结果
+        data_mapping: Excel列名 → 占位符名
+
+    Returns:
+        模板引用到的Excel列名集合（用于在启动浏览器前检查Excel）
+
+    Raises:
+        ValueError: 输入值中有 DATA_MAPPING 未定义的占位符
+    """
+    placeholders = {name: column for column, name in data_mapping.items()}
+    columns = set()
+    for action in plan:
+        if action['type'] == 'input':
+            template = ValueTemplate(action.get('data', {}).get('value', ''), placeholders)
+            action['template'] = template
+            columns |= template.columns
+    return columns
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内回放引擎
+browser_recorder.py --replay 和 batch_execute.py 共用：加载录制的操作，编译一次后逐步执行
+"""
+
+import json
+import time
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from action_journal import read_journal
+from action_plan import (PLACEHOLDER_PATTERN, STEP_NAMES, compile_actions, compile_templates, frame_path,
+                         summarize_plan)
+from locator_chain import LocatorChain, switch_to_frame
+from network_idle import start_network_tracker
+from replay_scheduler import ReplayScheduler
+from webdriver_trace import CommandTracer
+
+
+class ElementNotFound(LookupError):
+    """候选定位器都找不到步骤的目标元素"""
+
+
+class AutoPlayer:
+    """
+    进程内回放引擎（不生成Python代码）
+
+    加载录制的操作后编译一次（见 action_plan.py），元素在候选定位器中解析，
+    最快成功的候选记在 locator_stats.json（见 locator_chain.py），
+    步骤之间按页面状态等待（见 replay_scheduler.py），输入值中的 {{NAME}} 用参数替换，
+    每个步骤记录耗时
+
+    Args:
+        base_url: 起始页面（attach 到已打开的浏览器时不需要）
+        speed: 回放速度系数，0 = 尽可能快，1 = 录制时的速度
+        idle_ms: 网络空闲判定时间（毫秒）
+        timeout: 查找元素和等待页面跳转的超时（秒）
+        trace: 是否统计WebDriver命令往返次数
+        locator_chain: 共用的 LocatorChain（默认新建）
+        locate: 自定义元素查找 locate(action) → 元素或None（批量工具用于预检和备用定位器）
+    """
+
+    def __init__(self, base_url=None, speed=0.0, idle_ms=500, timeout=10, trace=False,
+                 locator_chain=None, locate=None):
+        self.base_url = base_url
+        self.speed = speed
+        self.idle_ms = idle_ms
+        self.timeout = timeout
+        self.driver = None
+        self.network = None
+        self.scheduler = None
+        self.tracer = CommandTracer() if trace else None
+        self.locator_chain = locator_chain or LocatorChain()
+        self.locate = locate or self._locate
+        self.plan = []
+        self.columns = set()
+        self.steps = []     # 最近一次 play_once 每个步骤的结果
+
+    def load(self, source, data_mapping=None):
+        """
+        加载并编译操作
+
+        Args:
+            source: 操作JSON / 录制日志（.jsonl）路径，或已加载的操作列表
+            data_mapping: 参数名 → 占位符名（如 Excel列名 → ASSET_NUMBER），
+                          默认参数名就是占位符名
+
+        Returns:
+            编译后的步骤列表
+        """
+        if isinstance(source, (str, Path)):
+            if str(source).endswith('.jsonl'):
+                from browser_recorder import BrowserRecorder
+                raw = BrowserRecorder()._process_actions([a for a in read_journal(source)
+                                                      if a['type'] not in ('request', 'response')])
+            else:
+                with open(source, 'r', encoding='utf-8') as f:
+                    raw = json.load(f)
+        else:
+            raw = list(source)
+
+        self.plan = compile_actions(raw)
+        if data_mapping is None:
+            names = {m.group(1) for a in self.plan if a['type'] == 'input'
+                     for m in PLACEHOLDER_PATTERN.finditer(a.get('data', {}).get('value', ''))}
+            data_mapping = {name: name for name in names}
+        self.columns = compile_templates(self.plan, data_mapping)
+        ReplayScheduler.prepare(self.plan)
+        print(f"已加载操作: {summarize_plan(raw, self.plan)}")
+        return self.plan
+
+    def start(self):
+        """启动浏览器并打开起始页面"""
+        chrome_options = Options()
+        chrome_options.add_argument('--window-size=1920,1080')
+        driver = webdriver.Chrome(options=chrome_options)
+        if self.tracer:
+            self.tracer.install(driver)
+        self.attach(driver, start_network_tracker(driver))
+
+        print("正在打开页面...")
+        self.driver.get(self.base_url)
+        self.scheduler.start_record()
+        self.scheduler.after({'type': 'navigate', 'data': {'url': self.base_url}})
+
+    def attach(self, driver, network=None, scheduler=None):
+        """使用已打开的浏览器（批量工具自己管理浏览器、网络监控和回放节奏时传入）"""
+        self.driver = driver
+        self.network = network
+        self.scheduler = scheduler or ReplayScheduler(driver, self.speed, network, self.idle_ms, self.timeout,
+                                                      on_wait=self.tracer.add_wait if self.tracer else None)
+
+    def _locate(self, action):
+        """在录制的候选定位器中查找元素"""
+        candidates = action.get('locators') or [action['locator']]
+        element, _, _ = self.locator_chain.resolve(self.driver, candidates, self.timeout)
+        return element
+
+    def run_step(self, action, params=None):
+        """
+        执行单个步骤（不含步骤前后的等待）
+
+        在iframe中录制的步骤先切换进录制时的frame再查找元素，执行后回到主页面
+
+        Raises:
+            ElementNotFound: 找不到目标元素
+        """
+        action_type = action['type']
+        if action_type == 'navigate':
+            # 调度器等待前一个步骤触发的跳转，没有跳转时直接打开录制的地址
+            return
+
+        frame = frame_path(action)
+        if frame:
+            switch_to_frame(self.driver, frame, self.timeout)
+        try:
+            self._operate(action, params)
+        finally:
+            if frame:
+                self.driver.switch_to.default_content()
+
+    def _operate(self, action, params):
+        """在当前frame中查找元素并点击或输入"""
+        element = self.locate(action)
+        if element is None:
+            raise ElementNotFound(f"找不到元素: {action.get('locator', {}).get('value')}")
+
+        if action['type'] == 'click':
+            element.click()
+        elif action['type'] == 'input':
+            template = action.get('template')
+            value = template.render(params) if template and params else action['data'].get('value', '')
+            element.clear()
+            element.send_keys(value)
+
+    def play_once(self, params=None):
+        """
+        执行一遍全部步骤
+
+        Args:
+            params: 参数字典，用于替换输入值中的占位符
+
+        Returns:
+            是否全部步骤成功；每个步骤的结果（序号、步骤名、耗时、错误）在 self.steps
+        """
+        self.steps = []
+        self.scheduler.start_record()
+
+        for action in self.plan:
+            self.scheduler.before(action)
+            started = time.perf_counter()
+            error = None
+            try:
+                self.run_step(action, params)
+            except Exception as e:
+                error = str(e)
+
+            # 等待操作触发的页面跳转和请求完成
+            if not self.scheduler.after(action) and error is None:
+                error = f"页面没有跳转到 {action['data'].get('url', '')}"
+
+            self.steps.append({
+                'index': action.get('index'),
+                'step': action.get('step', STEP_NAMES.get(action['type'], action['type'])),
+                'seconds': round(time.perf_counter() - started, 3),
+                'error': error,
+            })
+
+        return all(step['error'] is None for step in self.steps)
+
+    def play(self, param_sets=(None,)):
+        """
+        对每组参数执行一遍，输出每个步骤的耗时
+
+        Returns:
+            失败的组数
+        """
+        failed = 0
+        for n, params in enumerate(param_sets, 1):
+            if params:
+                print(f"\n[{n}] {params}")
+            if self.tracer:
+                self.tracer.start_record(str(n))
+
+            ok = self.play_once(params)
+            for step in self.steps:
+                mark = '✓' if step['error'] is None else '✗'
+                print(f"  {mark} [{step['index']}] {step['step']:10s} {step['seconds']:.2f}s"
+                      + (f"  {step['error']}" if step['error'] else ''))
+            total = sum(step['seconds'] for step in self.steps)
+            print(f"  用时 {total:.2f}s" + ("" if ok else "（有失败的步骤）"))
+
+            if self.tracer:
+                print(f"  WebDriver命令统计: {self.tracer.end_record()}")
+            if not ok:
+                failed += 1
+        return failed
+
+    def close(self):
+        """保存定位器统计并关闭浏览器"""
+        self.locator_chain.save()
+        if self.network:
+            self.network.stop()
+        if self.driver:
+            self.driver.quit()
@@ -5,18 +5,34 @@
 将录制的操作模板与Excel数据结合，批量处理所有记录
 """
 
+import argparse
+import contextlib
+import itertools
 import json
+import sys
+import threading
 import time
 import logging
 from datetime import datetime
 from pathlib import Path
+from queue import Empty, Queue
 
 import pandas as pd
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+
+from action_plan import compile_actions, compile_templates, summarize_plan
+from auto_player import AutoPlayer, ElementNotFound
+from network_idle import start_network_tracker
+from replay_scheduler import ReplayScheduler
+from webdriver_trace import CommandTracer
+from sharding import ResultWriter, add_shard_argument, result_filename, select_shard
+from work_queue import WorkQueue, add_queue_arguments, default_worker_id
+from progress_dashboard import Dashboard, ProgressTracker
+from diagnostics import FailureDiagnostics, enable_console_log
+from profiling_hook import RecordProfiler, add_profile_arguments
+from locator_preflight import PreflightReport
+from locator_chain import LocatorChain, describe
 
 
 # ==================== 配置区域 ====================
@@ -42,6 +58,44 @@ COOKIES_CONFIG = []
 # 每条记录处理后的等待时间（秒）
 RECORD_DELAY = 2
 
+# 查找元素的超时时间（秒）
+ELEMENT_TIMEOUT = 30
+
+# 并行的浏览器数量（只需登录一次，其余浏览器复制登录Cookie）
+PARALLEL_WORKERS = 1
+
+# 每个操作后的固定等待时间（秒），仅在网络空闲检测不可用时使用
+ACTION_DELAY = 0.5
+
+# 回放速度系数：0 = 尽可能快（按页面状态等待），1 = 按录制时的操作间隔，0.5 = 两倍速
+REPLAY_SPEED = 0
+
+# 是否用网络空闲检测（CDP）代替固定等待
+USE_NETWORK_IDLE = True
+# 连续多少毫秒没有进行中的请求视为页面就绪
+NETWORK_IDLE_MS = 500
+
+# 是否统计WebDriver命令往返次数和耗时（每条记录输出一行统计，结束时保存JSON）
+TRACE_WEBDRIVER = False
+
+# 是否在终端显示实时进度面板（吞吐率、预计剩余时间等）
+LIVE_DASHBOARD = False
+# 本地HTTP状态页端口（None=不开启），如 8765 → http://127.0.0.1:8765/
+DASHBOARD_HTTP_PORT = None
+
+# 记录失败时保存诊断包（截图、页面HTML、控制台日志、最近的网络请求和步骤）
+CAPTURE_FAILURES = True
+FAILURE_DIR = "failures"
+
+# 批量处理前用第一条记录预检所有定位器（短超时），有定位器失效时立即停止，而不是每条记录都等满超时
+PREFLIGHT = True
+PREFLIGHT_TIMEOUT = 5
+
+# 备用定位器：按操作序号（见加载模板时的日志）配置，排在录制的候选定位器之后
+LOCATOR_FALLBACKS = {
+    # 3: [{'type': 'xpath', 'value': '//input[@placeholder="资产编号"]'}],
+}
+
 
 # ==================== 日志配置 ====================
 
@@ -61,6 +115,16 @@ logger = logging.getLogger(__name__)
 
 # ==================== 批量执行器 ====================
 
+
+def _drain(pending):
+    """依次取出队列中的记录，取空后结束（多个线程可同时使用同一队列）"""
+    while True:
+        try:
+            yield pending.get_nowait()
+        except Empty:
+            return
+
+
 class BatchExecutor:
     """批量执行器 - 使用录制的操作模板处理Excel数据"""
 
@@ -68,14 +132,32 @@ class BatchExecutor:
         self.driver = None
         self.wait = None
         self.actions_template = None
+        self.template_columns = set()
         self.data_df = None
+        self.network = None
+        self.scheduler = None
+        self.player = None          # 执行单个步骤（AutoPlayer，使用本执行器的浏览器和定位方式）
+        self.tracer = CommandTracer() if TRACE_WEBDRIVER else None
+        self.progress = ProgressTracker()
+        self.failed_records = []
+        self.diagnostics = None
+        self.profiler = None
+        self.last_error = None
+        self.workers = []           # 并行模式下的其他浏览器
+        self.log_prefix = ''
+        self.preflight_report = None    # 预检期间收集定位器结果
+        self.locator_chain = LocatorChain()
 
     def load_actions(self, actions_file):
         """加载录制的操作模板"""
         try:
             with open(actions_file, 'r', encoding='utf-8') as f:
-                self.actions_template = json.load(f)
-            logger.info(f"成功加载操作模板: {len(self.actions_template)} 个操作")
+                raw_actions = json.load(f)
+            # 编译一次：合并重复输入、删除聚焦点击和多余跳转，之后每条记录都复用
+            self.actions_template = compile_actions(raw_actions)
+            self.template_columns = compile_templates(self.actions_template, DATA_MAPPING)
+            ReplayScheduler.prepare(self.actions_template)
+            logger.info(f"成功加载操作模板: {summarize_plan(raw_actions, self.actions_template)}")
             return True
         except Exception as e:
             logger.error(f"加载操作模板失败: {e}")
@@ -100,13 +182,29 @@ class BatchExecutor:
             logger.error(f"读取Excel文件失败: {e}")
             return False
 
-    def init_driver(self):
+    def init_driver(self, speed=REPLAY_SPEED):
         """初始化浏览器"""
         try:
             chrome_options = Options()
             chrome_options.add_argument('--window-size=1920,1080')
+            if CAPTURE_FAILURES:
+                enable_console_log(chrome_options)
             self.driver = webdriver.Chrome(options=chrome_options)
-            self.wait = WebDriverWait(self.driver, 30)
+            if self.tracer:
+                self.tracer.install(self.driver)
+
+            if USE_NETWORK_IDLE:
+                self.network = start_network_tracker(self.driver)
+
+            if CAPTURE_FAILURES:
+                self.diagnostics = FailureDiagnostics(self.driver, FAILURE_DIR, network=self.network)
+
+            self.scheduler = ReplayScheduler(self.driver, speed, self.network, NETWORK_IDLE_MS,
+                                             on_wait=self.tracer.add_wait if self.tracer else None,
+                                             fallback_delay=ACTION_DELAY)
+            self.player = AutoPlayer(timeout=ELEMENT_TIMEOUT, locator_chain=self.locator_chain,
+                                     locate=lambda action: self.locate(action, f"{action['type']}操作"))
+            self.player.attach(self.driver, self.network, self.scheduler)
 
             logger.info("浏览器启动成功")
             return True
@@ -114,68 +212,58 @@ class BatchExecutor:
             logger.error(f"浏览器启动失败: {e}")
             return False
 
-    def find_element(self, locator_type, locator_value, description=""):
-        """查找页面元素"""
-        by_mapping = {
-            'id': By.ID,
-            'name': By.NAME,
-            'class': By.CLASS_NAME,
-            'xpath': By.XPATH,
-        }
+    def pause(self, seconds):
+        """固定等待（开启命令追踪时计入等待时间）"""
+        time.sleep(seconds)
+        if self.tracer:
+            self.tracer.add_wait('sleep', seconds)
+
+    def wait_ready(self, fallback_seconds):
+        """等待页面请求完成；网络空闲检测不可用（或CDP会话中途断开）时退回固定等待"""
+        if self.network is not None and self.network.session.closed:
+            logger.warning("CDP会话已断开，之后改为固定等待")
+            self.network = None
+        if self.network is None:
+            self.pause(fallback_seconds)
+            return
+        started = time.perf_counter()
+        if not self.network.wait_for_idle(NETWORK_IDLE_MS, 30):
+            logger.warning("等待网络空闲超时，继续执行")
+        if self.tracer:
+            self.tracer.add_wait('idle', time.perf_counter() - started)
+
+    def locate(self, action, description=""):
+        """
+        查找操作的目标元素：轮流试探录制的全部候选定位器和 LOCATOR_FALLBACKS，
+        历史上最快成功的候选优先（预检期间使用短超时）
+        """
+        candidates = (action.get('locators') or [action['locator']]) + LOCATOR_FALLBACKS.get(action['index'], [])
+        timeout = PREFLIGHT_TIMEOUT if self.preflight_report is not None else ELEMENT_TIMEOUT
+        element, used, count = self.locator_chain.resolve(self.driver, candidates, timeout)
+
+        if self.preflight_report is not None:
+            name = f"#{action['index']} {action['type']}"
+            if element is None:
+                self.preflight_report.missing(name, describe(candidates[0]))
+            else:
+                self.preflight_report.found(name, describe(used), count, candidates.index(used))
 
-        by = by_mapping.get(locator_type, By.XPATH)
-
-        try:
-            element = self.wait.until(
-                EC.presence_of_element_located((by, locator_value))
-            )
-            return element
-        except Exception as e:
-            logger.error(f"找不到元素: {locator_type}={locator_value} ({description})")
-            return None
+        if element is None:
+            self.last_error = f"找不到元素: {describe(candidates[0])} 等 {len(candidates)} 个候选定位器 ({description})"
+            logger.error(self.last_error)
+        return element
 
     def execute_action(self, action, data_dict=None):
-        """执行单个操作"""
-        action_type = action['type']
-        data = action['data']
-
+        """执行单个操作（输入值用预编译的模板填入本条记录的数据）"""
         try:
-            if action_type == 'click':
-                # 点击操作
-                locator = action.get('locator', {})
-                if locator:
-                    elem = self.find_element(locator['type'], locator['value'], f"点击操作")
-                    if elem:
-                        elem.click()
-                        logger.debug(f"✓ 点击: {locator['type']}={locator['value']}")
-                        return True
-
-            elif action_type == 'input':
-                # 输入操作
-                value = data.get('value', '')
-
-                # 如果值包含占位符，进行替换
-                if data_dict and value:
-                    for excel_col, placeholder in DATA_MAPPING.items():
-                        if placeholder in value:
-                            value = value.replace(f'{{{{{placeholder}}}}}', str(data_dict.get(excel_col, '')))
-
-                locator = action.get('locator', {})
-                if locator:
-                    elem = self.find_element(locator['type'], locator['value'], f"输入操作")
-                    if elem:
-                        elem.clear()
-                        elem.send_keys(value)
-                        logger.debug(f"✓ 输入: {locator['type']}={locator['value']}, 值={value}")
-                        return True
-
-            elif action_type == 'navigate':
-                # 页面导航（通常由其他操作触发，无需额外处理）
-                pass
-
+            self.player.run_step(action, data_dict)
+            logger.debug(f"✓ {action['type']}: {action.get('locator', {}).get('value', '')}")
+            return True
+        except ElementNotFound:
+            # locate 已记录错误
             return False
-
         except Exception as e:
+            self.last_error = e
             logger.error(f"执行操作出错: {e}")
             return False
 
@@ -183,18 +271,47 @@ class BatchExecutor:
         """为单条记录执行所有操作"""
         success_count = 0
 
-        for action in self.actions_template:
-            if self.execute_action(action, record_data):
-                success_count += 1
+        self.last_error = None
+        self.scheduler.start_record()
 
-            # 操作间短暂等待
-            time.sleep(0.5)
+        for action in self.actions_template:
+            # 按录制节奏等待（速度系数为0时不等待）
+            self.scheduler.before(action)
+            step_start = time.perf_counter()
+            if self.diagnostics:
+                self.diagnostics.note(action['type'], index=action.get('index'), locator=action.get('locator'))
+            executed = self.execute_action(action, record_data)
+
+            # 等待操作触发的页面跳转和请求完成
+            if self.scheduler.after(action):
+                if executed:
+                    success_count += 1
+            else:
+                self.last_error = self.last_error or f"页面没有跳转到 {action['data'].get('url', '')}"
+            self.progress.step(action['type'], time.perf_counter() - step_start)
 
         logger.info(f"该记录执行完成: {success_count}/{len(self.actions_template)} 个操作成功")
         return success_count == len(self.actions_template)
 
-    def run(self, start_index=0, end_index=None, test_mode=False):
-        """批量执行"""
+    def run(self, start_index=0, end_index=None, test_mode=False, shard=None, queue_path=None, worker_id=None,
+            dashboard=LIVE_DASHBOARD, status_port=DASHBOARD_HTTP_PORT, profile=None, profile_engine='sampling',
+            speed=REPLAY_SPEED, workers=PARALLEL_WORKERS):
+        """
+        批量执行
+
+        Args:
+            start_index / end_index: 处理范围（在分片筛选之后的记录中计算）
+            test_mode: 只处理前3条记录
+            shard: (i, N)，只处理按 DATA_MAPPING 第一列哈希分到第i片的记录
+            queue_path: 共享工作队列文件；指定后把记录加入队列，再逐条领取处理
+            worker_id: 在工作队列中的worker标识
+            dashboard: 是否显示实时进度面板
+            status_port: 本地HTTP状态页端口
+            profile: ('every', N) 或 ('slowest', K)，对部分记录做性能分析
+            profile_engine: 'sampling' 或 'cprofile'
+            speed: 回放速度系数（0 = 尽可能快，1 = 录制时的速度）
+            workers: 并行的浏览器数量，只需在第一个浏览器中登录一次
+        """
         logger.info("=" * 60)
         logger.info("开始批量执行")
         logger.info("=" * 60)
@@ -207,8 +324,25 @@ class BatchExecutor:
         if not self.load_excel(EXCEL_FILE):
             return False
 
+        # 模板引用的列必须都在Excel中，否则在打开浏览器之前就停止
+        missing = self.template_columns - set(self.data_df.columns)
+        if missing:
+            logger.error(f"Excel中缺少操作模板需要的列: {', '.join(sorted(missing))}")
+            return False
+
+        # DATA_MAPPING 的第一列作为记录的唯一标识（分片、工作队列使用）
+        key_column = next(iter(DATA_MAPPING))
+
+        # 分片：只保留分配给本机的记录
+        skipped = 0     # 本次不处理的记录数（进度面板显示为跳过）
+        if shard:
+            before = len(self.data_df)
+            self.data_df = select_shard(self.data_df, key_column, *shard)
+            skipped += before - len(self.data_df)
+            logger.info(f"分片 {shard[0]}/{shard[1]}: 本机负责 {len(self.data_df)} 条记录")
+
         # 初始化浏览器
-        if not self.init_driver():
+        if not self.init_driver(speed):
             return False
 
         # 设置处理范围
@@ -224,6 +358,30 @@ class BatchExecutor:
             total = len(records_to_process)
 
         logger.info(f"准备处理第 {start_index + 1} 到第 {end_index} 条记录，共 {total} 条")
+        skipped += len(self.data_df) - total
+
+        rows = (row.to_dict() for _, row in records_to_process.iterrows())
+
+        # 工作队列模式：加入队列（已存在的记录不会重复加入），每个worker各自领取
+        if queue_path:
+            queue = WorkQueue(queue_path)
+            worker_id = worker_id or default_worker_id()
+            added = queue.enqueue((str(data[key_column]).strip(), data) for data in rows)
+            counts = queue.counts()
+            total = counts['pending']
+            skipped += counts['done'] + counts['failed']     # 队列中已处理过的记录不再处理
+            logger.info(f"工作队列 {queue_path}: 新加入 {added} 条，待处理 {total} 条，worker: {worker_id}")
+
+            def record_source(name):
+                return ((lease.payload, lease) for lease in queue.claims(name))
+        else:
+            # 进程内队列：并行时各浏览器从同一队列取记录，先处理完的多取
+            pending = Queue()
+            for data in rows:
+                pending.put((data, None))
+
+            def record_source(name):
+                return _drain(pending)
 
         # 访问起始页面
         try:
@@ -235,54 +393,197 @@ class BatchExecutor:
             logger.error(f"访问系统页面失败: {e}")
             return False
 
-        # 统计结果
-        success_count = 0
-        failed_count = 0
-        failed_records = []
+        # 逐条写入结果文件（分片运行时各机器的结果用 sharding.py merge 合并）
+        results = ResultWriter(result_filename('batch_results', shard), shard)
+        logger.info(f"处理结果将写入: {results.filename}")
 
-        # 遍历处理每条记录
-        for idx, row in records_to_process.iterrows():
-            record_data = row.to_dict()
+        # 进度统计从这里开始计时（不含登录时间）
+        worker = worker_id or 'main'
+        names = [worker] if workers <= 1 else [f"{worker}-{n}" for n in range(1, workers + 1)]
+        self.progress = ProgressTracker(total)
+        self.progress.skip(skipped)
+        live = Dashboard(self.progress, live=dashboard, http_port=status_port).start()
+        positions = itertools.count(1)
 
-            # 获取关键信息用于日志
-            asset_number = record_data.get('资产编号', 'N/A')
-            new_location = record_data.get('学院存放地', 'N/A')
+        if profile:
+            self.profiler = RecordProfiler(Path(LOG_FILE).with_suffix(''), *profile, engine=profile_engine)
 
-            logger.info(f"\n[{idx - start_index + 1}/{total}] 处理资产: {asset_number} → {new_location}")
+        self.failed_records = []
+        executors = [self]
+        source = record_source(names[0])
 
-            if self.execute_actions_for_record(record_data):
-                success_count += 1
+        # 遍历处理每条记录（先用第一条记录预检定位器，通过后再启动其余浏览器）
+        try:
+            if PREFLIGHT and not self.preflight(source, total, names[0], results, positions):
+                logger.error("定位器预检未通过，其余记录未处理")
+            elif workers <= 1:
+                self._process_records(source, total, worker, results, positions)
             else:
-                failed_count += 1
-                failed_records.append({
-                    'index': idx - start_index + 1,
-                    'asset_number': asset_number,
-                    'location': new_location
-                })
-
-            # 等待一段时间再处理下一条
-            time.sleep(RECORD_DELAY)
-
-        # 输出统计结果
+                # 并行模式：其余浏览器复用这次登录的Cookie
+                executors += self._start_workers(workers - 1, speed)
+                sources = [source] + [record_source(name) for name in names[1:]]
+                threads = []
+                for executor, name, records in zip(executors, names, sources):
+                    executor.progress = self.progress
+                    executor.log_prefix = f"[{name}] "
+                    thread = threading.Thread(target=executor._run_worker, name=name, daemon=True,
+                                              args=(records, total, name, results, positions))
+                    thread.start()
+                    threads.append(thread)
+                for thread in threads:
+                    # 带超时的join，Windows上也能响应Ctrl+C
+                    while thread.is_alive():
+                        thread.join(0.5)
+        finally:
+            self.progress.worker_state(names[0], '已结束')
+            live.stop()
+            results.close()
+            self.locator_chain.save()
+            if self.profiler:
+                self.profiler.write()
+
+        # 输出统计结果（并行时汇总所有浏览器）
+        snap = self.progress.snapshot()
+        failed_records = sorted((r for e in executors for r in e.failed_records), key=lambda r: r['index'])
         logger.info("\n" + "=" * 60)
         logger.info("批量执行完成")
         logger.info("=" * 60)
-        logger.info(f"总计: {total} 条")
-        logger.info(f"成功: {success_count} 条")
-        logger.info(f"失败: {failed_count} 条")
+        if len(executors) > 1:
+            logger.info(f"浏览器: {len(executors)} 个")
+        logger.info(f"总计: {snap['processed']} 条")
+        logger.info(f"成功: {snap['success']} 条")
+        logger.info(f"失败: {snap['failed']} 条")
+        logger.info(f"平均速率: {snap['processed'] / max(snap['elapsed'], 1) * 60:.1f} 条/分钟")
 
         if failed_records:
             logger.info("\n失败记录列表:")
             for record in failed_records:
                 logger.info(f"  [{record['index']}] {record['asset_number']} -> {record['location']}")
 
+        if self.tracer:
+            self.tracer.log_summary()
+            self.tracer.save(Path(LOG_FILE).with_suffix('.trace.json'))
+
         print("\n按回车键关闭浏览器...")
         input()
 
         return True
 
+    def _start_workers(self, count, speed):
+        """启动额外的浏览器，复制当前浏览器的登录Cookie"""
+        cookies = self.driver.get_cookies()
+        for n in range(count):
+            worker = BatchExecutor()
+            worker.actions_template = self.actions_template
+            worker.locator_chain = self.locator_chain
+            worker.tracer = None    # 命令统计只在第一个浏览器上进行
+            if worker.init_driver(speed) and worker.copy_login(cookies):
+                self.workers.append(worker)
+            else:
+                logger.warning(f"第 {n + 2} 个浏览器启动失败，跳过")
+                worker.close()
+        logger.info(f"并行模式: 共 {len(self.workers) + 1} 个浏览器，已复制 {len(cookies)} 个Cookie")
+        return self.workers
+
+    def copy_login(self, cookies):
+        """打开系统页面并写入已登录浏览器的Cookie"""
+        try:
+            self.driver.get(BASE_URL)
+            for cookie in cookies:
+                try:
+                    self.driver.add_cookie(cookie)
+                except Exception as e:
+                    logger.debug(f"Cookie {cookie.get('name')} 写入失败: {e}")
+            self.driver.refresh()
+            self.wait_ready(2)
+            return True
+        except Exception as e:
+            logger.error(f"复制登录状态失败: {e}")
+            return False
+
+    def _run_worker(self, records, total, worker, results, positions):
+        """并行模式下每个浏览器的线程：出错时只结束本线程，其余浏览器继续处理"""
+        try:
+            self._process_records(records, total, worker, results, positions)
+        except Exception as e:
+            logger.error(f"{self.log_prefix}异常退出: {e}")
+        finally:
+            self.progress.worker_state(worker, '已结束')
+
+    def preflight(self, records, total, worker, results, positions):
+        """
+        用第一条记录试运行：每个定位器最多等待 PREFLIGHT_TIMEOUT 秒，失效时尝试备用定位器
+
+        Returns:
+            True 表示可以继续处理其余记录；有定位器找不到时返回False
+        """
+        first = next(records, None)
+        if first is None:
+            return True
+
+        logger.info(f"定位器预检：用第一条记录试运行（每个定位器最多等待 {PREFLIGHT_TIMEOUT} 秒）")
+        self.preflight_report = PreflightReport()
+        try:
+            self._process_records([first], total, worker, results, positions)
+        finally:
+            report, self.preflight_report = self.preflight_report, None
+
+        report.log(expected=[f"#{a['index']} {a['type']}" for a in self.actions_template if a.get('locator')])
+        missing = report.missing_names()
+        if missing:
+            logger.error(f"以下操作的元素找不到且没有可用的备用定位器，停止批量处理: {', '.join(missing)}")
+            logger.error("请重新录制操作，或在 LOCATOR_FALLBACKS 中按操作序号添加备用定位器")
+            return False
+        return True
+
+    def _process_records(self, records, total, worker, results, positions):
+        """逐条处理记录，结果写入results并计入进度统计"""
+        for record_data, lease in records:
+            position = next(positions)
+
+            # 获取关键信息用于日志
+            asset_number = record_data.get('资产编号', 'N/A')
+            new_location = record_data.get('学院存放地', 'N/A')
+
+            logger.info(f"\n{self.log_prefix}[{position}/{total}] 处理资产: {asset_number} → {new_location}")
+            self.progress.worker_state(worker, '处理中', asset_number)
+
+            if self.tracer:
+                self.tracer.start_record(asset_number)
+
+            record_start = time.time()
+            with self.profiler.record(asset_number) if self.profiler else contextlib.nullcontext():
+                success = self.execute_actions_for_record(record_data)
+            if success:
+                results.write(asset_number, new_location, 'success', seconds=time.time() - record_start)
+            else:
+                self.failed_records.append({
+                    'index': position,
+                    'asset_number': asset_number,
+                    'location': new_location
+                })
+                results.write(asset_number, new_location, 'failed', seconds=time.time() - record_start)
+                if self.diagnostics:
+                    self.diagnostics.capture(asset_number, self.last_error)
+            self.progress.record_done('success' if success else 'failed')
+
+            if lease:
+                lease.complete(success)
+
+            # 等待页面请求完成再处理下一条
+            self.wait_ready(RECORD_DELAY)
+
+            if self.tracer:
+                logger.info(f"本条记录: {self.tracer.end_record()}")
+
     def close(self):
         """关闭浏览器"""
+        for worker in self.workers:
+            worker.close()
+        if self.diagnostics:
+            self.diagnostics.close()
+        if self.network:
+            self.network.stop()
         if self.driver:
             self.driver.quit()
             logger.info("浏览器已关闭")
@@ -290,12 +591,30 @@ class BatchExecutor:
 
 # ==================== 主程序 ====================
 
+def parse_args(argv):
+    """解析命令行参数（带参数运行时不再询问运行模式）"""
+    parser = argparse.ArgumentParser(description='批量执行工具 - 使用录制的操作处理Excel数据')
+    add_shard_argument(parser)
+    add_queue_arguments(parser)
+    add_profile_arguments(parser)
+    parser.add_argument('--start', type=int, default=0, help='起始索引（从0开始）')
+    parser.add_argument('--end', type=int, default=None, help='结束索引（不包含）')
+    parser.add_argument('--dashboard', action='store_true', default=LIVE_DASHBOARD, help='显示实时进度面板')
+    parser.add_argument('--status-port', type=int, default=DASHBOARD_HTTP_PORT, help='开启本地HTTP状态页的端口')
+    parser.add_argument('--workers', type=int, default=PARALLEL_WORKERS, help='并行的浏览器数量')
+    parser.add_argument('--speed', type=float, default=REPLAY_SPEED,
+                        help='回放速度系数：0=尽可能快（默认），1=录制时的速度')
+    return parser.parse_args(argv)
+
+
 def main():
     """主函数"""
     print("=" * 60)
     print("批量执行工具 - 使用录制的操作处理Excel数据")
     print("=" * 60)
 
+    options = parse_args(sys.argv[1:])
+
     # 检查文件是否存在
     if not Path(EXCEL_FILE).exists():
         print(f"错误: 找不到Excel文件 '{EXCEL_FILE}'")
@@ -309,6 +628,15 @@ def main():
     executor = BatchExecutor()
 
     try:
+        # 命令行指定了参数：非交互运行（用于多台电脑分片运行）
+        if len(sys.argv) > 1:
+            executor.run(start_index=options.start, end_index=options.end, shard=options.shard,
+                         queue_path=options.queue, worker_id=options.worker_id,
+                         dashboard=options.dashboard, status_port=options.status_port,
+                         profile=options.profile, profile_engine=options.profile_engine, speed=options.speed,
+                         workers=options.workers)
+            return
+
         print("\n请选择运行模式:")
         print("1. 测试模式（只处理前3条记录）")
         print("2. 批量处理（处理所有记录）")
@@ -5,8 +5,13 @@
 记录用户在浏览器中的操作，生成可自动重放的脚本
 """
 
+import argparse
 import json
+import re
+import sys
+import threading
 import time
+from queue import Queue
 from datetime import datetime
 from pathlib import Path
 
@@ -14,9 +19,376 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from action_journal import ActionJournal, read_journal
+from action_plan import STEP_NAMES, compile_actions
+from auto_player import AutoPlayer
+from cdp_session import open_cdp_session
+from http_template import (MAX_POST_DATA, MAX_RESPONSE_BODY, build_http_template, capture_request,
+                           capture_response, is_api_request, is_json_response)
+
+# Runtime.addBinding 注册的函数名，页面通过它把操作推送到Python
+BINDING_NAME = '__recordAction'
+
+# 监听脚本：每个文档只安装一次；有binding时实时推送，否则存入 window.recordedActions 等待轮询
+LISTENER_SCRIPT = """
+(function() {
+    if (window.__recorderInstalled) {
+        return;
+    }
+    window.__recorderInstalled = true;
+
+    // 存储操作历史（轮询方式使用）
+    window.recordedActions = window.recordedActions || [];
+
+    // 当前文档所在的iframe（顶层页面为空）
+    var frameUrl = window === window.top ? '' : location.href;
+
+    // iframe在 window.frames 中的序号路径，如 [0, 1] 为第1个iframe中的第2个iframe，回放时依次切换
+    var framePath = [];
+    try {
+        for (var w = window; w !== window.top; w = w.parent) {
+            var siblings = w.parent.frames, index = -1;
+            for (var n = 0; n < siblings.length; n++) {
+                if (siblings[n] === w) {
+                    index = n;
+                    break;
+                }
+            }
+            if (index < 0) {
+                throw new Error('frame not found');
+            }
+            framePath.unshift(index);
+        }
+    } catch (e) {
+        framePath = [];
+    }
+
+    function emit(action) {
+        if (frameUrl) {
+            action.frameUrl = frameUrl;
+            action.framePath = framePath;
+        }
+        if (typeof window.""" + BINDING_NAME + """ === 'function') {
+            window.""" + BINDING_NAME + """(JSON.stringify(action));
+        } else {
+            window.recordedActions.push(action);
+        }
+    }
+
+    // 可操作的元素：点击按钮里的图标、文字等子元素时，记录按钮本身
+    var ACTIONABLE = 'a, button, input, select, textarea, label, summary, [role="button"], [role="link"], ' +
+                     '[role="menuitem"], [role="tab"], [role="checkbox"], [onclick]';
+
+    function actionable(elem) {
+        return (elem.closest && elem.closest(ACTIONABLE)) || elem;
+    }
+
+    // 监听点击事件
+    document.addEventListener('click', function(e) {
+        var elem = actionable(e.target);
+        var action = {
+            type: 'click',
+            timestamp: Date.now(),
+            tagName: elem.tagName,
+            id: elem.id || '',
+            name: elem.name || '',
+            className: typeof elem.className === 'string' ? elem.className : '',
+            text: elem.textContent ? elem.textContent.trim().substring(0, 50) : '',
+            xpath: getXPath(elem),
+            value: elem.value || ''
+        };
+
+        // 如果是输入框，记录输入前的值
+        if (elem.tagName === 'INPUT' || elem.tagName === 'TEXTAREA') {
+            action.inputType = elem.type || 'text';
+            action.placeholder = elem.placeholder || '';
+        }
+
+        emit(action);
+    }, true);
+
+    // 监听输入事件（同一个输入框1秒内只记录一次）
+    var lastInput = {};
+    document.addEventListener('input', function(e) {
+        var elem = e.target;
+        var now = Date.now();
+
+        if (elem.tagName === 'INPUT' || elem.tagName === 'TEXTAREA') {
+            var key = elem.id || elem.name || getXPath(elem);
+
+            if (!lastInput[key] || now - lastInput[key] > 1000) {
+                emit({
+                    type: 'input',
+                    timestamp: now,
+                    tagName: elem.tagName,
+                    id: elem.id || '',
+                    name: elem.name || '',
+                    className: typeof elem.className === 'string' ? elem.className : '',
+                    value: elem.value || '',
+                    xpath: getXPath(elem)
+                });
+                lastInput[key] = now;
+            }
+        }
+    }, true);
+
+    // 监听页面导航：新文档加载（整页跳转）和单页应用的URL变化，只在顶层页面记录
+    if (window === window.top) {
+        var lastUrl = location.href;
+        emit({type: 'navigate', timestamp: Date.now(), url: lastUrl});
+
+        new MutationObserver(function() {
+            var url = location.href;
+            if (url !== lastUrl) {
+                emit({type: 'navigate', timestamp: Date.now(), url: url});
+                lastUrl = url;
+            }
+        }).observe(document, {subtree: true, childList: true});
+    }
+
+    // 获取XPath的工具函数
+    function getXPath(element) {
+        if (element.id !== '') {
+            return "//*[@id='" + element.id + "']";
+        }
+        if (element === document.body) {
+            return '/html/body';
+        }
+
+        var ix = 0;
+        var siblings = element.parentNode.childNodes;
+        for (var i = 0; i < siblings.length; i++) {
+            var sibling = siblings[i];
+            if (sibling === element) {
+                return getXPath(element.parentNode) + '/' + element.tagName.toLowerCase() + '[' + (ix + 1) + ']';
+            }
+            if (sibling.nodeType === 1 && sibling.tagName === element.tagName) {
+                ix++;
+            }
+        }
+    }
+})();
+"""
+
+
+# 生成的回放脚本模板：读取操作JSON，按录制间隔×速度系数回放，可对数据文件的每一行执行一次
+REPLAY_SCRIPT_TEMPLATE = r"""#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+自动操作脚本（数据驱动）
+生成时间: __GENERATED_AT__
+录制步骤数: __STEP_COUNT__
+
+用法:
+    python 本脚本.py                          # 按录制时输入的值执行一次
+    python 本脚本.py --data 数据.xlsx          # 数据文件每行执行一次
+    python 本脚本.py --speed 1                # 按录制时的操作间隔回放（默认0 = 尽可能快）
+
+使用数据文件时，把操作JSON中 input 操作的 value 改为 {{列名}}，执行时替换为该行对应列的值
+'''
+
+import argparse
+import csv
+import json
+import re
+import time
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+BASE_URL = __BASE_URL__
+ACTIONS_FILE = __ACTIONS_FILE__
+
+PLACEHOLDER = re.compile(r'\{\{\s*([^{}]+?)\s*\}\}')
+
+BY_MAPPING = {
+    'id': By.ID,
+    'name': By.NAME,
+    'class': By.CLASS_NAME,
+    'css': By.CSS_SELECTOR,
+    'xpath': By.XPATH,
+}
+
+
+def load_rows(path):
+    '''读取数据文件（.csv 或 Excel），每行为一个字典'''
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            return list(csv.DictReader(f))
+    import pandas as pd
+    return pd.read_excel(path, dtype=str).fillna('').to_dict('records')
+
+
+def xpath_literal(text):
+    '''把任意文本转为XPath字符串字面量（同时含单双引号时使用concat）'''
+    if "'" not in text:
+        return "'%s'" % text
+    if '"' not in text:
+        return '"%s"' % text
+    return "concat('" + "', \"'\", '".join(text.split("'")) + "')"
+
+
+def to_by(locator):
+    if locator['type'] == 'text':
+        return By.XPATH, "//*[contains(text(), %s)]" % xpath_literal(locator['value'].strip())
+    return BY_MAPPING.get(locator['type'], By.XPATH), locator['value']
+
+
+class AutoPlayer:
+    '''自动操作播放器'''
+
+    def __init__(self, actions, speed=0.0, timeout=10):
+        self.actions = actions
+        self.speed = speed
+        self.timeout = timeout
+        self.driver = None
+
+    def start(self):
+        '''启动浏览器'''
+        chrome_options = Options()
+        chrome_options.add_argument('--window-size=1920,1080')
+        self.driver = webdriver.Chrome(options=chrome_options)
+
+        print("正在打开页面...")
+        self.driver.get(BASE_URL)
+        input("如需登录请在浏览器中完成，然后按回车开始执行...")
+
+    def find(self, action):
+        '''轮流试探录制的候选定位器，直到找到元素或超时'''
+        candidates = action.get('locators') or [action['locator']]
+        deadline = time.time() + self.timeout
+        while True:
+            for locator in candidates:
+                elements = self.driver.find_elements(*to_by(locator))
+                if elements:
+                    return elements[0]
+            if time.time() >= deadline:
+                raise TimeoutError("找不到元素: %s" % candidates[0]['value'])
+            time.sleep(0.2)
+
+    def enter_frame(self, action):
+        '''切换进录制时的iframe（按 window.frames 序号路径），返回是否切换过'''
+        path = action['data'].get('framePath') or []
+        if not path:
+            return False
+        self.driver.switch_to.default_content()
+        for index in path:
+            WebDriverWait(self.driver, self.timeout, poll_frequency=0.2).until(
+                EC.frame_to_be_available_and_switch_to_it(index), "找不到iframe %s" % path)
+        return True
+
+    def open_start_page(self):
+        '''回到起始页面（每组数据都从录制开始时的页面执行）'''
+        self.driver.get(BASE_URL)
+        self.wait_navigation(None)
+
+    def wait_navigation(self, url_before, url=None):
+        '''等待URL变化和页面加载完成；短时间内没有跳转时直接打开录制的地址'''
+        if url_before is not None:
+            try:
+                WebDriverWait(self.driver, 5, poll_frequency=0.1).until(lambda d: d.current_url != url_before)
+            except TimeoutException:
+                if not url:
+                    raise
+                self.driver.get(url)
+        elif url and self.driver.current_url != url:
+            self.driver.get(url)
+        WebDriverWait(self.driver, self.timeout, poll_frequency=0.1).until(
+            lambda d: d.execute_script('return document.readyState') == 'complete')
+
+    def play(self, row=None):
+        '''执行一遍录制的操作，返回成功的步骤数'''
+        self.open_start_page()
+        done = 0
+        previous_delay = None
+        step_start = None
+        url_before = None
+
+        for i, action in enumerate(self.actions):
+            # 录制时两步之间的间隔（time_delay 是从录制开始算起的累计时间）
+            delay = action.get('time_delay', 0)
+            if self.speed and step_start is not None:
+                remaining = (delay - previous_delay) * self.speed - (time.time() - step_start)
+                if remaining > 0:
+                    time.sleep(remaining)
+            previous_delay = delay
+            step_start = time.time()
+
+            next_action = self.actions[i + 1] if i + 1 < len(self.actions) else None
+            if next_action and next_action['type'] == 'navigate':
+                url_before = self.driver.current_url
+
+            try:
+                if action['type'] == 'navigate':
+                    self.wait_navigation(url_before, action['data'].get('url'))
+                    url_before = None
+                else:
+                    in_frame = self.enter_frame(action)
+                    try:
+                        if action['type'] == 'click':
+                            self.find(action).click()
+                        elif action['type'] == 'input':
+                            value = action['data'].get('value', '')
+                            if row is not None:
+                                value = PLACEHOLDER.sub(lambda m: str(row.get(m.group(1), '')), value)
+                            elem = self.find(action)
+                            elem.clear()
+                            elem.send_keys(value)
+                    finally:
+                        if in_frame:
+                            self.driver.switch_to.default_content()
+                done += 1
+                print("  ✓ 操作 %s: %s (%.2fs)" % (action['index'], action['type'], time.time() - step_start))
+            except Exception as e:
+                print("  ✗ 操作 %s: %s 失败: %s" % (action['index'], action['type'], e))
+
+        return done
+
+    def close(self):
+        if self.driver:
+            self.driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='自动操作脚本')
+    parser.add_argument('--data', help='数据文件（.xlsx / .csv），每行执行一次')
+    parser.add_argument('--speed', type=float, default=0, help='0=尽可能快，1=按录制时的节奏')
+    parser.add_argument('--actions', default=ACTIONS_FILE, help='操作JSON文件')
+    options = parser.parse_args()
+
+    with open(options.actions, 'r', encoding='utf-8') as f:
+        actions = json.load(f)
+    rows = load_rows(options.data) if options.data else [None]
+
+    print("=" * 50)
+    print("自动操作脚本: %d 个步骤, %d 组数据" % (len(actions), len(rows)))
+    print("=" * 50)
+
+    player = AutoPlayer(actions, options.speed)
+    try:
+        player.start()
+        failed = 0
+        for n, row in enumerate(rows, 1):
+            if options.data:
+                print("\n[%d/%d] %s" % (n, len(rows), row))
+            if player.play(row) < len(actions):
+                failed += 1
+        print("\n执行完成: %d 组成功, %d 组有失败的步骤" % (len(rows) - failed, failed))
+        input("按回车键关闭浏览器...")
+    finally:
+        player.close()
+
+
+if __name__ == "__main__":
+    main()
+"""
+
 
 class BrowserRecorder:
     """浏览器操作录制器"""
@@ -24,8 +396,15 @@ class BrowserRecorder:
     def __init__(self, url="https://pxxt.zju.edu.cn"):
         self.url = url
         self.driver = None
-        self.actions = []
+        self.session = None
+        self.push_mode = False
+        self.journal = None     # 操作实时追加到 recorded_actions_*.jsonl
         self.start_time = None
+        self._lock = threading.Lock()
+        self._api_requests = {}     # 记录的接口请求 requestId → URL
+        self._json_responses = set()
+        self._bodies = Queue()      # 等待读取响应体的 (requestId, 时间)
+        self._body_reader = None
 
     def start(self):
         """启动浏览器并开始录制"""
@@ -33,11 +412,16 @@ class BrowserRecorder:
         chrome_options.add_argument('--window-size=1920,1080')
         self.driver = webdriver.Chrome(options=chrome_options)
 
-        # 注入监听脚本
+        self.journal = ActionJournal(f"recorded_actions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        print(f"操作将实时保存到: {self.journal.path}")
+
+        # 注册监听脚本（必须在打开页面之前，新页面加载时自动运行）
         self._inject_listener()
 
         print(f"\n正在打开 {self.url} ...")
         self.driver.get(self.url)
+        if not self.push_mode:
+            self.driver.execute_script(LISTENER_SCRIPT)
 
         self.start_time = time.time()
         print("\n" + "=" * 60)
@@ -55,117 +439,118 @@ class BrowserRecorder:
         self._listen()
 
     def _inject_listener(self):
-        """注入JavaScript监听脚本"""
-        listener_script = """
-        // 存储操作历史
-        window.recordedActions = [];
-        window.lastInputTime = 0;
-
-        // 监听点击事件
-        document.addEventListener('click', function(e) {
-            var elem = e.target;
-            var action = {
-                type: 'click',
-                timestamp: Date.now(),
-                tagName: elem.tagName,
-                id: elem.id || '',
-                name: elem.name || '',
-                className: elem.className || '',
-                text: elem.textContent ? elem.textContent.trim().substring(0, 50) : '',
-                xpath: getXPath(elem),
-                value: elem.value || ''
-            };
-
-            // 如果是输入框，记录输入前的值
-            if (elem.tagName === 'INPUT' || elem.tagName === 'TEXTAREA') {
-                action.inputType = elem.type || 'text';
-                action.placeholder = elem.placeholder || '';
-            }
-
-            window.recordedActions.push(action);
-            console.log('录制: 点击', action);
-        }, true);
-
-        // 监听输入事件
-        document.addEventListener('input', function(e) {
-            var elem = e.target;
-            var now = Date.now();
-
-            // 防止重复记录（同一个输入框1秒内只记录一次）
-            if (elem.tagName === 'INPUT' || elem.tagName === 'TEXTAREA') {
-                var lastInput = window.lastInputElements || {};
-                var key = elem.id || elem.name || getXPath(elem);
-
-                if (!lastInput[key] || now - lastInput[key] > 1000) {
-                    var action = {
-                        type: 'input',
-                        timestamp: Date.now(),
-                        tagName: elem.tagName,
-                        id: elem.id || '',
-                        name: elem.name || '',
-                        className: elem.className || '',
-                        value: elem.value || '',
-                        xpath: getXPath(elem)
-                    };
-                    window.recordedActions.push(action);
-                    console.log('录制: 输入', action);
-
-                    lastInput[key] = now;
-                    window.lastInputElements = lastInput;
-                }
-            }
-        }, true);
-
-        // 监听页面导航
-        let lastUrl = location.href;
-        new MutationObserver(() => {
-            const url = location.href;
-            if (url !== lastUrl) {
-                var action = {
-                    type: 'navigate',
-                    timestamp: Date.now(),
-                    url: url
-                };
-                window.recordedActions.push(action);
-                console.log('录制: 导航', action);
-                lastUrl = url;
-            }
-        }).observe(document, { subtree: true, childList: true });
-
-        // 获取XPath的工具函数
-        function getXPath(element) {
-            if (element.id !== '') {
-                return "//*[@id='" + element.id + "']";
-            }
-            if (element === document.body) {
-                return '/html/body';
-            }
+        """
+        注册监听脚本
 
-            var ix = 0;
-            var siblings = element.parentNode.childNodes;
-            for (var i = 0; i < siblings.length; i++) {
-                var sibling = siblings[i];
-                if (sibling === element) {
-                    return getXPath(element.parentNode) + '/' + element.tagName.toLowerCase() + '[' + (ix + 1) + ']';
-                }
-                if (sibling.nodeType === 1 && sibling.tagName === element.tagName) {
-                    ix++;
-                }
-            }
-        }
+        优先通过CDP注册：Page.addScriptToEvaluateOnNewDocument 让脚本在每个新文档
+        （页面跳转后的新页面、iframe）中自动运行，事件通过 Runtime.addBinding 实时推送到Python，
+        页面跳转不会丢失操作，也不需要轮询；CDP不可用时退回为注入一次 + 轮询
         """
-        self.driver.execute_script(listener_script)
+        self.session = open_cdp_session(self.driver)
+        if self.session:
+            try:
+                self.session.on('Runtime.bindingCalled', self._on_binding)
+                self.session.send('Runtime.enable')
+                self.session.send('Runtime.addBinding', {'name': BINDING_NAME})
+                self.session.send('Page.enable')
+                self.session.send('Page.addScriptToEvaluateOnNewDocument', {'source': LISTENER_SCRIPT})
+                self.push_mode = True
+            except Exception as e:
+                print(f"CDP注入失败，改为轮询方式: {e}")
+                self.session.close()
+                self.session = None
+
+        if self.session:
+            # 同时记录页面发出的接口请求和JSON响应，录制结束后生成HTTP请求模板（见 http_template.py）
+            try:
+                self.session.on('Network.requestWillBeSent', self._on_request)
+                self.session.on('Network.responseReceived', self._on_response)
+                self.session.on('Network.loadingFinished', self._on_loading_finished)
+                self.session.send('Network.enable', {'maxPostDataSize': MAX_POST_DATA})
+                self._body_reader = threading.Thread(target=self._read_bodies, name='response-bodies', daemon=True)
+                self._body_reader.start()
+            except Exception as e:
+                print(f"网络请求记录不可用，不生成HTTP请求模板: {e}")
+            return
+
+        print("提示: 轮询方式下整页跳转后需要重新注入监听脚本，跳转前的最后几个操作可能丢失")
+        self.push_mode = False
+
+    def _on_request(self, params):
+        """CDP推送的网络请求（在CDP读取线程中调用），和操作写入同一个日志以保持先后顺序"""
+        if not is_api_request(params):
+            return
+        self._api_requests[params.get('requestId')] = params['request']['url']
+        with self._lock:
+            self.journal.append(capture_request(params))
+
+    def _on_response(self, params):
+        if params.get('requestId') in self._api_requests and is_json_response(params):
+            self._json_responses.add(params['requestId'])
+
+    def _on_loading_finished(self, params):
+        """响应体在加载完成后才能读取；读取要等CDP回复，不能在读取线程中进行，交给 _read_bodies"""
+        request_id = params.get('requestId')
+        if request_id in self._json_responses:
+            self._json_responses.discard(request_id)
+            self._bodies.put((request_id, time.time() * 1000))
+
+    def _read_bodies(self):
+        """读取JSON响应体写入日志（用于找出之后请求中来自响应的字段，如资产主键）"""
+        while True:
+            item = self._bodies.get()
+            if item is None or self.session.closed:
+                return
+            request_id, timestamp = item
+            try:
+                result = self.session.send('Network.getResponseBody', {'requestId': request_id})
+            except Exception:
+                continue
+            body = result.get('body', '')
+            if result.get('base64Encoded') or len(body) > MAX_RESPONSE_BODY:
+                continue
+            with self._lock:
+                self.journal.append(capture_response(request_id, self._api_requests[request_id], body, timestamp))
+
+    def _on_binding(self, params):
+        """CDP推送的操作（在CDP读取线程中调用）"""
+        if params.get('name') != BINDING_NAME:
+            return
+        try:
+            action = json.loads(params['payload'])
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            self.journal.append(action)
 
     def _listen(self):
         """监听并收集操作"""
         try:
             while True:
                 time.sleep(0.5)
-                # 定期获取录制的操作
-                actions = self.driver.execute_script("return window.recordedActions || [];")
-                self.actions = actions
+                if self.push_mode:
+                    if self.session.closed:
+                        print("\n浏览器连接已断开，结束录制")
+                        break
+                else:
+                    # 定期取出新录制的操作；页面跳转后重新注入
+                    self._drain()
+                with self._lock:
+                    self.journal.sync_if_due()
         except KeyboardInterrupt:
-            self.stop()
+            pass
+        except Exception as e:
+            # 浏览器崩溃或窗口被关闭：已录制的操作都在JSONL文件中
+            print(f"\n录制中断: {e}")
+        self.stop()
+
+    def _drain(self):
+        """取出页面中新录制的操作：splice(0) 同时清空页面中的数组，每次只传输增量"""
+        actions = self.driver.execute_script(
+            LISTENER_SCRIPT + "return window.recordedActions ? window.recordedActions.splice(0) : [];")
+        with self._lock:
+            for action in actions:
+                self.journal.append(action)
 
     def stop(self):
         """停止录制并保存"""
@@ -173,241 +558,160 @@ class BrowserRecorder:
         print("录制已停止")
         print("=" * 60)
 
-        if self.actions:
-            print(f"\n共录制了 {len(self.actions)} 个操作")
-
-            # 处理操作数据
-            processed_actions = self._process_actions()
+        if self.push_mode:
+            if self._body_reader:
+                # 读完已加载的响应体再断开
+                self._bodies.put(None)
+                self._body_reader.join(5)
+            self.session.close()
+        else:
+            # 取出最后一次轮询之后的操作
+            try:
+                self._drain()
+            except Exception:
+                pass
+
+        with self._lock:
+            self.journal.close()
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        print("\n浏览器已关闭")
 
-            # 保存为JSON
-            filename = f"recorded_actions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(processed_actions, f, ensure_ascii=False, indent=2)
-            print(f"\n操作已保存到: {filename}")
+        self.finalize(self.journal.path)
 
-            # 生成可执行脚本
-            script_filename = self._generate_script(processed_actions)
-            print(f"可执行脚本已生成: {script_filename}")
+    def finalize(self, journal_path):
+        """
+        把JSONL录制文件转换为操作JSON（recorded_actions_*.json）和可执行脚本
+        录制中途崩溃时可以用 python browser_recorder.py --finalize xxx.jsonl 恢复
 
-            # 显示操作摘要
-            self._show_summary(processed_actions)
-        else:
+        Returns:
+            操作JSON文件名，没有录制到操作时返回None
+        """
+        actions = []
+        requests = []
+        responses = []
+        for entry in read_journal(journal_path):
+            {'request': requests, 'response': responses}.get(entry['type'], actions).append(entry)
+        if not actions:
             print("\n没有录制到任何操作")
+            return None
 
-        self.driver.quit()
-        print("\n浏览器已关闭")
+        print(f"\n共录制了 {len(actions)} 个操作")
 
-    def _process_actions(self):
-        """处理录制的操作"""
-        if not self.actions:
+        # 处理操作数据
+        processed_actions = self._process_actions(actions)
+
+        # 保存为JSON
+        filename = str(Path(journal_path).with_suffix('.json'))
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(processed_actions, f, ensure_ascii=False, indent=2)
+        print(f"\n操作已保存到: {filename}")
+
+        # 生成HTTP请求模板（录制到接口请求时）
+        if requests:
+            template = build_http_template(requests, processed_actions, self.url, responses)
+            template_filename = str(Path(journal_path).with_suffix('.http.json'))
+            with open(template_filename, 'w', encoding='utf-8') as f:
+                json.dump(template, f, ensure_ascii=False, indent=2)
+            matched = sum(1 for r in template['requests'] if r['fields'])
+            print(f"HTTP请求模板已保存到: {template_filename}"
+                  f"（{len(requests)} 个请求，{matched} 个含录制的输入值或来自响应的值）")
+            for r in template['requests']:
+                for field in r['fixed_ids']:
+                    print(f"  警告: {r['method']} {r['url']} 的 {field['field']}={field['recorded']!r} "
+                          f"仍为录制时的值，批量发送时每条记录都会作用于同一条数据")
+
+        # 生成可执行脚本
+        script_filename = self._generate_script(processed_actions, filename)
+        print(f"可执行脚本已生成: {script_filename}")
+        print(f"立即回放: python browser_recorder.py --replay {filename}")
+
+        # 显示操作摘要
+        self._show_summary(processed_actions)
+        return filename
+
+    def _process_actions(self, actions):
+        """
+        处理录制的操作，压缩为规范的高层步骤：
+        同一输入框的多次输入合并为最终值（fill），输入前聚焦输入框的点击和多余的导航删除，
+        每个操作带 step 字段：fill / activate / navigate
+        """
+        if not actions:
             return []
 
         processed = []
-        start_time = self.actions[0]['timestamp'] if self.actions else 0
+        start_time = actions[0]['timestamp']
 
-        for i, action in enumerate(self.actions):
+        for i, action in enumerate(actions):
             # 计算相对时间（秒）
             relative_time = (action['timestamp'] - start_time) / 1000
 
             processed_action = {
                 'index': i + 1,
                 'type': action['type'],
+                'step': STEP_NAMES.get(action['type'], action['type']),
                 'time_delay': round(relative_time, 2),
                 'data': action
             }
 
-            # 生成定位器
-            locator = self._generate_locator(action)
-            if locator:
-                processed_action['locator'] = locator
+            # 生成候选定位器（第一个作为默认定位器，兼容只读取 locator 的脚本）
+            locators = self._generate_locators(action)
+            if locators:
+                processed_action['locator'] = locators[0]
+                processed_action['locators'] = locators
 
             processed.append(processed_action)
 
-        return processed
-
-    def _generate_locator(self, action):
-        """生成元素定位器"""
-        if action['type'] in ['click', 'input']:
-            # 优先级：ID > Name > Class > XPath > Text
-            if action.get('id'):
-                return {'type': 'id', 'value': action['id']}
-            elif action.get('name'):
-                return {'type': 'name', 'value': action['name']}
-            elif action.get('className'):
-                classes = action['className'].split()
-                if classes:
-                    return {'type': 'class', 'value': classes[0]}
-            elif action.get('xpath'):
-                return {'type': 'xpath', 'value': action['xpath']}
-            elif action.get('text'):
-                return {'type': 'text', 'value': action['text']}
-        return None
-
-    def _generate_script(self, actions):
-        """生成可执行的Python脚本"""
-        filename = f"auto_replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.py"
-
-        script_content = f'''#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""
-自动操作脚本
-生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-录制操作数: {len(actions)}
-"""
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
-
-
-class AutoPlayer:
-    """自动操作播放器"""
-
-    def __init__(self, base_url="{self.url}"):
-        self.base_url = base_url
-        self.driver = None
-        self.wait = None
-
-    def start(self):
-        """启动浏览器"""
-        chrome_options = Options()
-        chrome_options.add_argument('--window-size=1920,1080')
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 10)
-
-        print("正在打开页面...")
-        self.driver.get(self.base_url)
-        time.sleep(2)
-
-        print("开始执行操作...\\n")
-
-    def play(self):
-        """执行录制的操作"""
-        try:
-'''
-
-        # 为每个操作生成代码
-        for action in actions:
-            action_type = action['type']
-            delay = action['time_delay']
-            data = action['data']
-
-            script_content += f"\n            # 操作 {action['index']}: {action_type}\n"
-
-            if action_type == 'navigate':
-                script_content += f"            # 导航到: {data.get('url', 'N/A')}\n"
-                script_content += f"            # 注意: 页面导航由原始操作触发，此处仅记录\n"
-
-            elif action_type == 'click':
-                locator = action.get('locator', {})
-                script_content += self._generate_click_code(locator, data)
-                script_content += f"            time.sleep({delay})\n"
-
-            elif action_type == 'input':
-                locator = action.get('locator', {})
-                value = data.get('value', '')
-                script_content += self._generate_input_code(locator, value, data)
-                script_content += f"            time.sleep({delay})\n"
-
-        # 添加结尾
-        script_content += '''
-            print("\\n所有操作执行完成！")
-            print("按回车键关闭浏览器...")
-            input()
-
-        except Exception as e:
-            print(f"执行出错: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            if self.driver:
-                self.driver.quit()
-
-    def _find_element(self, locator_type, locator_value):
-        """查找元素"""
-        by_mapping = {
-            'id': By.ID,
-            'name': By.NAME,
-            'class': By.CLASS_NAME,
-            'xpath': By.XPATH,
-            'text': By.XPATH,
-        }
-
-        by = by_mapping.get(locator_type, By.XPATH)
-
-        if locator_type == 'text':
-            # 使用文本定位
-            xpath = f"//*[contains(text(), '{locator_value}')]"
-            return self.wait.until(EC.presence_of_element_located((By.XPATH, xpath)))
-
-        return self.wait.until(EC.presence_of_element_located((by, locator_value))
-
-    def _click(self, locator_type, locator_value):
-        """点击元素"""
-        elem = self._find_element(locator_type, locator_value)
-        elem.click()
-        print(f"  ✓ 点击: {{locator_type}}={{locator_value}}")
-
-    def _input(self, locator_type, locator_value, text):
-        """输入文本"""
-        elem = self._find_element(locator_type, locator_value)
-        elem.clear()
-        elem.send_keys(text)
-        print(f"  ✓ 输入: {{locator_type}}={{locator_value}}, 值={{text}}")
+        compacted = compile_actions(processed)
+        if len(compacted) < len(processed):
+            print(f"已压缩: {len(processed)} 个原始事件 → {len(compacted)} 个步骤")
+        return compacted
 
+    def _generate_locators(self, action):
+        """
+        生成候选定位器列表，按默认优先级排列：ID > Name > CSS（标签+全部class） > XPath > Text
+        回放时逐个试探，实际最快成功的候选会被记住（见 locator_chain.py）
+        """
+        if action['type'] not in ['click', 'input']:
+            return []
 
-if __name__ == "__main__":
-    print("=" * 50)
-    print("自动操作脚本")
-    print("=" * 50)
+        locators = []
+        if action.get('id'):
+            locators.append({'type': 'id', 'value': action['id']})
+        if action.get('name'):
+            locators.append({'type': 'name', 'value': action['name']})
+
+        # 只用第一个class经常匹配到很多元素，这里组合标签和全部class
+        class_name = action.get('className')
+        if isinstance(class_name, str):
+            classes = [c for c in class_name.split() if re.fullmatch(r'-?[A-Za-z_][\w-]*', c)]
+            if classes:
+                tag = (action.get('tagName') or '').lower()
+                locators.append({'type': 'css', 'value': tag + ''.join(f'.{c}' for c in classes)})
+
+        if action.get('xpath'):
+            locators.append({'type': 'xpath', 'value': action['xpath']})
+        if action['type'] == 'click' and action.get('text'):
+            locators.append({'type': 'text', 'value': action['text']})
+        return locators
+
+    def _generate_script(self, actions, actions_file):
+        """生成数据驱动的回放脚本（读取操作JSON，可逐行处理数据文件）"""
+        filename = f"auto_replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.py"
 
-    player = AutoPlayer()
-    player.start()
-    player.play()
-'''
+        script_content = (REPLAY_SCRIPT_TEMPLATE
+                          .replace('__GENERATED_AT__', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                          .replace('__STEP_COUNT__', str(len(actions)))
+                          .replace('__BASE_URL__', json.dumps(self.url, ensure_ascii=False))
+                          .replace('__ACTIONS_FILE__', json.dumps(Path(actions_file).name, ensure_ascii=False)))
 
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(script_content)
 
         return filename
 
-    def _generate_click_code(self, locator, data):
-        """生成点击操作代码"""
-        if not locator:
-            return "            # 无法定位该元素\n"
-
-        loc_type = locator['type']
-        loc_value = locator['value']
-
-        return f'''            try:
-                elem = self._find_element('{loc_type}', '{loc_value}')
-                elem.click()
-                print(f"  ✓ 操作 {action['index']}: 点击")
-            except:
-                print(f"  ✗ 操作 {action['index']}: 点击失败，定位方式={{'{loc_type}'}}={{'{loc_value}'}}")
-'''
-
-    def _generate_input_code(self, locator, value, data):
-        """生成输入操作代码"""
-        if not locator:
-            return f"            # 无法定位该输入框，值: {value}\n"
-
-        loc_type = locator['type']
-        loc_value = locator['value']
-
-        return f'''            try:
-                elem = self._find_element('{loc_type}', '{loc_value}')
-                elem.clear()
-                elem.send_keys('{value}')
-                print(f"  ✓ 操作 {action['index']}: 输入 = {{'{value}'}}")
-            except:
-                print(f"  ✗ 操作 {action['index']}: 输入失败")
-'''
-
     def _show_summary(self, actions):
         """显示操作摘要"""
         print("\n" + "=" * 60)
@@ -425,74 +729,51 @@ if __name__ == "__main__":
 
         print("\n主要操作列表:")
         for action in actions[:10]:  # 显示前10个
-            print(f"  [{action['index']:2d}] {action['type']:10s} - {action.get('locator', {}).get('type', 'N/A')}")
+            step = action.get('step', action['type'])
+            print(f"  [{action['index']:2d}] {step:10s} - {action.get('locator', {}).get('type', 'N/A')}")
 
         if len(actions) > 10:
             print(f"  ... 还有 {len(actions) - 10} 个操作")
 
 
-class AutoPlayer:
-    """自动操作播放器"""
-
-    def __init__(self, base_url):
-        self.base_url = base_url
-        self.driver = None
-        self.wait = None
-
-    def start(self):
-        """启动浏览器"""
-        chrome_options = Options()
-        chrome_options.add_argument('--window-size=1920,1080')
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 10)
-
-        print("正在打开页面...")
-        self.driver.get(self.base_url)
-        time.sleep(2)
-        print("开始执行操作...\n")
-
-    def play(self, actions):
-        """执行录制的操作"""
-        try:
-            for action in actions:
-                action_type = action['type']
-
-                if action_type == 'click':
-                    self._click(action)
-                elif action_type == 'input':
-                    self._input(action)
-
-                time.sleep(0.5)
-
-            print("\n所有操作执行完成！")
-            print("按回车键关闭浏览器...")
-            input()
-
-        except Exception as e:
-            print(f"执行出错: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            if self.driver:
-                self.driver.quit()
-
-    def _click(self, action):
-        """点击元素"""
-        # 实现点击逻辑
-        pass
-
-    def _input(self, action):
-        """输入文本"""
-        # 实现输入逻辑
-        pass
-
-
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='浏览器操作录制工具')
+    parser.add_argument('--finalize', metavar='JSONL',
+                        help='把中断的录制文件（recorded_actions_*.jsonl）转换为操作JSON和回放脚本')
+    parser.add_argument('--replay', metavar='JSON',
+                        help='直接回放录制的操作（recorded_actions_*.json / .jsonl），不生成脚本')
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE',
+                        help='回放时替换输入值中的 {{NAME}}，可重复')
+    parser.add_argument('--speed', type=float, default=0, help='回放速度系数：0=尽可能快（默认），1=录制时的速度')
+    parser.add_argument('--url', default="https://pxxt.zju.edu.cn", help='回放的起始页面')
+    options = parser.parse_args(sys.argv[1:])
+
     print("=" * 60)
     print("浏览器操作录制工具")
     print("=" * 60)
 
+    if options.finalize:
+        BrowserRecorder().finalize(options.finalize)
+        return
+
+    if options.replay:
+        params = dict(item.split('=', 1) for item in options.param)
+        player = AutoPlayer(options.url, speed=options.speed)
+        player.load(options.replay)
+        missing = player.columns - set(params)
+        if missing:
+            print(f"缺少参数: {', '.join(sorted(missing))}（用 --param NAME=VALUE 指定）")
+            return
+        try:
+            player.start()
+            input("如需登录请在浏览器中完成，然后按回车开始回放...")
+            player.play([params or None])
+            input("\n按回车键关闭浏览器...")
+        finally:
+            player.close()
+        return
+
     url = input("\n请输入起始URL (默认: https://pxxt.zju.edu.cn): ").strip()
     if not url:
         url = "https://pxxt.zju.edu.cn"
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chrome DevTools Protocol (CDP) 会话
+selenium 的 execute_cdp_cmd 只能发送命令、收不到事件，
+这里直接连接 chromedriver 打开的调试端口，订阅当前页面的 CDP 事件（Network.* 等）
+"""
+
+import itertools
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class CDPSession:
+    """连接到当前页面（target）的 CDP WebSocket 会话"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.target_id = None
+        self.closed = True
+        self._ws = None
+        self._reader = None
+        self._ids = itertools.count(1)
+        self._pending = {}     # 命令id -> {'event': threading.Event, 'reply': dict}
+        self._listeners = {}   # 事件名 -> [回调函数]
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """连接到driver当前窗口对应的页面target"""
+        try:
+            import websocket  # websocket-client（selenium 4 的依赖）
+
+            address = self.driver.capabilities['goog:chromeOptions']['debuggerAddress']
+            info = self.driver.execute_cdp_cmd('Target.getTargetInfo', {})
+            self.target_id = info['targetInfo']['targetId']
+
+            url = f"ws://{address}/devtools/page/{self.target_id}"
+            # suppress_origin: 新版Chrome会拒绝带Origin头的调试连接
+            self._ws = websocket.create_connection(url, suppress_origin=True, enable_multithread=True)
+            self.closed = False
+
+            self._reader = threading.Thread(target=self._read_loop, name='cdp-reader', daemon=True)
+            self._reader.start()
+            logger.debug(f"CDP会话已连接: {url}")
+            return True
+        except Exception as e:
+            logger.warning(f"CDP会话连接失败: {e}")
+            return False
+
+    def send(self, method, params=None, timeout=10):
+        """发送CDP命令并等待结果"""
+        if self.closed:
+            raise RuntimeError("CDP会话已关闭")
+
+        msg_id = next(self._ids)
+        pending = {'event': threading.Event(), 'reply': None}
+        with self._lock:
+            self._pending[msg_id] = pending
+
+        try:
+            self._ws.send(json.dumps({'id': msg_id, 'method': method, 'params': params or {}}))
+            if not pending['event'].wait(timeout):
+                raise TimeoutError(f"CDP命令超时: {method}")
+        finally:
+            with self._lock:
+                self._pending.pop(msg_id, None)
+
+        reply = pending['reply'] or {}
+        if 'error' in reply:
+            raise RuntimeError(f"CDP命令 {method} 出错: {reply['error'].get('message')}")
+        return reply.get('result', {})
+
+    def on(self, method, callback):
+        """订阅CDP事件，回调在读取线程中执行，参数为事件的params"""
+        with self._lock:
+            self._listeners.setdefault(method, []).append(callback)
+
+    def off(self, method, callback):
+        """取消订阅"""
+        with self._lock:
+            callbacks = self._listeners.get(method, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def _read_loop(self):
+        """后台读取WebSocket消息，分发命令结果和事件"""
+        while not self.closed:
+            try:
+                raw = self._ws.recv()
+            except Exception as e:
+                if not self.closed:
+                    logger.debug(f"CDP连接已断开: {e}")
+                break
+
+            if not raw:
+                continue
+
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                continue
+
+            if 'id' in message:
+                with self._lock:
+                    pending = self._pending.get(message['id'])
+                if pending:
+                    pending['reply'] = message
+                    pending['event'].set()
+                continue
+
+            with self._lock:
+                callbacks = list(self._listeners.get(message.get('method'), []))
+            for callback in callbacks:
+                try:
+                    callback(message.get('params', {}))
+                except Exception as e:
+                    logger.debug(f"处理CDP事件 {message.get('method')} 出错: {e}")
+
+        self.closed = True
+        # 唤醒所有还在等待结果的命令
+        with self._lock:
+            for pending in self._pending.values():
+                pending['event'].set()
+
+    def close(self):
+        """关闭会话"""
+        self.closed = True
+        if self._ws:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+
+def open_cdp_session(driver):
+    """为driver当前页面打开CDP会话，失败时返回None"""
+    session = CDPSession(driver)
+    if session.connect():
+        return session
+    return None
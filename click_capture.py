@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+点击捕获
+页面中每次点击都在浏览器内生成被点击元素的全部候选定位器（见 locator_scripts.py），
+通过CDP的 Runtime.addBinding 立即推送到Python，不需要轮询；
+脚本用 Page.addScriptToEvaluateOnNewDocument 注册，页面跳转后和iframe中同样生效。
+CDP不可用时退回为在每个frame中注入脚本 + 轮询
+"""
+
+import json
+import logging
+import time
+from queue import Empty, Queue
+
+from cdp_session import open_cdp_session
+from locator_health import walk_frames
+from locator_scripts import LOCATOR_FUNCTIONS
+
+logger = logging.getLogger(__name__)
+
+
+# Python端接收点击的binding名称
+BINDING_NAME = '__locatorClick'
+
+# 轮询方式下的检查间隔（秒）
+POLL_INTERVAL = 0.3
+
+# 页面内的点击监听（可重复注入，已安装时不重复注册）
+CAPTURE_SCRIPT = """
+(function () {
+    if (window.__clickCaptureInstalled) return;
+    window.__clickCaptureInstalled = true;
+""" + LOCATOR_FUNCTIONS + """
+    document.addEventListener('click', function (e) {
+        var info = __describeElement(e.target);
+        if (!info) return;
+        info.timestamp = Date.now();
+        info.topLevel = window === window.top;
+        if (typeof window.%s === 'function') {
+            window.%s(JSON.stringify(info));
+        } else {
+            (window.__capturedClicks = window.__capturedClicks || []).push(info);
+        }
+    }, true);
+})();
+""" % (BINDING_NAME, BINDING_NAME)
+
+# 轮询方式：取出并清空页面中记录的点击
+DRAIN_SCRIPT = "return window.__capturedClicks ? window.__capturedClicks.splice(0) : [];"
+
+
+class ClickCapture:
+    """
+    捕获用户在浏览器中的点击
+
+    Args:
+        driver: WebDriver（应在打开目标页面之前或之后调用 start）
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.session = None
+        self.push_mode = False
+        self._clicks = Queue()
+
+    def start(self):
+        """注册点击监听，返回self"""
+        self.session = open_cdp_session(self.driver)
+        if self.session:
+            try:
+                self.session.on('Runtime.bindingCalled', self._on_binding)
+                self.session.send('Runtime.enable')
+                self.session.send('Runtime.addBinding', {'name': BINDING_NAME})
+                self.session.send('Page.enable')
+                self.session.send('Page.addScriptToEvaluateOnNewDocument', {'source': CAPTURE_SCRIPT})
+                self.push_mode = True
+            except Exception as e:
+                logger.warning(f"CDP注册失败，改为轮询方式: {e}")
+                self.session.close()
+                self.session = None
+        if not self.push_mode:
+            logger.warning("点击捕获使用轮询方式，页面跳转后需要重新注入（每次检查时自动注入）")
+
+        # 已经打开的页面（和其中的iframe）也注入一次
+        self._inject()
+        return self
+
+    def _inject(self):
+        try:
+            walk_frames(self.driver, lambda path: self.driver.execute_script(CAPTURE_SCRIPT))
+        except Exception as e:
+            logger.debug(f"注入点击监听失败: {e}")
+
+    def _on_binding(self, params):
+        """CDP推送的点击（在CDP读取线程中调用）"""
+        if params.get('name') != BINDING_NAME:
+            return
+        try:
+            self._clicks.put(json.loads(params['payload']))
+        except (KeyError, ValueError):
+            pass
+
+    def _poll(self):
+        """轮询方式：取出每个frame中记录的点击，并为新页面重新注入监听"""
+        self._inject()
+        results = walk_frames(self.driver, lambda path: self.driver.execute_script(DRAIN_SCRIPT))
+        for _, clicks in results:
+            for info in clicks or []:
+                self._clicks.put(info)
+
+    def next_click(self, timeout=None):
+        """
+        等待下一次点击
+
+        Returns:
+            元素信息（tagName、id、name、className、text、frame、locators），超时返回None
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, max(deadline - time.monotonic(), 0))
+            try:
+                return self._clicks.get(timeout=wait) if self.push_mode else self._clicks.get_nowait()
+            except Empty:
+                pass
+            if self.push_mode and self.session.closed:
+                return None
+            if not self.push_mode:
+                try:
+                    self._poll()
+                except Exception as e:
+                    logger.debug(f"读取点击记录失败: {e}")
+                if not self._clicks.empty():
+                    continue
+                time.sleep(wait)
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+    def clear(self):
+        """丢弃已捕获但还没有读取的点击（如登录过程中的点击）"""
+        if not self.push_mode:
+            try:
+                self._poll()
+            except Exception:
+                pass
+        while not self._clicks.empty():
+            self._clicks.get_nowait()
+
+    def stop(self):
+        if self.session:
+            self.session.close()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+失败诊断
+运行期间只在内存环形缓冲区里记录最近的步骤和日志（不产生任何WebDriver调用），
+某条记录失败时才采集截图、页面HTML、浏览器控制台日志和最近的网络请求，
+保存为一个诊断包目录，成功的记录不承担任何开销
+"""
+
+import json
+import logging
+import re
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def enable_console_log(chrome_options):
+    """让chromedriver保留浏览器控制台日志（失败时通过 get_log('browser') 读取）"""
+    chrome_options.set_capability('goog:loggingPrefs', {'browser': 'ALL'})
+
+
+class _RingBufferHandler(logging.Handler):
+    """把日志记录追加到诊断的环形缓冲区"""
+
+    def __init__(self, diagnostics):
+        super().__init__(logging.INFO)
+        self.diagnostics = diagnostics
+
+    def emit(self, record):
+        self.diagnostics._events.append({
+            'time': record.created,
+            'kind': 'log',
+            'level': record.levelname,
+            'message': record.getMessage(),
+        })
+
+
+class FailureDiagnostics:
+    """失败诊断采集器"""
+
+    def __init__(self, driver, output_dir='failures', capacity=100, network=None):
+        self.driver = driver
+        self.output_dir = Path(output_dir)
+        self.network = network          # NetworkIdleTracker，提供最近的网络请求
+        self._events = deque(maxlen=capacity)
+        self._handler = _RingBufferHandler(self)
+        logging.getLogger().addHandler(self._handler)
+
+    def note(self, step, **detail):
+        """记录一个步骤（只写内存，不访问浏览器）"""
+        self._events.append({'time': time.time(), 'kind': 'step', 'step': step, **detail})
+
+    def capture(self, key, error=None):
+        """
+        采集一条失败记录的诊断包
+
+        Args:
+            key: 记录标识（如资产编号），用于目录名
+            error: 异常对象或错误说明（可选）
+
+        Returns:
+            诊断包目录，采集失败时返回None
+        """
+        safe_key = re.sub(r'[^\w.-]+', '_', str(key))[:60]
+        bundle = self.output_dir / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{safe_key}"
+        try:
+            bundle.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"无法创建诊断目录 {bundle}: {e}")
+            return None
+
+        summary = {'key': str(key), 'time': datetime.now().isoformat(timespec='seconds')}
+        if error is not None:
+            summary['error'] = str(error)
+            if isinstance(error, BaseException):
+                summary['traceback'] = ''.join(
+                    traceback.format_exception(type(error), error, error.__traceback__))
+
+        # 每一项单独容错：浏览器可能已经崩溃，能采多少采多少
+        self._try(summary, 'url', lambda: self.driver.current_url)
+        self._try(summary, 'screenshot', lambda: self.driver.save_screenshot(str(bundle / 'screenshot.png')))
+        self._try(summary, 'page', lambda: self._write(bundle / 'page.html', self.driver.page_source))
+        # 当前可能停在iframe里，再保存一份顶层页面（同时切回顶层，便于下一条记录继续）
+        self._try(summary, 'top_page', lambda: self._save_top_page(bundle / 'top.html'))
+        self._try(summary, 'console', lambda: self._write_json(bundle / 'console.json', self.driver.get_log('browser')))
+        if self.network:
+            self._try(summary, 'network', lambda: self._write_json(bundle / 'network.json', self.network.recent_events()))
+
+        events = [dict(e, time=datetime.fromtimestamp(e['time']).strftime('%H:%M:%S.%f')[:-3]) for e in self._events]
+        self._write_json(bundle / 'steps.json', events)
+        self._write_json(bundle / 'summary.json', summary)
+
+        logger.info(f"失败诊断已保存到: {bundle}")
+        return bundle
+
+    def _save_top_page(self, path):
+        self.driver.switch_to.default_content()
+        return self._write(path, self.driver.page_source)
+
+    @staticmethod
+    def _try(summary, name, func):
+        try:
+            result = func()
+            summary[name] = result if name == 'url' else 'ok'
+        except Exception as e:
+            summary[name] = f"采集失败: {e}"
+
+    @staticmethod
+    def _write(path, text):
+        path.write_text(text or '', encoding='utf-8')
+
+    @staticmethod
+    def _write_json(path, data):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+
+    def close(self):
+        logging.getLogger().removeHandler(self._handler)
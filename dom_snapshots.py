@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DOM快照
+保存关键页面（搜索页、结果表格、编辑弹窗iframe）每个frame的HTML，
+之后不需要浏览器和登录，用 lxml / cssselect 离线检查定位器（每个定位器毫秒级），
+并对比系统升级前后的快照，找出页面结构的变化和受影响的定位器
+
+用法:
+    python dom_snapshots.py check dom_snapshots/edit_20250301_100000 --config config_template.json
+    python dom_snapshots.py diff dom_snapshots/edit_20250301_100000 dom_snapshots/edit_20250601_100000
+
+依赖（可选）: pip install lxml cssselect
+"""
+
+import argparse
+import difflib
+import json
+import logging
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from locator_health import build_report, flatten, log_report, merge_reports, walk_frames
+
+logger = logging.getLogger(__name__)
+
+
+# 快照目录
+SNAPSHOT_DIR = 'dom_snapshots'
+
+# 每个frame的差异最多输出多少行
+MAX_DIFF_LINES = 80
+
+# 结构对比时忽略的标签
+IGNORED_TAGS = {'script', 'style', 'link', 'meta', 'noscript'}
+
+# 每个frame读取一次地址和HTML
+SNAPSHOT_SCRIPT = "return {url: location.href, html: document.documentElement.outerHTML};"
+
+# config_template.json 中的 By 写法 → Selenium定位方式
+BY_VALUES = {
+    'By.ID': 'id',
+    'By.NAME': 'name',
+    'By.CLASS_NAME': 'class name',
+    'By.CSS_SELECTOR': 'css selector',
+    'By.XPATH': 'xpath',
+    'By.TAG_NAME': 'tag name',
+    'By.LINK_TEXT': 'link text',
+    'By.PARTIAL_LINK_TEXT': 'partial link text',
+}
+
+
+def _lxml():
+    """按需导入lxml（只有离线检查和对比需要）"""
+    try:
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+    except ImportError:
+        raise RuntimeError("离线检查需要安装 lxml 和 cssselect: pip install lxml cssselect")
+    return lxml.html, CSSSelector
+
+
+def _frame_file(path):
+    return 'frame_top.html' if not path else 'frame_' + '_'.join(str(i) for i in path) + '.html'
+
+
+def take_snapshot(driver, name, directory=SNAPSHOT_DIR):
+    """
+    保存当前页面（含iframe）的DOM快照
+
+    Args:
+        name: 页面名称，如 search / edit
+
+    Returns:
+        快照目录
+    """
+    safe_name = re.sub(r'[^\w.-]+', '_', name)[:40] or 'page'
+    target = Path(directory) / f"{safe_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    target.mkdir(parents=True, exist_ok=True)
+
+    frames = []
+    for path, page in walk_frames(driver, lambda path: driver.execute_script(SNAPSHOT_SCRIPT)):
+        filename = _frame_file(path)
+        (target / filename).write_text(page['html'], encoding='utf-8')
+        frames.append({'path': path, 'url': page['url'], 'file': filename})
+
+    meta = {'name': name, 'url': driver.current_url, 'taken': datetime.now().isoformat(timespec='seconds'),
+            'frames': frames}
+    with open(target / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    logger.info(f"DOM快照已保存: {target}（{len(frames)} 个frame）")
+    return target
+
+
+class Snapshot:
+    """读取的DOM快照（各frame的HTML按需解析）"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with open(self.directory / 'meta.json', 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.frames = self.meta['frames']
+        self._roots = {}
+
+    def root(self, frame):
+        """frame的根元素（lxml）"""
+        key = frame['file']
+        if key not in self._roots:
+            html, _ = _lxml()
+            text = (self.directory / frame['file']).read_text(encoding='utf-8')
+            self._roots[key] = html.document_fromstring(text or '<html></html>')
+        return self._roots[key]
+
+    def count(self, root, locator):
+        """定位器（页面内脚本格式 {'type', 'value'}）在文档中的匹配数量，语法错误时为 -1"""
+        _, CSSSelector = _lxml()
+        kind, value = locator['type'], locator['value']
+        try:
+            if kind == 'id':
+                return len(root.xpath('//*[@id=$v]', v=value))
+            if kind == 'name':
+                return len(root.xpath('//*[@name=$v]', v=value))
+            if kind == 'css':
+                return len(CSSSelector(value)(root))
+            if kind == 'text':
+                return len(root.xpath('//*[contains(text(), $v)]', v=value.strip()))
+            result = root.xpath(value)
+            return len(result) if isinstance(result, list) else int(bool(result))
+        except Exception:
+            return -1
+
+    def evaluate(self, locators):
+        """
+        离线检查定位器，报告格式与 locator_health.check_locators 相同
+
+        Args:
+            locators: 元素名 → 候选定位器列表
+        """
+        _, items = flatten(locators)
+        started = time.perf_counter()
+        frames = []
+        for frame in self.frames:
+            root = self.root(frame)
+            frame_start = time.perf_counter()
+            results = []
+            for item in items:
+                item_start = time.perf_counter()
+                count = self.count(root, item)
+                results.append({'count': count, 'ms': (time.perf_counter() - item_start) * 1000})
+            frames.append({'path': frame['path'], 'url': frame['url'],
+                           'seconds': round(time.perf_counter() - frame_start, 3), 'results': results})
+        return build_report(locators, frames, self.meta['url'], time.perf_counter() - started)
+
+    def outline(self, frame):
+        """frame的结构提纲：每个元素一行（缩进 + 标签#id.class[name=...]），用于对比"""
+        lines = []
+
+        def walk(element, depth):
+            if not isinstance(element.tag, str) or element.tag in IGNORED_TAGS:
+                return
+            line = '  ' * depth + element.tag
+            if element.get('id'):
+                line += '#' + element.get('id')
+            classes = (element.get('class') or '').split()
+            if classes:
+                line += '.' + '.'.join(sorted(classes))
+            if element.get('name'):
+                line += f"[name={element.get('name')}]"
+            lines.append(line)
+            for child in element:
+                walk(child, depth + 1)
+
+        walk(self.root(frame), 0)
+        return lines
+
+
+def diff_snapshots(old, new, locators=None):
+    """
+    对比两个快照
+
+    Args:
+        old / new: Snapshot
+        locators: 可选，元素名 → 候选定位器列表，对比每个元素在两个快照中的检查结果
+
+    Returns:
+        {'frames_added', 'frames_removed', 'changes': {frame路径: 差异行}, 'locators': {元素名: 前后状态}}
+    """
+    old_frames = {tuple(f['path']): f for f in old.frames}
+    new_frames = {tuple(f['path']): f for f in new.frames}
+    result = {
+        'frames_added': [list(p) for p in new_frames.keys() - old_frames.keys()],
+        'frames_removed': [list(p) for p in old_frames.keys() - new_frames.keys()],
+        'changes': {},
+        'locators': {},
+    }
+
+    for path in sorted(old_frames.keys() & new_frames.keys()):
+        lines = list(difflib.unified_diff(old.outline(old_frames[path]), new.outline(new_frames[path]),
+                                          lineterm='', n=1))[2:]
+        if lines:
+            result['changes'][str(list(path))] = lines
+
+    if locators:
+        before, after = old.evaluate(locators)['locators'], new.evaluate(locators)['locators']
+        for name in locators:
+            a, b = before[name], after[name]
+            if (a['status'], a['frame'], a['best']) != (b['status'], b['frame'], b['best']):
+                result['locators'][name] = {
+                    'before': {k: a[k] for k in ('status', 'frame', 'best', 'count')},
+                    'after': {k: b[k] for k in ('status', 'frame', 'best', 'count')},
+                }
+    return result
+
+
+def log_diff(diff):
+    """输出快照对比结果"""
+    for path in diff['frames_added']:
+        logger.warning(f"新增frame: {path}")
+    for path in diff['frames_removed']:
+        logger.warning(f"消失的frame: {path}")
+    for path, lines in diff['changes'].items():
+        logger.info(f"frame {path} 结构变化（{len(lines)} 行）:")
+        for line in lines[:MAX_DIFF_LINES]:
+            logger.info(f"  {line}")
+        if len(lines) > MAX_DIFF_LINES:
+            logger.info(f"  ... 还有 {len(lines) - MAX_DIFF_LINES} 行")
+    for name, change in diff['locators'].items():
+        logger.warning(f"定位器结果变化 {name}: {change['before']} → {change['after']}")
+    if not (diff['frames_added'] or diff['frames_removed'] or diff['changes'] or diff['locators']):
+        logger.info("两个快照的页面结构相同")
+
+
+def load_config_locators(filename):
+    """从 config_template.json 读取 element_locators（元素名 → [定位器]）"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return {name: [{'by': BY_VALUES.get(loc['by'], loc['by']), 'value': loc['value']}]
+            for name, loc in config['element_locators'].items()}
+
+
+def main(args):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='DOM快照离线检查和对比')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    check = sub.add_parser('check', help='离线检查定位器')
+    check.add_argument('snapshots', nargs='+', help='快照目录')
+    check.add_argument('--config', default='config_template.json', help='定位器配置（element_locators）')
+
+    diff = sub.add_parser('diff', help='对比两个快照')
+    diff.add_argument('old', help='旧快照目录')
+    diff.add_argument('new', help='新快照目录')
+    diff.add_argument('--config', help='同时对比定位器检查结果')
+
+    options = parser.parse_args(args)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if options.command == 'check':
+        locators = load_config_locators(options.config)
+        report = None
+        for directory in options.snapshots:
+            logger.info(f"\n快照: {directory}")
+            current = Snapshot(directory).evaluate(locators)
+            log_report(current)
+            report = merge_reports(report, current)
+        if len(options.snapshots) > 1:
+            logger.info("\n合并结果:")
+            log_report(report)
+
+    elif options.command == 'diff':
+        locators = load_config_locators(options.config) if options.config else None
+        log_diff(diff_snapshots(Snapshot(options.old), Snapshot(options.new), locators))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
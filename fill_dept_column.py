@@ -12,6 +12,7 @@ Excel表格部门列填充工具
 使用方法：
     skill: fill_dept_column 学院通讯录.xlsx
     skill: fill_dept_column input.xlsx output.xlsx
+    skill: fill_dept_column 全校通讯录.xlsx --stream    （几十万行的大文件：流式读写，内存占用不随行数增长）
 """
 
 import openpyxl
@@ -24,13 +25,51 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 
-def fill_dept_column(input_file, output_file=None):
+def _convert_rows(rows, stats):
+    """
+    原表的行（值的元组）转换为新表的行，逐行产出
+
+    Args:
+        rows: 原表从第1行开始的行
+        stats: 统计字典，记录原表行数（rows）和删除的部门标题行数（deleted）
+    """
+    current_dept = None
+    for row_idx, row in enumerate(rows, 1):
+        stats['rows'] = row_idx
+        row = list(row)
+
+        if row_idx == 1:
+            # 第1行：保持原标题，前面加空列
+            yield [None] + row
+            continue
+        if row_idx == 2:
+            # 第2行：设置新标题（跳过原表第2行的第1列"部门或职务"）
+            yield ['部门', '职务'] + row[1:]
+            continue
+
+        # 判断是否是部门标题行：第2列（姓名）为None（只读模式下空行可能不足2列）
+        name_value = row[1] if len(row) > 1 else None
+        if name_value is None:
+            # 这是部门标题行，记录部门名称，跳过
+            current_dept = row[0] if row else None
+            stats['deleted'] += 1
+            continue
+
+        # 这是人员行，构建新行：第1列=部门，第2列=职务，后面是原数据
+        # 删除姓名列（第3列，即原表的第2列）中的空格
+        if isinstance(name_value, str):
+            name_value = name_value.replace(' ', '')
+        yield [current_dept, row[0], name_value] + row[2:]
+
+
+def fill_dept_column(input_file, output_file=None, stream=False):
     """
     处理Excel文件，新建部门列并删除部门标题行
 
     Args:
         input_file: 输入Excel文件路径
         output_file: 输出Excel文件路径（可选，默认为原文件名_v2.xlsx）
+        stream: 流式处理（只读方式逐行读取、只写方式整行追加），用于几十万行的大文件
     """
     if not os.path.exists(input_file):
         print(f"错误：文件不存在 - {input_file}")
@@ -40,57 +79,31 @@ def fill_dept_column(input_file, output_file=None):
         base_name = os.path.splitext(input_file)[0]
         output_file = f"{base_name}_v2.xlsx"
 
-    print(f"读取文件：{input_file}")
-    wb = openpyxl.load_workbook(input_file)
+    print(f"读取文件：{input_file}" + ("（流式处理）" if stream else ""))
+    wb = openpyxl.load_workbook(input_file, read_only=stream)
     ws = wb.active
 
-    # 创建新工作簿
-    new_wb = openpyxl.Workbook()
-    new_ws = new_wb.active
-
-    # 第1行：保持原标题，前面加空列
-    new_ws.cell(row=1, column=1).value = None
-    for col_idx, cell in enumerate(ws[1], 2):
-        new_ws.cell(row=1, column=col_idx).value = cell.value
-
-    # 第2行：设置新标题（跳过原表第2行的第1列"部门或职务"）
-    new_ws.cell(row=2, column=1).value = '部门'
-    new_ws.cell(row=2, column=2).value = '职务'
-    for col_idx, cell in enumerate(ws[2][1:], 3):
-        new_ws.cell(row=2, column=col_idx).value = cell.value
-
-    # 处理数据行（从原表第3行开始）
-    current_dept = None
-    new_row_idx = 3
-    deleted_rows = 0
-
-    for row_idx in range(3, ws.max_row + 1):
-        # 读取原行
-        orig_row = [cell.value for cell in ws[row_idx]]
-
-        # 判断是否是部门标题行：第2列（姓名）为None
-        if orig_row[1] is None:
-            # 这是部门标题行，记录部门名称，跳过
-            current_dept = orig_row[0]
-            deleted_rows += 1
-            continue
-        else:
-            # 这是人员行，构建新行：第1列=部门，第2列=职务，后面是原数据
-            # 删除姓名列（第3列，即原表的第2列）中的空格
-            name_value = orig_row[1]
-            if name_value and isinstance(name_value, str):
-                name_value = name_value.replace(' ', '')
-            new_row = [current_dept, orig_row[0]] + [name_value] + orig_row[2:]
-            for col_idx, value in enumerate(new_row, 1):
-                new_ws.cell(row=new_row_idx, column=col_idx).value = value
-            new_row_idx += 1
+    # 创建新工作簿（只写工作簿没有默认工作表）
+    new_wb = openpyxl.Workbook(write_only=stream)
+    new_ws = new_wb.create_sheet() if stream else new_wb.active
+
+    # 逐行转换并整行写入
+    stats = {'rows': 0, 'deleted': 0}
+    written = 0
+    try:
+        for new_row in _convert_rows(ws.iter_rows(values_only=True), stats):
+            new_ws.append(new_row)
+            written += 1
+    finally:
+        if stream:
+            wb.close()      # 只读工作簿在关闭前一直占用文件
 
     # 保存新文件
     new_wb.save(output_file)
     print(f"[OK] 处理完成！")
-    print(f"  原表行数：{ws.max_row}")
-    print(f"  新表行数：{new_row_idx - 1}")
-    print(f"  删除行数：{deleted_rows}")
+    print(f"  原表行数：{stats['rows']}")
+    print(f"  新表行数：{written}")
+    print(f"  删除行数：{stats['deleted']}")
     print(f"  保存到：{output_file}")
 
     return True
@@ -104,21 +117,27 @@ def main(args):
         args: 命令行参数
             args[0]: 输入Excel文件路径
             args[1]: 输出Excel文件路径（可选）
+            --stream: 流式处理大文件（可选）
     """
+    stream = '--stream' in args
+    args = [arg for arg in args if arg != '--stream']
+
     if len(args) < 1:
         print("使用方法：")
         print("  skill: fill_dept_column <输入文件>")
         print("  skill: fill_dept_column <输入文件> <输出文件>")
+        print("  skill: fill_dept_column <输入文件> [输出文件] --stream")
         print()
         print("示例：")
         print("  skill: fill_dept_column 学院通讯录.xlsx")
         print("  skill: fill_dept_column data.xlsx result.xlsx")
+        print("  skill: fill_dept_column 全校通讯录.xlsx --stream")
         return
 
     input_file = args[0]
     output_file = args[1] if len(args) > 1 else None
 
-    fill_dept_column(input_file, output_file)
+    fill_dept_column(input_file, output_file, stream=stream)
 
 
 if __name__ == "__main__":
@@ -5,63 +5,56 @@
 用于帮助用户获取页面元素的定位方式
 """
 
+import sys
+import threading
+from queue import Empty, Queue
+
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-
-
-def print_element_info(element, description):
-    """打印元素信息"""
-    print(f"\n【{description}】")
-    print(f"  TagName: {element.tag_name}")
-    print(f"  ID: {element.get_attribute('id')}")
-    print(f"  Name: {element.get_attribute('name')}")
-    print(f"  Class: {element.get_attribute('class')}")
-    print(f"  XPath (相对): {find_xpath_relative(element)}")
-    print(f"  Full XPath: {find_xpath_full(element)}")
-
-
-def find_xpath_relative(element):
-    """生成相对XPath（简化版）"""
-    tag = element.tag_name
-    id_attr = element.get_attribute('id')
-    class_attr = element.get_attribute('class')
-
-    if id_attr:
-        return f"//*[@id='{id_attr}']"
-    elif class_attr:
-        classes = class_attr.strip().split()
-        if classes:
-            return f"//{tag}[@class='{classes[0]}']"
-    return f"//{tag}"
-
-
-def find_xpath_full(element):
-    """生成完整XPath（从html根节点开始）"""
-    driver = element.parent
-    components = []
-    current = element
-
-    while current and current.tag_name.lower() != 'html':
-        tag = current.tag_name
-        id_attr = current.get_attribute('id')
-
-        if id_attr:
-            components.append(f"{tag}[@id='{id_attr}']")
-            break
-        else:
-            # 计算同级索引
-            siblings = [s for s in current.find_elements(By.XPATH, f"../{tag}")]
-            if len(siblings) > 1:
-                index = siblings.index(current) + 1
-                components.append(f"{tag}[{index}]")
-            else:
-                components.append(tag)
-
-        current = current.find_element(By.XPATH, "..")
-
-    components.reverse()
-    return "//html/" + "/".join(components)
+
+from click_capture import ClickCapture
+from dom_snapshots import take_snapshot
+from locator_chain import to_by
+from locator_scripts import BY_NAMES, best_locator, format_locator, print_locator_info
+
+
+def start_line_reader():
+    """
+    在后台线程中逐行读取输入，返回行队列
+
+    等待点击时同时检查是否按了回车（跳过该元素）；
+    所有输入都经过这个队列，避免未完成的 input() 吞掉之后的回车
+    """
+    lines = Queue()
+
+    def read():
+        for line in sys.stdin:
+            lines.put(line.strip())
+
+    threading.Thread(target=read, name='stdin-reader', daemon=True).start()
+    return lines
+
+
+def read_line(lines):
+    """等待一行输入（可以用 Ctrl+C 中断）"""
+    while True:
+        try:
+            return lines.get(timeout=0.5)
+        except Empty:
+            pass
+
+
+def wait_click_or_skip(capture, lines):
+    """等待点击；按回车返回None（跳过该元素）"""
+    while True:
+        info = capture.next_click(timeout=0.5)
+        if info:
+            return info
+        try:
+            lines.get_nowait()
+            return None
+        except Empty:
+            pass
 
 
 def main():
@@ -74,14 +67,16 @@ def main():
     print("1. 脚本会打开Chrome浏览器")
     print("2. 请手动登录系统")
     print("3. 导航到需要操作的页面")
-    print("4. 按回车键，然后点击页面上的目标元素")
-    print("5. 脚本会显示该元素的各种定位方式")
+    print("4. 按回车键，然后按提示依次点击页面上的目标元素（按回车跳过当前元素）")
+    print("5. 每次点击后立即显示该元素的各种定位方式（支持iframe中的元素）")
     print("\n" + "=" * 60)
 
     url = input("\n请输入系统URL (默认: https://pxxt.zju.edu.cn): ").strip()
     if not url:
         url = "https://pxxt.zju.edu.cn"
 
+    driver = None
+    capture = None
     try:
         # 启动浏览器
         chrome_options = Options()
@@ -97,9 +92,14 @@ def main():
         print("  2. 导航到设备管理页面")
         print("完成后按回车键继续...")
         print("=" * 60)
-        input()
+        lines = start_line_reader()
+        read_line(lines)
 
-        print("\n\n现在请在浏览器中依次点击以下元素，每次点击后按回车:")
+        # 点击立即推送到这里（页面跳转后和iframe中同样有效），登录过程中的点击丢弃
+        capture = ClickCapture(driver).start()
+        capture.clear()
+
+        print("\n\n现在请在浏览器中依次点击以下元素（点击后自动记录；页面上没有该元素时按回车跳过）:")
 
         # 需要获取的元素列表
         elements_to_find = [
@@ -116,104 +116,37 @@ def main():
             print(f"\n{'=' * 50}")
             print(f"【{elem_name}】")
             print(f"说明: {description}")
-            print(f"请在页面中点击该元素，然后按回车...")
-            input()
+            print("请在页面中点击该元素（按回车跳过）...")
 
             try:
-                # 使用JavaScript获取当前聚焦的元素或最后点击的元素
-                element = driver.execute_script("""
-                    var elem = window.lastClickedElement;
-                    if (!elem) {
-                        elem = document.activeElement;
-                    }
-                    return elem;
-                """)
-
-                if element:
-                    # 获取元素属性
-                    elem_id = element.get('id', '')
-                    elem_name = element.get('name', '')
-                    elem_class = element.get('class', '')
-                    elem_tag = element.get('tagName', '').lower()
+                info = wait_click_or_skip(capture, lines)
 
+                if info:
                     print(f"\n✓ 找到元素!")
-                    print(f"  TagName: <{elem_tag}>")
-                    print(f"  ID: '{elem_id}'")
-                    print(f"  Name: '{elem_name}'")
-                    print(f"  Class: '{elem_class}'")
-
-                    # 生成推荐的定位方式
-                    recommendations = []
-
-                    if elem_id:
-                        recommendations.append({
-                            'type': 'By.ID',
-                            'value': elem_id,
-                            'priority': 1,
-                            'code': f"By.ID, '{elem_id}'"
-                        })
-
-                    if elem_name:
-                        recommendations.append({
-                            'type': 'By.NAME',
-                            'value': elem_name,
-                            'priority': 2,
-                            'code': f"By.NAME, '{elem_name}'"
-                        })
-
-                    if elem_class:
-                        first_class = elem_class.split()[0]
-                        recommendations.append({
-                            'type': 'By.CLASS_NAME',
-                            'value': first_class,
-                            'priority': 3,
-                            'code': f"By.CLASS_NAME, '{first_class}'"
-                        })
-
-                    # XPath by ID or text
-                    if elem_id:
-                        recommendations.append({
-                            'type': 'By.XPATH',
-                            'value': f"//*[@id='{elem_id}']",
-                            'priority': 1,
-                            'code': f"By.XPATH, \"//*[@id='{elem_id}']\""
-                        })
-                    elif elem_class:
-                        recommendations.append({
-                            'type': 'By.XPATH',
-                            'value': f"//{elem_tag}[@class='{elem_class.split()[0]}']",
-                            'priority': 4,
-                            'code': f"By.XPATH, \"//{elem_tag}[@class='{elem_class.split()[0]}']\""
-                        })
-
-                    # 显示推荐定位方式
-                    print(f"\n推荐的定位方式（按优先级排序）:")
-                    recommendations.sort(key=lambda x: x['priority'])
-                    for i, rec in enumerate(recommendations[:3], 1):
-                        print(f"  {i}. {rec['code']}")
-
-                    # 保存最高优先级的定位方式
-                    if recommendations:
-                        best = min(recommendations, key=lambda x: x['priority'])
-                        locator_config[elem_name] = {
-                            'code': best['code'],
-                            'by_type': best['type'],
-                            'value': best['value']
-                        }
+                    print_locator_info(info, elem_name)
+
+                    # 保存第一个只匹配一个元素的候选定位器
+                    best = best_locator(info)
+                    by, value = to_by(best)
+                    print(f"\n推荐的定位方式: {format_locator(best)}")
+                    locator_config[elem_name] = {
+                        'code': format_locator(best),
+                        'by_type': BY_NAMES.get(by, by),
+                        'value': value
+                    }
+
+                    # 保存该页面的DOM快照，之后可以离线检查定位器（dom_snapshots.py）
+                    try:
+                        print(f"DOM快照: {take_snapshot(driver, elem_name)}")
+                    except Exception as e:
+                        print(f"DOM快照保存失败: {e}")
 
                 else:
-                    print(f"\n✗ 无法获取元素，请重试")
+                    print(f"\n- 已跳过 {elem_name}")
 
             except Exception as e:
                 print(f"\n✗ 出错: {e}")
 
-        # 注入点击跟踪脚本
-        driver.execute_script("""
-            document.addEventListener('click', function(e) {
-                window.lastClickedElement = e.target;
-            }, true);
-        """)
-
         # 输出配置结果
         print("\n\n" + "=" * 60)
         print("配置结果")
@@ -225,7 +158,7 @@ def main():
             for elem_name, config in locator_config.items():
                 print(f"    '{elem_name}': {{")
                 print(f"        'by': {config['by_type']},")
-                print(f"        'value': '{config['value']}'")
+                print(f"        'value': {config['value']!r}")
                 print(f"    }},")
             print("}")
 
@@ -242,7 +175,7 @@ def main():
                     }
                     f.write(f"    '{elem_name}': {{\n")
                     f.write(f"        'by': {by_mapping.get(config['by_type'], config['by_type'])},\n")
-                    f.write(f"        'value': '{config['value']}'\n")
+                    f.write(f"        'value': {config['value']!r}\n")
                     f.write(f"    }},\n")
                 f.write("}\n")
 
@@ -250,13 +183,19 @@ def main():
             print("请将上述配置复制到 update_device_location.py 中的 ELEMENT_LOCATORS 部分")
 
         print("\n\n按回车键关闭浏览器...")
-        input()
-        driver.quit()
+        read_line(lines)
 
+    except KeyboardInterrupt:
+        print("\n\n已中断")
     except Exception as e:
         print(f"\n程序出错: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if capture:
+            capture.stop()
+        if driver:
+            driver.quit()
 
 
 if __name__ == "__main__":
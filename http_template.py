@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP请求模板
+录制时通过CDP的 Network.requestWillBeSent 记录页面发出的接口请求（XHR / Fetch / 表单POST），
+以及这些请求的JSON响应；录制结束后与录制的输入值比对：请求参数中等于某个输入值的字段替换为 {{NAME}} 占位符，
+等于之前某个响应中的值的字段（如查询结果中资产的主键）标记为来自响应，发送时从本次的响应中取值，
+生成 *.http.json 模板；之后可以不打开浏览器，用连接池直接按Excel逐条发送请求
+
+模板中仍为录制值的ID类字段（如 id、assetId）会让每条记录都更新同一条数据，
+这样的模板默认拒绝发送（--allow-fixed-ids 确认后才发送）
+
+用法:
+    python http_template.py recorded_actions_xxx.http.json 数据.xlsx --cookie "JSESSIONID=..."
+    python http_template.py recorded_actions_xxx.http.json 数据.xlsx --map 资产编号=ASSET_NUMBER --workers 4
+
+注意：模板只包含录制期间页面实际发出的请求，发送前请检查模板内容（特别是保存类请求）
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from action_plan import PLACEHOLDER_PATTERN, ValueTemplate
+
+logger = logging.getLogger(__name__)
+
+
+# 记录的请求类型（Document 只记录表单POST）
+CAPTURED_RESOURCE_TYPES = {'XHR', 'Fetch'}
+
+# 不写入模板的请求头（由连接池或Cookie参数提供）
+DROPPED_HEADERS = {'cookie', 'content-length', 'host', 'connection', 'accept-encoding'}
+
+# 请求体最大记录长度（Network.enable 的 maxPostDataSize）
+MAX_POST_DATA = 65536
+
+# 长度小于该值的输入值不做匹配（如 "1" 会误匹配分页参数）
+MIN_MATCH_LENGTH = 2
+
+# 响应体最大记录长度（只记录JSON响应）
+MAX_RESPONSE_BODY = 262144
+
+# 非ID类字段的值至少这么长才与之前的响应比对（ID类字段不限长度）
+MIN_DERIVED_LENGTH = 6
+
+# ID类字段名（如 id、ids、pk、uuid、asset_id、assetId）
+ID_FIELD_PATTERN = re.compile(r'(?i:^(?:.*[_\-])?(?:id|ids|pk|uuid|guid))$|[a-z](?:Id|ID|Ids|Uuid|Pk)$')
+
+# 像ID的URL路径片段（如 /asset/9001/save 中的 9001、UUID）
+ID_SEGMENT_PATTERN = re.compile(r'^\d+$|^[0-9a-fA-F-]{16,}$')
+
+
+def is_api_request(params):
+    """Network.requestWillBeSent 事件是否为需要记录的接口请求"""
+    request = params.get('request', {})
+    if not request.get('url', '').startswith(('http://', 'https://')):
+        return False
+    resource_type = params.get('type', '')
+    if resource_type in CAPTURED_RESOURCE_TYPES:
+        return True
+    return resource_type == 'Document' and request.get('method') == 'POST'
+
+
+def capture_request(params):
+    """把 Network.requestWillBeSent 事件转为录制日志中的一行（type 为 request）"""
+    request = params['request']
+    return {
+        'type': 'request',
+        'requestId': params.get('requestId'),
+        'timestamp': params.get('wallTime', time.time()) * 1000,
+        'method': request.get('method', 'GET'),
+        'url': request['url'],
+        'resourceType': params.get('type', ''),
+        'headers': {k: v for k, v in request.get('headers', {}).items()
+                    if k.lower() not in DROPPED_HEADERS and not k.startswith(':')},
+        'postData': request.get('postData'),
+    }
+
+
+def is_json_response(params):
+    """Network.responseReceived 事件是否为JSON响应"""
+    return 'json' in params.get('response', {}).get('mimeType', '')
+
+
+def capture_response(request_id, url, body, timestamp):
+    """接口请求的JSON响应转为录制日志中的一行（type 为 response）"""
+    return {'type': 'response', 'requestId': request_id, 'timestamp': timestamp, 'url': url, 'body': body}
+
+
+def _looks_like_id(field, value=None):
+    """字段名（最后一级）是否像记录的主键；URL路径片段（path[序号]）按值判断"""
+    if field.startswith('path['):
+        return value is not None and bool(ID_SEGMENT_PATTERN.match(str(value)))
+    names = re.findall(r'[A-Za-z_][\w-]*', field)
+    return bool(names) and bool(ID_FIELD_PATTERN.search(names[-1]))
+
+
+def _scalars(value, path=()):
+    """JSON中的全部字符串和整数值：[(路径, 值)]"""
+    if isinstance(value, dict):
+        return [item for k, v in value.items() for item in _scalars(v, path + (k,))]
+    if isinstance(value, list):
+        return [item for i, v in enumerate(value) for item in _scalars(v, path + (i,))]
+    if isinstance(value, str) or (isinstance(value, int) and not isinstance(value, bool)):
+        return [(list(path), value)]
+    return []
+
+
+def _path_text(path):
+    """JSON路径的写法，如 data.rows[0].id"""
+    text = ''
+    for key in path:
+        text += f"[{key}]" if isinstance(key, int) else (f".{key}" if text else key)
+    return text
+
+
+def _extract(value, path):
+    for key in path:
+        value = value[key]
+    return value
+
+
+def _placeholder_name(action, used):
+    """按输入框的 name / id 生成占位符名，如 ASSET_NUMBER；都没有时为 INPUT_序号"""
+    data = action.get('data', {})
+    base = re.sub(r'\W+', '_', data.get('name') or data.get('id') or '').strip('_').upper()
+    base = base or f"INPUT_{action.get('index')}"
+    name, n = base, 2
+    while name in used:
+        name, n = f"{base}_{n}", n + 1
+    return name
+
+
+def _parameterize(value, match, fields, location, path):
+    """
+    把字段值替换为占位符（JSON递归处理），替换的字段记入fields
+
+    match(值, 字段) 返回字段信息（含 placeholder）或None
+    """
+    if isinstance(value, dict):
+        return {k: _parameterize(v, match, fields, location, f"{path}.{k}" if path else k)
+                for k, v in value.items()}
+    if isinstance(value, list):
+        return [_parameterize(v, match, fields, location, f"{path}[{i}]") for i, v in enumerate(value)]
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        return value
+    field = match(value, path)
+    if field is None:
+        return value
+    fields.append(dict(field, location=location, field=path, recorded=value))
+    return f"{{{{{field['placeholder']}}}}}"
+
+
+def _fixed_ids(value, location, path):
+    """仍为录制值的ID类字段：[{'location', 'field', 'recorded'}]"""
+    if isinstance(value, dict):
+        return [item for k, v in value.items()
+                for item in _fixed_ids(v, location, f"{path}.{k}" if path else k)]
+    if isinstance(value, list):
+        return [item for i, v in enumerate(value) for item in _fixed_ids(v, location, f"{path}[{i}]")]
+    if value in (None, '') or isinstance(value, bool) or not _looks_like_id(path, value):
+        return []
+    if isinstance(value, str) and PLACEHOLDER_PATTERN.search(value):
+        return []
+    return [{'location': location, 'field': path, 'recorded': value}]
+
+
+def build_http_template(requests, actions, base_url='', responses=()):
+    """
+    生成HTTP请求模板
+
+    Args:
+        requests: 录制日志中 type 为 request 的行（时间顺序）
+        actions: 处理后的操作列表（用于取输入值和请求发生在哪个操作之后）
+        base_url: 录制的起始页面
+        responses: 录制日志中 type 为 response 的行（接口请求的JSON响应）
+
+    Returns:
+        模板字典：placeholders（占位符 → 录制值）、derived（来自响应的占位符 → 来源请求和JSON路径）
+        和 requests（每个请求的方法、URL、参数、替换的字段、仍为录制值的ID类字段）
+    """
+    placeholders = {}
+    values = {}     # 录制的输入值 → 占位符名
+    for action in actions:
+        value = (action.get('data', {}).get('value') or '').strip()
+        if action['type'] != 'input' or len(value) < MIN_MATCH_LENGTH or value in values:
+            continue
+        name = _placeholder_name(action, placeholders)
+        placeholders[name] = value
+        values[value] = name
+
+    # 每个JSON响应中的值 → JSON路径（同一个值取第一次出现的位置）
+    positions = {request.get('requestId'): i for i, request in enumerate(requests) if request.get('requestId')}
+    response_values = []
+    for response in responses:
+        source = positions.get(response['requestId'])
+        if source is None:
+            continue
+        try:
+            scalars = _scalars(json.loads(response['body']))
+        except ValueError:
+            continue
+        found = {}
+        for path, value in scalars:
+            found.setdefault(str(value).strip(), path)
+        response_values.append((response['timestamp'], source, found))
+
+    derived = {}
+    derived_names = {}      # (来源请求, JSON路径) → 占位符名
+
+    entries = []
+    for position, request in enumerate(requests):
+        def match(value, field):
+            text = str(value).strip()
+            if isinstance(value, str) and text in values:
+                return {'placeholder': values[text]}
+            if not text or (len(text) < MIN_DERIVED_LENGTH and not _looks_like_id(field, text)):
+                return None
+            # 最近一次出现该值的、更早的响应
+            for timestamp, source, found in reversed(response_values):
+                if source < position and timestamp <= request['timestamp'] and text in found:
+                    key = (source, _path_text(found[text]))
+                    if key not in derived_names:
+                        derived_names[key] = f"RESPONSE_{source}_{len(derived) + 1}"
+                        derived[derived_names[key]] = {'source': source, 'path': found[text], 'recorded': value}
+                    return {'placeholder': derived_names[key], 'source': source, 'path': key[1]}
+            return None
+
+        fields = []
+        parts = urlsplit(request['url'])
+        segments = parts.path.split('/')
+        url_path = '/'.join(_parameterize(segment, match, fields, 'path', f"path[{i}]") if segment else segment
+                            for i, segment in enumerate(segments))
+        query = [list(pair) for pair in parse_qsl(parts.query, keep_blank_values=True)]
+        query = [[k, _parameterize(v, match, fields, 'query', k)] for k, v in query]
+
+        body, body_type = request.get('postData'), None
+        content_type = next((v for k, v in request['headers'].items() if k.lower() == 'content-type'), '')
+        if body is not None:
+            if 'json' in content_type:
+                try:
+                    body, body_type = _parameterize(json.loads(body), match, fields, 'json', ''), 'json'
+                except ValueError:
+                    body_type = 'raw'
+            elif 'x-www-form-urlencoded' in content_type:
+                pairs = parse_qsl(body, keep_blank_values=True)
+                body, body_type = [[k, _parameterize(v, match, fields, 'form', k)] for k, v in pairs], 'form'
+            else:
+                body_type = 'raw'
+
+        # 请求发生在哪个操作之后（用于阅读模板时对照录制步骤）
+        after = None
+        for action in actions:
+            if action.get('data', {}).get('timestamp', 0) <= request['timestamp']:
+                after = action['index']
+
+        fixed_ids = [item for i, segment in enumerate(url_path.split('/'))
+                     for item in _fixed_ids(segment, 'path', f"path[{i}]")]
+        fixed_ids += [item for k, v in query for item in _fixed_ids(v, 'query', k)]
+        if body_type in ('json', 'form'):
+            pairs = body if body_type == 'form' else [('', body)]
+            fixed_ids += [item for k, v in pairs for item in _fixed_ids(v, body_type, k)]
+
+        entries.append({
+            'method': request['method'],
+            'url': urlunsplit(parts._replace(path=url_path, query='')),
+            'query': query,
+            'headers': request['headers'],
+            'body_type': body_type,
+            'body': body,
+            'after_action': after,
+            'fields': fields,
+            'fixed_ids': fixed_ids,
+        })
+
+    return {'base_url': base_url, 'placeholders': placeholders, 'derived': derived, 'requests': entries}
+
+
+def _compile(value, mapping):
+    """把含占位符的字符串预编译为 ValueTemplate（JSON递归处理）"""
+    if isinstance(value, dict):
+        return {k: _compile(v, mapping) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_compile(v, mapping) for v in value]
+    if isinstance(value, str) and PLACEHOLDER_PATTERN.search(value):
+        return ValueTemplate(value, mapping)
+    return value
+
+
+def _render(value, record, raw=None):
+    """用记录生成请求参数；整个值就是一个来自响应的占位符时保持响应中的类型（如JSON中的整数）"""
+    if isinstance(value, dict):
+        return {k: _render(v, record, raw) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_render(v, record, raw) for v in value]
+    if isinstance(value, ValueTemplate):
+        whole = PLACEHOLDER_PATTERN.fullmatch(value.text)
+        if whole and raw and whole.group(1) in raw:
+            return raw[whole.group(1)]
+        return value.render(record)
+    return value
+
+
+class HttpReplayer:
+    """
+    按模板直接发送HTTP请求（urllib3连接池，多线程共用）
+
+    Args:
+        template: build_http_template() 的结果（或读取的 *.http.json）
+        data_mapping: 数据列名 → 占位符名，默认列名就是占位符名
+        cookie: Cookie请求头（从已登录的浏览器复制）
+        only_matched: 只发送含占位符的请求（跳过列表、字典等查询请求）
+        pool_size: 每个主机的连接数（不小于并行线程数）
+        timeout: 单个请求的超时（秒）
+        allow_fixed_ids: 允许发送仍含录制的ID类字段的请求
+
+    Raises:
+        ValueError: 要发送的请求中有仍为录制值的ID类字段（每条记录都会作用于录制时的同一条数据）
+    """
+
+    def __init__(self, template, data_mapping=None, cookie='', only_matched=True, pool_size=4, timeout=30,
+                 allow_fixed_ids=False):
+        import urllib3
+
+        derived = template.get('derived', {})
+        mapping = {name: name for name in list(template['placeholders']) + list(derived)}
+        if data_mapping:
+            mapping.update({name: column for column, name in data_mapping.items()})
+
+        # 要发送的请求，加上为它们提供字段值的更早的请求
+        requests = template['requests']
+        selected = {i for i, r in enumerate(requests) if r['fields'] or not only_matched}
+        pending = list(selected)
+        while pending:
+            for field in requests[pending.pop()]['fields']:
+                if 'source' in field and field['source'] not in selected:
+                    selected.add(field['source'])
+                    pending.append(field['source'])
+
+        fixed = [f"{requests[i]['method']} {requests[i]['url']} {f['location']}.{f['field']}={f['recorded']!r}"
+                 for i in sorted(selected) for f in requests[i].get('fixed_ids', [])]
+        if fixed and not allow_fixed_ids:
+            raise ValueError("以下字段仍为录制时的值，每条记录都会作用于同一条数据:\n  " + "\n  ".join(fixed))
+
+        self.requests = [(i, _compile(requests[i], mapping)) for i in sorted(selected)]
+        self.sources = {}       # 请求序号 → [(占位符, JSON路径)]
+        for name, info in derived.items():
+            self.sources.setdefault(info['source'], []).append((name, info['path']))
+        self.columns = {mapping[name] for name in template['placeholders']}     # 需要的数据列
+        self.cookie = cookie
+        # 保存类请求不自动重试，避免重复提交
+        self.http = urllib3.PoolManager(maxsize=pool_size, block=True, retries=False,
+                                        timeout=urllib3.Timeout(connect=5, read=timeout))
+
+    def send(self, record):
+        """
+        为一条记录依次发送模板中的请求
+
+        Returns:
+            (是否成功, 错误信息)：任一请求失败或返回 4xx/5xx 即停止
+        """
+        context = {}        # 本条记录中从响应取得的值
+        values = dict(record)
+        for index, request in self.requests:
+            url = _render(request['url'], values)
+            query = _render(request['query'], values, context)
+            if query:
+                url = f"{url}?{urlencode([tuple(pair) for pair in query])}"
+
+            headers = dict(request['headers'])
+            if self.cookie:
+                headers['Cookie'] = self.cookie
+
+            body = _render(request['body'], values, context)
+            if request['body_type'] == 'json':
+                body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            elif request['body_type'] == 'form':
+                body = urlencode([tuple(pair) for pair in body])
+
+            name = f"{request['method']} {url}"
+            try:
+                response = self.http.request(request['method'], url, body=body, headers=headers)
+            except Exception as e:
+                return False, f"{name}: {e}"
+            if response.status >= 400:
+                return False, f"{name}: HTTP {response.status}"
+
+            # 取出之后的请求需要的值（如查询结果中资产的主键）
+            if index in self.sources:
+                try:
+                    data = json.loads(response.data)
+                except ValueError:
+                    return False, f"{name}: 响应不是JSON"
+                for placeholder, path in self.sources[index]:
+                    try:
+                        context[placeholder] = _extract(data, path)
+                    except (KeyError, IndexError, TypeError):
+                        return False, f"{name}: 响应中找不到 {_path_text(path)}"
+                values.update(context)
+        return True, ''
+
+
+def load_template(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(args):
+    """命令行入口：按Excel逐条发送模板中的请求"""
+    from sharding import ResultWriter, result_filename
+
+    parser = argparse.ArgumentParser(description='按HTTP请求模板批量发送请求（不打开浏览器）')
+    parser.add_argument('template', help='录制生成的 *.http.json')
+    parser.add_argument('excel', help='数据文件（.xlsx / .csv）')
+    parser.add_argument('--map', action='append', default=[], metavar='列名=占位符',
+                        help='数据列名与占位符的对应关系，可重复；默认列名就是占位符名')
+    parser.add_argument('--cookie', default='', help='Cookie请求头（从已登录的浏览器复制）')
+    parser.add_argument('--all', action='store_true', help='也发送不含占位符的请求')
+    parser.add_argument('--workers', type=int, default=1, help='并行发送的线程数')
+    parser.add_argument('--allow-fixed-ids', action='store_true',
+                        help='仍发送含录制的ID类字段的请求（确认这些字段不随记录变化时使用）')
+    options = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    import pandas as pd
+    if options.excel.lower().endswith('.csv'):
+        df = pd.read_csv(options.excel, dtype=str)
+    else:
+        df = pd.read_excel(options.excel, dtype=str)
+    records = df.fillna('').to_dict('records')
+
+    data_mapping = dict(item.split('=', 1) for item in options.map)
+    try:
+        replayer = HttpReplayer(load_template(options.template), data_mapping, options.cookie,
+                                only_matched=not options.all, pool_size=max(options.workers, 1),
+                                allow_fixed_ids=options.allow_fixed_ids)
+    except ValueError as e:
+        logger.error(f"{e}\n请检查模板；确认这些字段不随记录变化时加 --allow-fixed-ids")
+        return
+    missing = replayer.columns - set(df.columns)
+    if missing:
+        logger.error(f"数据文件中缺少列: {', '.join(sorted(missing))}（用 --map 列名=占位符 指定对应关系）")
+        return
+    if not replayer.requests:
+        logger.error("模板中没有可发送的请求")
+        return
+
+    key_column = next(iter(data_mapping), None) or df.columns[0]
+    results = ResultWriter(result_filename('http_results', None))
+    counts = {'success': 0, 'failed': 0}
+    lock = threading.Lock()
+    started = time.time()
+
+    def process(record):
+        record_start = time.perf_counter()
+        ok, error = replayer.send(record)
+        status = 'success' if ok else 'failed'
+        results.write(record.get(key_column, ''), '', status, error, time.perf_counter() - record_start)
+        with lock:
+            counts[status] += 1
+        if not ok:
+            logger.warning(f"{record.get(key_column, '')}: {error}")
+
+    logger.info(f"共 {len(records)} 条记录，每条 {len(replayer.requests)} 个请求，结果写入 {results.filename}")
+    try:
+        with ThreadPoolExecutor(max_workers=max(options.workers, 1)) as pool:
+            list(pool.map(process, records))
+    finally:
+        results.close()
+
+    elapsed = time.time() - started
+    logger.info(f"完成: 成功 {counts['success']} 条，失败 {counts['failed']} 条，"
+                f"用时 {elapsed:.1f}s（平均 {elapsed / max(len(records), 1) * 1000:.0f}ms/条）")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
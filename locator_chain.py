@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+候选定位器链
+录制时每个元素保存一组候选定位器（id / name / css / xpath / text），
+回放时轮流用 find_elements 试探所有候选（不阻塞等待），优先采用只匹配一个元素的候选；
+每个候选的成功次数和耗时保存在 locator_stats.json，下次运行时最快成功的候选排在最前
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+
+# 定位器统计文件（在多次运行之间保留）
+STATS_FILE = 'locator_stats.json'
+
+# 定位器类型 → Selenium定位方式（text 单独转换为XPath）
+BY_MAPPING = {
+    'id': By.ID,
+    'name': By.NAME,
+    'class': By.CLASS_NAME,
+    'css': By.CSS_SELECTOR,
+    'xpath': By.XPATH,
+}
+
+
+def xpath_literal(text):
+    """把任意文本转为XPath字符串字面量（同时含单双引号时使用concat）"""
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    parts = text.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{p}'" for p in parts) + ")"
+
+
+def to_by(locator):
+    """
+    定位器字典转为 (by, value)
+
+    支持录制格式 {'type': 'id', 'value': ...} 和配置格式 {'by': By.XPATH, 'value': ...}
+    """
+    if 'by' in locator:
+        return locator['by'], locator['value']
+    if locator['type'] == 'text':
+        return By.XPATH, f"//*[contains(text(), {xpath_literal(locator['value'].strip())})]"
+    return BY_MAPPING.get(locator['type'], By.XPATH), locator['value']
+
+
+def switch_to_frame(driver, path, timeout=10):
+    """
+    从主页面按 window.frames 序号路径依次切换进iframe（路径为空时停在主页面）
+
+    每一层iframe最多等待timeout秒加载，超时抛出 TimeoutException
+    """
+    driver.switch_to.default_content()
+    for depth, index in enumerate(path):
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+            EC.frame_to_be_available_and_switch_to_it(index), f"找不到iframe {list(path[:depth + 1])}")
+
+
+def describe(locator):
+    """定位器的文本表示，也用作统计的键"""
+    return f"{locator.get('type') or locator.get('by')}={locator['value']}"
+
+
+class LocatorChain:
+    """
+    候选定位器解析器（线程安全，并行的浏览器可共用）
+
+    Args:
+        stats_file: 统计文件路径，None 表示不保存
+        poll: 一轮候选都没有找到时，下一轮之前的间隔（秒）
+    """
+
+    def __init__(self, stats_file=STATS_FILE, poll=0.2):
+        self.stats_file = stats_file
+        self.poll = poll
+        self.stats = {}     # 元素键 → {候选键: {'hits', 'misses', 'seconds'}}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if stats_file and os.path.exists(stats_file):
+            try:
+                with open(stats_file, 'r', encoding='utf-8') as f:
+                    self.stats = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"定位器统计文件读取失败，将重新统计: {e}")
+
+    def order(self, candidates, key=None):
+        """按历史表现排序候选：成功多于失败的在前，其中平均耗时短的在前；没有记录的保持录制顺序"""
+        stats = self.stats.get(key or describe(candidates[0]), {})
+
+        def rank(item):
+            index, candidate = item
+            s = stats.get(describe(candidate))
+            if not s:
+                return 1, 0, index
+            if s['hits'] <= s['misses']:
+                return 2, 0, index
+            return 0, s['seconds'], index
+
+        return [candidate for _, candidate in sorted(enumerate(candidates), key=rank)]
+
+    def resolve(self, driver, candidates, timeout=10, key=None):
+        """
+        在timeout秒内轮流试探候选定位器
+
+        Args:
+            candidates: 候选定位器列表（录制顺序即默认优先级）
+            key: 统计使用的元素键，默认为第一个候选
+
+        Returns:
+            (元素, 采用的候选, 匹配数量)，都找不到时为 (None, None, 0)；
+            只有匹配多个元素的候选时一直等到超时（全部候选都匹配多个时不等待），再返回其中第一个元素
+        """
+        key = key or describe(candidates[0])
+        ordered = self.order(candidates, key)
+        started = time.perf_counter()
+        deadline = started + timeout
+
+        shared = None   # 最近一轮第一个匹配多个元素的候选
+        while True:
+            tried = []
+            shared_now = None
+            missing = False     # 本轮是否有候选还没有匹配到元素（可能尚未渲染）
+            for candidate in ordered:
+                elements = driver.find_elements(*to_by(candidate))
+                if len(elements) == 1:
+                    self._record(key, candidate, tried, time.perf_counter() - started)
+                    return elements[0], candidate, 1
+                if elements and shared_now is None:
+                    shared_now = (candidate, elements)
+                missing = missing or not elements
+                tried.append(candidate)
+            shared = shared_now or shared
+
+            # 只有匹配多个元素的候选时继续等待：唯一的候选可能只是还没渲染出来；
+            # 超时（或全部候选都已匹配多个、再等也不会变）才退而取第一个元素，且不计为成功
+            if time.perf_counter() >= deadline or (shared_now and not missing):
+                if shared:
+                    candidate, elements = shared
+                    return elements[0], candidate, len(elements)
+                self._record(key, None, ordered, 0)
+                return None, None, 0
+            time.sleep(self.poll)
+
+    def _record(self, key, winner, failed, seconds):
+        """更新统计：winner 成功（耗时取滑动平均），failed 中的候选各记一次失败"""
+        with self._lock:
+            stats = self.stats.setdefault(key, {})
+            for candidate in failed:
+                s = stats.setdefault(describe(candidate), {'hits': 0, 'misses': 0, 'seconds': 0.0})
+                s['misses'] += 1
+            if winner is not None:
+                s = stats.setdefault(describe(winner), {'hits': 0, 'misses': 0, 'seconds': 0.0})
+                s['seconds'] = round(seconds if not s['hits'] else 0.8 * s['seconds'] + 0.2 * seconds, 3)
+                s['hits'] += 1
+            self._dirty = True
+
+    def save(self):
+        """保存统计（先写临时文件再替换，中途中断不会损坏原文件）"""
+        if not self.stats_file or not self._dirty:
+            return
+        with self._lock:
+            tmp = f"{self.stats_file}.tmp"
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self.stats, f, ensure_ascii=False, indent=2)
+                os.replace(tmp, self.stats_file)
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"定位器统计保存失败: {e}")
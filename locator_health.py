@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定位器健康检查
+每个frame只执行一次页面内脚本，统计全部定位器（含备用定位器）的匹配数量和耗时，
+标记 /html/body/div[3]/... 这类依赖页面结构的脆弱定位器，结果保存为JSON报告：
+批量更新时按报告直接切换到元素所在的iframe，并优先使用报告中最快的唯一定位器
+"""
+
+import json
+import logging
+import re
+import time
+from datetime import datetime
+
+from locator_chain import describe
+from locator_scripts import COUNT_SCRIPT, page_locator
+
+logger = logging.getLogger(__name__)
+
+
+# 健康检查报告文件
+REPORT_FILE = 'locator_health.json'
+
+# 最多检查几层嵌套的iframe
+MAX_FRAME_DEPTH = 3
+
+# 含有这么多个位置下标（如 div[3]）的XPath视为脆弱
+MAX_POSITIONAL_STEPS = 2
+
+# 状态的优劣顺序（多次检查合并时保留较好的结果）
+STATUS_RANK = {'ok': 0, 'ambiguous': 1, 'missing': 2}
+
+
+def brittle_reasons(locator):
+    """
+    定位器依赖页面结构的原因列表（空列表表示不脆弱）
+
+    - absolute: 从文档根开始的XPath，页面上方任何结构变化都会使其失效
+    - positional: 多个位置下标，同级元素增减就会错位
+    """
+    page = page_locator(locator)
+    if page['type'] != 'xpath':
+        return []
+    value = page['value'].strip()
+    reasons = []
+    if value.startswith('/') and not value.startswith('//'):
+        reasons.append('absolute')
+    if len(re.findall(r'\[\d+\]', value)) > MAX_POSITIONAL_STEPS:
+        reasons.append('positional')
+    return reasons
+
+
+def walk_frames(driver, visit, max_depth=MAX_FRAME_DEPTH):
+    """
+    依次在主页面和每个（嵌套的）iframe中调用 visit(path)，返回 [(path, 结果)]
+
+    frame以 window.frames 序号的路径标识，如 [] 为主页面，[0, 1] 为第1个iframe中的第2个iframe；
+    visit 出错的frame跳过，结束后回到主页面
+    """
+    results = []
+
+    def walk(path):
+        try:
+            results.append((list(path), visit(path)))
+        except Exception as e:
+            logger.debug(f"frame {list(path)} 读取失败: {e}")
+            return
+        if len(path) >= max_depth:
+            return
+        for index in range(driver.execute_script('return window.frames.length')):
+            try:
+                driver.switch_to.frame(index)
+            except Exception:
+                continue
+            try:
+                walk(path + (index,))
+            finally:
+                driver.switch_to.parent_frame()
+
+    driver.switch_to.default_content()
+    try:
+        walk(())
+    finally:
+        driver.switch_to.default_content()
+    return results
+
+
+def flatten(locators):
+    """元素名 → 候选列表 展开为 [(元素名, 候选序号, 候选)]，以及页面内脚本使用的定位器列表"""
+    flat = [(name, index, candidate) for name, candidates in locators.items()
+            for index, candidate in enumerate(candidates)]
+    return flat, [page_locator(candidate) for _, _, candidate in flat]
+
+
+def check_locators(driver, locators):
+    """
+    检查当前页面（含iframe）中的全部定位器
+
+    Args:
+        locators: 元素名 → 候选定位器列表（第一个为主定位器）
+
+    Returns:
+        报告字典：frames（每个frame的地址和检查耗时）和 locators（每个元素的状态、所在frame、最佳候选）
+    """
+    flat, items = flatten(locators)
+
+    def visit(path):
+        started = time.perf_counter()
+        result = driver.execute_script(COUNT_SCRIPT, items)
+        return dict(result, seconds=round(time.perf_counter() - started, 3))
+
+    started = time.perf_counter()
+    frames = [dict(result, path=path) for path, result in walk_frames(driver, visit)]
+    return build_report(locators, frames, driver.current_url, time.perf_counter() - started)
+
+
+def build_report(locators, frames, url, seconds):
+    """
+    汇总各frame的统计结果
+
+    Args:
+        locators: 元素名 → 候选定位器列表
+        frames: [{'path', 'url', 'seconds', 'results'}]，results 与 flatten() 的顺序一致（每项 {'count', 'ms'}）
+    """
+    flat, _ = flatten(locators)
+    elements = {}
+    for position, (name, index, candidate) in enumerate(flat):
+        entry = elements.setdefault(name, {'primary': describe(locators[name][0]), 'candidates': []})
+        hits = [(frame['path'], frame['results'][position]) for frame in frames
+                if frame['results'][position]['count'] > 0]
+        entry['candidates'].append({
+            'locator': describe(candidate),
+            'index': index,
+            'brittle': brittle_reasons(candidate),
+            'invalid': any(frame['results'][position]['count'] < 0 for frame in frames),
+            'matches': [{'frame': path, 'count': r['count'], 'ms': round(r['ms'], 2)} for path, r in hits],
+        })
+
+    for name, entry in elements.items():
+        # 最佳候选：唯一匹配 > 不脆弱 > 耗时短 > 配置顺序
+        options = [(c, m) for c in entry['candidates'] for m in c['matches']]
+        if not options:
+            entry.update(status='missing', frame=None, best=None, best_index=None, count=0)
+            continue
+        best, match = min(options, key=lambda o: (o[1]['count'] != 1, bool(o[0]['brittle']), o[1]['ms'],
+                                                  o[0]['index']))
+        entry.update(status='ok' if match['count'] == 1 else 'ambiguous', frame=match['frame'],
+                     best=best['locator'], best_index=best['index'], count=match['count'])
+
+    return {
+        'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'url': url,
+        'seconds': round(seconds, 3),
+        'frames': [{k: f[k] for k in ('path', 'url', 'seconds')} for f in frames],
+        'locators': elements,
+    }
+
+
+def merge_reports(old, new):
+    """合并在不同页面上的检查结果：每个元素保留状态较好的一次"""
+    if not old:
+        return new
+    merged = dict(new)
+    merged['locators'] = dict(old['locators'])
+    for name, entry in new['locators'].items():
+        previous = merged['locators'].get(name)
+        if previous is None or STATUS_RANK[entry['status']] < STATUS_RANK[previous['status']]:
+            merged['locators'][name] = entry
+    merged['frames'] = old['frames'] + new['frames']
+    return merged
+
+
+def log_report(report):
+    """输出检查结果"""
+    labels = {'ok': '正常', 'ambiguous': '匹配多个', 'missing': '找不到'}
+    logger.info(f"定位器健康检查: {len(report['frames'])} 个frame，用时 {report['seconds']}s")
+    for name, entry in report['locators'].items():
+        text = f"  {labels[entry['status']]:6s} {name}"
+        if entry['status'] != 'missing':
+            frame = '主页面' if not entry['frame'] else f"iframe {entry['frame']}"
+            text += f": {entry['best']}（{frame}，匹配 {entry['count']} 个）"
+            if entry['best_index']:
+                text += f"（主定位器未采用，使用第 {entry['best_index'] + 1} 个候选）"
+        (logger.info if entry['status'] == 'ok' else logger.warning)(text)
+        for candidate in entry['candidates']:
+            if candidate['brittle']:
+                logger.warning(f"         脆弱的定位器（{', '.join(candidate['brittle'])}）: {candidate['locator']}")
+            if candidate['invalid']:
+                logger.warning(f"         定位器语法错误: {candidate['locator']}")
+
+
+def save_report(report, path=REPORT_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path=REPORT_FILE):
+    """读取健康检查报告，不存在或无法解析时返回None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"定位器健康检查报告读取失败: {e}")
+        return None
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定位器预检
+批量处理开始前，用第一条记录试运行：每个定位器只等待很短的时间，
+记录找不到（missing）或匹配多个元素（ambiguous）的定位器，
+首选定位器失效时采用备用的候选定位器（见 locator_chain.py），避免错误的XPath让每条记录都等满超时时间
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PreflightReport:
+    """预检结果：每个定位器的状态、匹配数量和实际使用的定位方式"""
+
+    def __init__(self):
+        self.results = {}
+
+    def found(self, name, locator, count, fallback_index=0):
+        """记录找到的定位器，fallback_index 为采用的候选在候选列表中的位置（0 为首选）"""
+        if fallback_index:
+            status = 'fallback'
+        elif count > 1:
+            status = 'ambiguous'
+        else:
+            status = 'ok'
+        self.results[name] = {'status': status, 'count': count, 'locator': locator, 'fallback': fallback_index}
+
+    def missing(self, name, locator):
+        """记录主定位器和备用定位器都找不到的元素"""
+        self.results[name] = {'status': 'missing', 'count': 0, 'locator': locator, 'fallback': 0}
+
+    def missing_names(self, optional=()):
+        """找不到的必需定位器"""
+        return [name for name, r in self.results.items() if r['status'] == 'missing' and name not in optional]
+
+    def log(self, expected=(), optional=()):
+        """
+        输出预检报告
+
+        Args:
+            expected: 应当检查到的定位器名称（没有检查到的说明前面的步骤已失败）
+            optional: 可选的定位器（找不到不影响处理）
+        """
+        labels = {'ok': '正常', 'ambiguous': '匹配多个', 'fallback': '使用备用', 'missing': '找不到'}
+        logger.info("定位器预检结果:")
+        for name, r in self.results.items():
+            text = f"  {labels[r['status']]:6s} {name}: {r['locator']}"
+            if r['count'] > 1:
+                text += f"（匹配 {r['count']} 个元素，将使用第一个）"
+            if r['fallback']:
+                text += f"（首选定位器未采用，使用第 {r['fallback'] + 1} 个候选）"
+            if r['status'] == 'missing' and name in optional:
+                text += "（可选）"
+            if r['status'] == 'ok' or (r['status'] == 'missing' and name in optional):
+                logger.info(text)
+            else:
+                logger.warning(text)
+        for name in expected:
+            if name not in self.results:
+                logger.warning(f"  未检查 {name}（前面的步骤失败）")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面内的定位器提取脚本
+一次 execute_script 调用就在浏览器中生成元素的全部候选定位器
+（id / name / css / 相对XPath / 绝对XPath / text），并统计每个定位器在当前文档中匹配的元素数，
+代替在Python中逐级向上查询父元素（每一级都要多次WebDriver往返）
+
+候选定位器的格式与录制文件相同（{'type', 'value'}），可直接交给 locator_chain.to_by
+"""
+
+from selenium.webdriver.common.by import By
+
+from locator_chain import to_by, xpath_literal
+
+
+# 页面内的函数定义（其他脚本可以拼接后调用 __describeElement(元素)）
+LOCATOR_FUNCTIONS = r"""
+function __cssEscape(s) {
+    return (window.CSS && CSS.escape) ? CSS.escape(s) : s.replace(/([^\w-])/g, '\\$1');
+}
+
+function __xpathLiteral(s) {
+    if (s.indexOf("'") < 0) return "'" + s + "'";
+    if (s.indexOf('"') < 0) return '"' + s + '"';
+    return "concat('" + s.split("'").join("', \"'\", '") + "')";
+}
+
+function __count(type, value, doc) {
+    try {
+        if (type === 'id') return doc.querySelectorAll('#' + __cssEscape(value)).length;
+        if (type === 'name') return doc.getElementsByName(value).length;
+        if (type === 'css') return doc.querySelectorAll(value).length;
+        var xpath = type === 'text' ? '//*[contains(text(), ' + __xpathLiteral(value.trim()) + ')]' : value;
+        return doc.evaluate('count(' + xpath + ')', doc, null, XPathResult.NUMBER_TYPE, null).numberValue;
+    } catch (e) {
+        return -1;
+    }
+}
+
+// 同级同名元素中的序号（唯一时为0，XPath中省略）
+function __siblingIndex(el) {
+    var same = 0, index = 0;
+    for (var s = el.parentNode && el.parentNode.firstElementChild; s; s = s.nextElementSibling) {
+        if (s.tagName === el.tagName) {
+            same++;
+            if (s === el) index = same;
+        }
+    }
+    return same > 1 ? index : 0;
+}
+
+// 从 start 向上到 stop（不含）的路径
+function __path(start, stop) {
+    var parts = [];
+    for (var el = start; el && el !== stop && el.nodeType === 1; el = el.parentNode) {
+        var index = __siblingIndex(el);
+        parts.unshift(el.tagName.toLowerCase() + (index ? '[' + index + ']' : ''));
+    }
+    return parts.join('/');
+}
+
+function __describeElement(el) {
+    if (!el || el.nodeType !== 1) return null;
+    var doc = el.ownerDocument;
+    var tag = el.tagName.toLowerCase();
+    var locators = [];
+
+    if (el.id) locators.push({type: 'id', value: el.id});
+    var name = el.getAttribute('name');
+    if (name) locators.push({type: 'name', value: name});
+
+    var classes = (typeof el.className === 'string' ? el.className : '').split(/\s+/)
+        .filter(function (c) { return /^-?[A-Za-z_][\w-]*$/.test(c); });
+    if (classes.length) locators.push({type: 'css', value: tag + '.' + classes.join('.')});
+
+    // 相对XPath：从最近的带id祖先开始
+    if (!el.id) {
+        var anchor = el.parentNode;
+        while (anchor && anchor.nodeType === 1 && !anchor.id) anchor = anchor.parentNode;
+        if (anchor && anchor.nodeType === 1) {
+            locators.push({type: 'xpath', kind: 'relative',
+                           value: '//*[@id=' + __xpathLiteral(anchor.id) + ']/' + __path(el, anchor)});
+        }
+    } else {
+        locators.push({type: 'xpath', kind: 'relative', value: '//*[@id=' + __xpathLiteral(el.id) + ']'});
+    }
+    locators.push({type: 'xpath', kind: 'absolute', value: '/' + __path(el, doc)});
+
+    var text = (el.innerText || el.textContent || '').trim();
+    if (text && text.length <= 30 && text.indexOf('\n') < 0) locators.push({type: 'text', value: text});
+
+    for (var i = 0; i < locators.length; i++) {
+        locators[i].count = __count(locators[i].type, locators[i].value, doc);
+    }
+
+    return {
+        tagName: tag,
+        id: el.id || '',
+        name: name || '',
+        className: classes.join(' '),
+        inputType: el.type || '',
+        text: text.substring(0, 50),
+        frame: doc.location ? doc.location.href : '',
+        locators: locators
+    };
+}
+"""
+
+# 提取 arguments[0] 元素的定位器
+EXTRACT_SCRIPT = LOCATOR_FUNCTIONS + "\nreturn __describeElement(arguments[0]);"
+
+# 批量统计 arguments[0]（[{'type', 'value'}, ...]）在当前文档中的匹配数量和耗时（毫秒）
+COUNT_SCRIPT = LOCATOR_FUNCTIONS + """
+var items = arguments[0], results = [];
+for (var i = 0; i < items.length; i++) {
+    var started = performance.now();
+    var count = __count(items[i].type, items[i].value, document);
+    results.push({count: count, ms: performance.now() - started});
+}
+return {url: location.href, results: results};
+"""
+
+# Selenium定位方式 → 页面内脚本的定位器类型
+PAGE_TYPES = {
+    By.ID: 'id',
+    By.NAME: 'name',
+    By.CSS_SELECTOR: 'css',
+    By.XPATH: 'xpath',
+}
+
+# 候选定位器类型 → 配置中的 By 写法
+BY_NAMES = {
+    By.ID: 'By.ID',
+    By.NAME: 'By.NAME',
+    By.CLASS_NAME: 'By.CLASS_NAME',
+    By.CSS_SELECTOR: 'By.CSS_SELECTOR',
+    By.XPATH: 'By.XPATH',
+    By.LINK_TEXT: 'By.LINK_TEXT',
+    By.PARTIAL_LINK_TEXT: 'By.PARTIAL_LINK_TEXT',
+}
+
+
+def page_locator(locator):
+    """配置或录制格式的定位器转为页面内脚本使用的 {'type', 'value'}（链接文字转为等价的XPath）"""
+    by, value = to_by(locator)
+    if by == By.LINK_TEXT:
+        return {'type': 'xpath', 'value': f"//a[normalize-space(.)={xpath_literal(value.strip())}]"}
+    if by == By.PARTIAL_LINK_TEXT:
+        return {'type': 'xpath', 'value': f"//a[contains(., {xpath_literal(value)})]"}
+    if by == By.CLASS_NAME:
+        return {'type': 'css', 'value': '.' + value}
+    if by == By.TAG_NAME:
+        return {'type': 'css', 'value': value}
+    return {'type': PAGE_TYPES.get(by, 'xpath'), 'value': value}
+
+
+def extract_locators(driver, element):
+    """一次调用提取元素的候选定位器和匹配数量"""
+    return driver.execute_script(EXTRACT_SCRIPT, element)
+
+
+def best_locator(info):
+    """按 id > name > css > 相对XPath > 绝对XPath > text 的顺序，取第一个只匹配一个元素的候选"""
+    unique = [loc for loc in info['locators'] if loc['count'] == 1]
+    return (unique or info['locators'])[0]
+
+
+def format_locator(locator):
+    """定位器的配置写法，如 By.ID, 'search'"""
+    by, value = to_by(locator)
+    return f"{BY_NAMES.get(by, by)}, {value!r}"
+
+
+def print_locator_info(info, description):
+    """打印元素属性和每个候选定位器的匹配数量（✓ 表示只匹配一个元素）"""
+    print(f"\n【{description}】")
+    print(f"  TagName: <{info['tagName']}>")
+    print(f"  ID: '{info['id']}'")
+    print(f"  Name: '{info['name']}'")
+    print(f"  Class: '{info['className']}'")
+    if info.get('frame'):
+        print(f"  Frame: {info['frame']}" + ('' if info.get('topLevel', True) else '（iframe）'))
+    print("\n  候选定位器（匹配数量）:")
+    for locator in info['locators']:
+        kind = {'relative': ' (相对)', 'absolute': ' (绝对)'}.get(locator.get('kind'), '')
+        count = '?' if locator['count'] < 0 else locator['count']
+        mark = '✓' if locator['count'] == 1 else ' '
+        print(f"   {mark} [{count}] {format_locator(locator)}{kind}")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网络空闲检测
+订阅CDP的 Network.* 事件，统计页面上进行中的请求，
+提供"等待网络空闲X毫秒"的原语，代替搜索、编辑、保存之后的固定 sleep
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from cdp_session import open_cdp_session
+
+logger = logging.getLogger(__name__)
+
+
+# 不参与空闲判定的请求类型（长连接，不会"完成"）
+IGNORED_RESOURCE_TYPES = {'WebSocket', 'EventSource', 'Ping'}
+
+# 不参与空闲判定的URL前缀
+IGNORED_URL_PREFIXES = ('data:', 'blob:')
+
+
+class NetworkIdleTracker:
+    """跟踪单个页面进行中的网络请求"""
+
+    def __init__(self, session, stale_after=30.0, history=200):
+        self.session = session
+        self.stale_after = stale_after   # 超过该时间仍未完成的请求视为长轮询，不再等待
+        self._inflight = {}              # requestId -> {'url', 'type', 'start'}
+        self._last_activity = time.monotonic()
+        self._recent = deque(maxlen=history)
+        self._cond = threading.Condition()
+
+    def start(self):
+        """订阅网络事件并启用Network域"""
+        self.session.on('Network.requestWillBeSent', self._on_request)
+        self.session.on('Network.loadingFinished', self._on_finished)
+        self.session.on('Network.loadingFailed', self._on_failed)
+        self.session.send('Network.enable')
+        return self
+
+    def _on_request(self, params):
+        url = params.get('request', {}).get('url', '')
+        resource_type = params.get('type', '')
+        if resource_type in IGNORED_RESOURCE_TYPES or url.startswith(IGNORED_URL_PREFIXES):
+            return
+
+        with self._cond:
+            # 重定向沿用同一个requestId，覆盖即可
+            self._inflight[params['requestId']] = {
+                'url': url,
+                'type': resource_type,
+                'start': time.monotonic(),
+            }
+            self._last_activity = time.monotonic()
+            self._recent.append({
+                'event': 'request',
+                'time': time.time(),
+                'method': params.get('request', {}).get('method', ''),
+                'type': resource_type,
+                'url': url,
+            })
+
+    def _on_finished(self, params):
+        self._done(params, 'finished')
+
+    def _on_failed(self, params):
+        self._done(params, 'failed', params.get('errorText', ''))
+
+    def _done(self, params, status, error=''):
+        with self._cond:
+            request = self._inflight.pop(params.get('requestId'), None)
+            if request is None:
+                return
+            self._last_activity = time.monotonic()
+            self._recent.append({
+                'event': status,
+                'time': time.time(),
+                'type': request['type'],
+                'url': request['url'],
+                'duration': round(self._last_activity - request['start'], 3),
+                'error': error,
+            })
+            self._cond.notify_all()
+
+    def inflight_count(self):
+        """当前进行中（且未超时）的请求数"""
+        with self._cond:
+            return self._active_count(time.monotonic())
+
+    def _active_count(self, now):
+        return sum(1 for r in self._inflight.values() if now - r['start'] < self.stale_after)
+
+    def wait_for_idle(self, idle_ms=500, timeout=30):
+        """
+        等待网络空闲：连续 idle_ms 毫秒没有进行中的请求
+
+        空闲窗口从调用时刻开始计算，点击后请求尚未发出时也会至少等待 idle_ms。
+        返回True表示已空闲，False表示超时。
+        """
+        idle = idle_ms / 1000
+        start = time.monotonic()
+        deadline = start + timeout
+
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self.session.closed:
+                    return False
+
+                quiet_since = max(self._last_activity, start)
+                if self._active_count(now) == 0 and now - quiet_since >= idle:
+                    return True
+                if now >= deadline:
+                    logger.debug(f"等待网络空闲超时，仍有 {self._active_count(now)} 个请求进行中")
+                    return False
+
+                if self._active_count(now) == 0:
+                    wait = quiet_since + idle - now
+                else:
+                    wait = 0.1  # 有请求进行中：等待完成通知，定期复查长轮询
+                self._cond.wait(max(0.01, min(wait, deadline - now)))
+
+    def recent_events(self):
+        """最近的网络事件（用于问题诊断）"""
+        with self._cond:
+            return list(self._recent)
+
+    def stop(self):
+        """关闭底层CDP会话"""
+        self.session.close()
+
+
+def start_network_tracker(driver):
+    """为driver当前页面启动网络空闲检测，不可用时返回None"""
+    session = open_cdp_session(driver)
+    if session is None:
+        logger.warning("网络空闲检测不可用，将使用固定等待时间")
+        return None
+    try:
+        return NetworkIdleTracker(session).start()
+    except Exception as e:
+        logger.warning(f"网络空闲检测启动失败，将使用固定等待时间: {e}")
+        session.close()
+        return None
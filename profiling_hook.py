@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按记录采样的性能分析
+对部分记录（每N条一次，或最慢的K条）做Python侧性能分析，
+输出折叠栈文件（flamegraph.pl / speedscope 可直接打开）或 cProfile 的 .prof 文件，
+用于回答"时间花在我们的代码里还是在等浏览器"
+
+用法：
+    python update_device_location.py --profile every:10
+    python update_device_location.py --profile slowest:5 --profile-engine cprofile
+"""
+
+import argparse
+import cProfile
+import heapq
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+def parse_profile_spec(text):
+    """解析 "every:N" 或 "slowest:K"，返回 (mode, n)"""
+    mode, _, number = text.partition(':')
+    if mode not in ('every', 'slowest') or not number.isdigit() or int(number) < 1:
+        raise ValueError(f"性能分析参数应为 every:N 或 slowest:K，例如 every:10: {text}")
+    return mode, int(number)
+
+
+class StackSampler:
+    """采样式分析：后台线程定时抓取目标线程的调用栈"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+
+class RecordProfiler:
+    """
+    记录级性能分析钩子
+
+    Args:
+        output_prefix: 输出文件前缀（通常为日志文件名去掉扩展名）
+        mode: 'every' 每N条分析一条；'slowest' 分析每一条但只保留最慢的K条
+        n: N 或 K
+        engine: 'sampling'（折叠栈，开销小）或 'cprofile'（精确调用次数）
+    """
+
+    def __init__(self, output_prefix, mode='every', n=10, engine='sampling', interval=0.005):
+        self.output_prefix = str(output_prefix)
+        self.mode = mode
+        self.n = n
+        self.engine = engine
+        self.interval = interval
+        self.index = 0
+        self.profiled = 0
+        self._kept = []          # slowest模式: 小顶堆 (耗时, 序号, key, 结果)
+        self._stacks = Counter()
+        self._stats = None
+
+    @contextmanager
+    def record(self, key):
+        """包裹一条记录的处理过程"""
+        self.index += 1
+        if self.mode == 'every' and (self.index - 1) % self.n != 0:
+            yield
+            return
+
+        if self.engine == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(threading.get_ident(), self.interval)
+            profiler.start()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.engine == 'cprofile':
+                profiler.disable()
+                result = profiler
+            else:
+                result = profiler.stop()
+            self._keep(elapsed, key, result)
+
+    def _keep(self, elapsed, key, result):
+        self.profiled += 1
+        if self.mode == 'slowest':
+            item = (elapsed, self.index, str(key), result)
+            if len(self._kept) < self.n:
+                heapq.heappush(self._kept, item)
+            else:
+                heapq.heappushpop(self._kept, item)
+        else:
+            self._merge(result)
+
+    def _merge(self, result):
+        if self.engine == 'cprofile':
+            if self._stats is None:
+                self._stats = pstats.Stats(result)
+            else:
+                self._stats.add(result)
+        else:
+            self._stacks.update(result)
+
+    def write(self):
+        """写出汇总结果，返回生成的文件列表"""
+        if self.mode == 'slowest':
+            for elapsed, _, key, result in sorted(self._kept, reverse=True):
+                logger.info(f"  最慢记录: {key} {elapsed:.1f}s")
+                self._merge(result)
+
+        files = []
+        if self.engine == 'cprofile' and self._stats is not None:
+            prof_file = f"{self.output_prefix}_profile.prof"
+            self._stats.dump_stats(prof_file)
+            text_file = f"{self.output_prefix}_profile.txt"
+            with open(text_file, 'w', encoding='utf-8') as f:
+                pstats.Stats(prof_file, stream=f).sort_stats('cumulative').print_stats(40)
+            files += [prof_file, text_file]
+        elif self._stacks:
+            collapsed_file = f"{self.output_prefix}_profile.collapsed"
+            with open(collapsed_file, 'w', encoding='utf-8') as f:
+                for stack, count in self._stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            files.append(collapsed_file)
+
+        if files:
+            logger.info(f"性能分析（{self.profiled} 条记录）已保存到: {', '.join(files)}")
+        return files
+
+
+def add_profile_arguments(parser):
+    """为批量脚本的命令行添加 --profile / --profile-engine 参数"""
+    def spec(text):
+        try:
+            return parse_profile_spec(text)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+
+    parser.add_argument('--profile', type=spec, metavar='every:N|slowest:K',
+                        help='对部分记录做性能分析，结果保存在日志文件旁')
+    parser.add_argument('--profile-engine', choices=['sampling', 'cprofile'], default='sampling',
+                        help='sampling=折叠栈火焰图（默认），cprofile=.prof 文件')
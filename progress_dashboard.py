@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时进度面板
+统计完成/失败/跳过数量、滚动吞吐率（条/分钟）、各worker状态、步骤耗时p95，
+根据滚动吞吐率估算剩余时间；在终端原地刷新显示，也可开启本地HTTP状态页
+"""
+
+import html
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+def _format_seconds(seconds):
+    """秒数格式化为 H:MM:SS / M:SS"""
+    if seconds is None:
+        return '--:--'
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+class ProgressTracker:
+    """线程安全的进度统计"""
+
+    def __init__(self, total=0, window=300, step_samples=500):
+        self.total = total
+        self.window = window                       # 滚动吞吐率的时间窗口（秒）
+        self.counts = {'success': 0, 'failed': 0, 'skipped': 0}
+        self.started = time.time()
+        self._finished = deque()                   # 最近完成记录的时间戳
+        self._steps = deque(maxlen=step_samples)   # 最近的步骤耗时
+        self._workers = {}                         # worker -> {'state', 'key', 'since'}
+        self._lock = threading.Lock()
+
+    def set_total(self, total):
+        with self._lock:
+            self.total = total
+
+    def worker_state(self, worker, state, key=''):
+        """更新worker状态，如 登录中 / 处理中 / 等待队列 / 已结束"""
+        with self._lock:
+            self._workers[worker] = {'state': state, 'key': key, 'since': time.time()}
+
+    def step(self, name, seconds):
+        """记录一个步骤的耗时"""
+        with self._lock:
+            self._steps.append((name, seconds))
+
+    def skip(self, count):
+        """记录本次运行不处理的记录数（分片筛除、--start/--end 范围之外、队列中已处理过），不计入进度和速率"""
+        with self._lock:
+            self.counts['skipped'] += count
+
+    def record_done(self, status):
+        """记录一条处理完成，status 为 success / failed"""
+        now = time.time()
+        with self._lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+            self._finished.append(now)
+            self._trim(now)
+
+    def _trim(self, now):
+        while self._finished and now - self._finished[0] > self.window:
+            self._finished.popleft()
+
+    def snapshot(self):
+        """当前进度的快照（供终端面板和HTTP状态页使用）"""
+        now = time.time()
+        with self._lock:
+            self._trim(now)
+            processed = self.counts['success'] + self.counts['failed']
+            elapsed = now - self.started
+
+            span = min(self.window, elapsed)
+            rate = len(self._finished) / span * 60 if span > 0 else 0.0
+            remaining = max(self.total - processed, 0)
+            eta = remaining / rate * 60 if rate > 0 else None
+
+            durations = sorted(seconds for _, seconds in self._steps)
+            p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))] if durations else None
+
+            return {
+                'total': self.total,
+                'processed': processed,
+                'success': self.counts['success'],
+                'failed': self.counts['failed'],
+                'skipped': self.counts['skipped'],
+                'rate_per_min': round(rate, 2),
+                'step_p95': round(p95, 2) if p95 is not None else None,
+                'elapsed': round(elapsed),
+                'eta': round(eta) if eta is not None else None,
+                'workers': {
+                    name: {'state': w['state'], 'key': w['key'], 'for': round(now - w['since'])}
+                    for name, w in sorted(self._workers.items())
+                },
+            }
+
+
+def render_lines(snap, width=30):
+    """把快照渲染为若干行文本"""
+    total = snap['total'] or 0
+    ratio = min(snap['processed'] / total, 1.0) if total else 0.0
+    bar = '#' * int(ratio * width) + '.' * (width - int(ratio * width))
+    p95 = f"{snap['step_p95']:.1f}s" if snap['step_p95'] is not None else '--'
+
+    lines = [
+        f"进度 {snap['processed']}/{total} [{bar}] {ratio * 100:5.1f}%   "
+        f"成功 {snap['success']}  失败 {snap['failed']}  跳过 {snap['skipped']}",
+        f"速率 {snap['rate_per_min']:.1f} 条/分钟   步骤p95 {p95}   "
+        f"已用 {_format_seconds(snap['elapsed'])}   预计剩余 {_format_seconds(snap['eta'])}",
+    ]
+    for name, w in snap['workers'].items():
+        lines.append(f"  {name}: {w['state']} {w['key']} ({w['for']}s)")
+    return lines
+
+
+class TerminalDashboard:
+    """在终端原地刷新的进度面板；运行期间控制台只显示WARNING以上的日志"""
+
+    def __init__(self, tracker, interval=1.0, stream=None):
+        self.tracker = tracker
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self._stop = threading.Event()
+        self._thread = None
+        self._lines = 0
+        self._muted = []
+
+    def start(self):
+        if os.name == 'nt':
+            os.system('')  # 启用Windows终端的ANSI转义序列
+        # 控制台日志会打乱面板，暂时只保留警告和错误（日志文件不受影响）
+        for handler in logging.getLogger().handlers:
+            if type(handler) is logging.StreamHandler:
+                self._muted.append((handler, handler.level))
+                handler.setLevel(logging.WARNING)
+        self._thread = threading.Thread(target=self._loop, name='dashboard', daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.render()
+
+    def render(self):
+        lines = render_lines(self.tracker.snapshot())
+        # 光标上移到面板起始行并清除旧内容
+        prefix = f"\x1b[{self._lines}F\x1b[J" if self._lines else ''
+        self.stream.write(prefix + '\n'.join(lines) + '\n')
+        self.stream.flush()
+        self._lines = len(lines)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.render()
+        self._lines = 0
+        for handler, level in self._muted:
+            handler.setLevel(level)
+
+
+STATUS_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta http-equiv="refresh" content="2">
+<title>批量处理进度</title>
+<style>body{{font-family:monospace;margin:2em}}pre{{font-size:15px}}</style></head>
+<body><h3>批量处理进度</h3><pre>{body}</pre></body></html>
+"""
+
+
+class StatusServer:
+    """本地HTTP状态页：/ 为自动刷新的页面，/status.json 为JSON"""
+
+    def __init__(self, tracker, port=8765, host='127.0.0.1'):
+        tracker_ref = tracker
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                snap = tracker_ref.snapshot()
+                if self.path.startswith('/status.json'):
+                    body = json.dumps(snap, ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json; charset=utf-8'
+                else:
+                    body = STATUS_PAGE.format(body=html.escape('\n'.join(render_lines(snap)))).encode('utf-8')
+                    content_type = 'text/html; charset=utf-8'
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{port}/"
+        self._thread = threading.Thread(target=self.server.serve_forever, name='status-server', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        logger.info(f"进度状态页: {self.url}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Dashboard:
+    """终端面板 + 可选HTTP状态页"""
+
+    def __init__(self, tracker, live=True, http_port=None):
+        self.tracker = tracker
+        self.terminal = TerminalDashboard(tracker) if live else None
+        self.server = None
+        if http_port:
+            try:
+                self.server = StatusServer(tracker, http_port)
+            except OSError as e:
+                logger.warning(f"状态页启动失败（端口 {http_port}）: {e}")
+
+    def start(self):
+        if self.server:
+            self.server.start()
+        if self.terminal:
+            self.terminal.start()
+        return self
+
+    def stop(self):
+        if self.terminal:
+            self.terminal.stop()
+        if self.server:
+            self.server.stop()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回放节奏控制
+按录制时各步骤的时间间隔（乘以速度系数）回放，并用页面状态代替固定等待：
+- navigate 步骤：等待URL变化、document.readyState 为 complete、网络空闲；
+  短时间内URL没有变化（如录制时在地址栏输入的地址，前一步骤不会跳转）时直接打开录制的地址
+- 其他步骤：等待网络空闲（空闲窗口从步骤执行后开始计算，点击后尚未发出的请求也能等到）
+- 网络空闲检测不可用（或CDP会话已断开）时，每个步骤后固定等待 fallback_delay 秒
+
+速度系数：0 = 尽可能快（只按页面状态等待），1 = 录制时的速度，0.5 = 两倍速
+"""
+
+import logging
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayScheduler:
+    """
+    回放调度器
+
+    Args:
+        driver: WebDriver
+        speed: 速度系数
+        network: NetworkIdleTracker（可选）
+        idle_ms: 网络空闲判定时间（毫秒）
+        timeout: 等待页面跳转的超时（秒）
+        on_wait: 等待回调 on_wait(kind, seconds)，用于命令统计
+        fallback_delay: 没有网络空闲检测时每个步骤后的固定等待（秒）
+        navigation_grace: 等待前一步骤触发跳转的时间（秒），超过后直接打开录制的地址
+    """
+
+    def __init__(self, driver, speed=0.0, network=None, idle_ms=500, timeout=30, on_wait=None,
+                 fallback_delay=0.5, navigation_grace=5):
+        self.driver = driver
+        self.speed = speed
+        self.network = network
+        self.idle_ms = idle_ms
+        self.timeout = timeout
+        self.on_wait = on_wait
+        self.fallback_delay = fallback_delay
+        self.navigation_grace = navigation_grace
+        self._step_start = None
+        self._url_before = None
+
+    @staticmethod
+    def prepare(plan):
+        """
+        预先计算每个步骤与上一步骤的录制间隔（action['delta']），
+        并标记紧接在 navigate 之前的步骤（执行前需要记下当前URL）
+        """
+        previous = None
+        for i, action in enumerate(plan):
+            delay = action.get('time_delay', 0)
+            action['delta'] = max(delay - previous, 0) if previous is not None else 0
+            action['before_navigate'] = i + 1 < len(plan) and plan[i + 1]['type'] == 'navigate'
+            previous = delay
+        return plan
+
+    def start_record(self):
+        """每条记录开始时调用，第一个步骤不等待"""
+        self._step_start = None
+        self._url_before = None
+
+    def before(self, action):
+        """步骤执行前：按录制节奏等待"""
+        if self.speed > 0 and self._step_start is not None:
+            remaining = action.get('delta', 0) * self.speed - (time.perf_counter() - self._step_start)
+            if remaining > 0:
+                time.sleep(remaining)
+                self._waited('pace', remaining)
+
+        if action.get('before_navigate'):
+            self._url_before = self.driver.current_url
+        self._step_start = time.perf_counter()
+
+    def after(self, action):
+        """步骤执行后：等待页面就绪，返回False表示页面没有按预期跳转"""
+        if action['type'] == 'navigate':
+            return self._wait_navigation(action)
+
+        if self._network_available():
+            self._wait_idle()
+        elif self.fallback_delay > 0:
+            time.sleep(self.fallback_delay)
+            self._waited('sleep', self.fallback_delay)
+        return True
+
+    def _network_available(self):
+        """网络空闲检测是否可用（CDP会话中途断开后不再使用）"""
+        if self.network is None:
+            return False
+        if self.network.session.closed:
+            logger.warning("CDP会话已断开，之后改为每个步骤后固定等待")
+            self.network = None
+            return False
+        return True
+
+    def _wait_navigation(self, action):
+        started = time.perf_counter()
+        url_before, self._url_before = self._url_before, None
+        url = action.get('data', {}).get('url', '')
+        try:
+            if not self._navigated(url_before, url):
+                if not url:
+                    logger.warning(f"页面没有跳转（等待 {self.navigation_grace}s），录制中没有目标地址")
+                    return False
+                # 前一步骤没有触发跳转（如录制时在地址栏输入的地址）：直接打开录制的地址
+                logger.info(f"页面没有跳转，直接打开 {url}")
+                self.driver.get(url)
+            WebDriverWait(self.driver, self.timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script('return document.readyState') == 'complete')
+        except TimeoutException:
+            logger.warning(f"页面 {url} 没有加载完成（等待 {self.timeout}s）")
+            return False
+        finally:
+            self._waited('navigate', time.perf_counter() - started)
+
+        if self._network_available():
+            self._wait_idle()
+        return True
+
+    def _navigated(self, url_before, url):
+        """前一步骤是否已经触发跳转（没有跳转前的地址时看是否已在目标页面），最多等待 navigation_grace 秒"""
+        if url_before is None:
+            return self.driver.current_url == url
+        try:
+            WebDriverWait(self.driver, self.navigation_grace, poll_frequency=0.1).until(
+                lambda d: d.current_url != url_before)
+            return True
+        except TimeoutException:
+            return False
+
+    def _wait_idle(self):
+        started = time.perf_counter()
+        if not self.network.wait_for_idle(self.idle_ms, self.timeout):
+            logger.warning("等待网络空闲超时，继续执行")
+        self._waited('idle', time.perf_counter() - started)
+
+    def _waited(self, kind, seconds):
+        if self.on_wait:
+            self.on_wait(kind, seconds)
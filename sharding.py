@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多机分片运行
+按资产编号的稳定哈希把每条记录固定分配到 N 个分片之一，每台电脑只处理自己的分片，
+各分片的结果文件最后用 merge 命令合并
+
+使用方法：
+    python update_device_location.py --shard 1/3      # 第1台电脑
+    python update_device_location.py --shard 2/3      # 第2台电脑
+    python sharding.py merge -o 合并结果.csv update_results_shard*.csv
+    python sharding.py preview 存放地测试.xlsx 资产编号 3
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+
+# 结果文件的列
+RESULT_FIELDS = ['time', 'key', 'value', 'status', 'error', 'seconds', 'shard']
+
+
+def parse_shard(text):
+    """解析 "i/N" 形式的分片参数（i 从1开始），返回 (i, N)"""
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ValueError(f"分片参数格式应为 i/N，例如 1/3: {text}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"分片编号超出范围: {text}")
+    return index, count
+
+
+def shard_of(key, count):
+    """返回记录所属的分片编号（1..count），与行顺序、过滤条件和机器无关"""
+    normalized = str(key).strip().encode('utf-8')
+    digest = hashlib.md5(normalized).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def select_shard(df, column, index, count):
+    """从DataFrame中筛选属于指定分片的行"""
+    mask = df[column].map(lambda key: shard_of(key, count) == index)
+    return df[mask]
+
+
+def result_filename(prefix, shard=None):
+    """结果文件名：分片运行固定为 prefix_shard1of3.csv（重跑时追加），否则带时间戳"""
+    if shard:
+        return f"{prefix}_shard{shard[0]}of{shard[1]}.csv"
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+
+class ResultWriter:
+    """逐条追加写入处理结果，中途崩溃也不会丢失已完成的记录"""
+
+    def __init__(self, filename, shard=None):
+        self.filename = filename
+        self.shard = f"{shard[0]}/{shard[1]}" if shard else ''
+        is_new = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        # utf-8-sig: 方便直接用Excel打开
+        self._file = open(filename, 'a', newline='', encoding='utf-8-sig' if is_new else 'utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=RESULT_FIELDS)
+        self._lock = threading.Lock()   # 并行模式下多个worker线程共用
+        if is_new:
+            self._writer.writeheader()
+
+    def write(self, key, value, status, error='', seconds=0.0):
+        """写入一条结果，status 为 success / failed / skipped"""
+        row = {
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'key': key,
+            'value': value,
+            'status': status,
+            'error': error,
+            'seconds': round(seconds, 2),
+            'shard': self.shard,
+        }
+        with self._lock:
+            self._writer.writerow(row)
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def merge_results(inputs, output):
+    """
+    合并多个结果文件；同一记录出现多次时保留最后一次的结果（按时间排序）
+
+    Returns:
+        合并后的记录列表
+    """
+    rows = []
+    for filename in inputs:
+        with open(filename, newline='', encoding='utf-8-sig') as f:
+            rows.extend(csv.DictReader(f))
+
+    rows.sort(key=lambda row: row.get('time', ''))
+    latest = {}
+    for row in rows:
+        latest[row['key']] = row
+    merged = list(latest.values())
+
+    if output.endswith(('.xlsx', '.xls')):
+        import pandas as pd
+        pd.DataFrame(merged, columns=RESULT_FIELDS).to_excel(output, index=False)
+    else:
+        with open(output, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(merged)
+
+    return merged
+
+
+def _shard_argument(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_shard_argument(parser):
+    """为批量脚本的命令行添加 --shard 参数"""
+    parser.add_argument('--shard', type=_shard_argument, metavar='i/N',
+                        help='只处理第i个分片（共N个），按资产编号哈希分配')
+
+
+def main(args):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='多机分片运行工具')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    merge = sub.add_parser('merge', help='合并各分片的结果文件')
+    merge.add_argument('inputs', nargs='+', help='结果文件（支持通配符）')
+    merge.add_argument('-o', '--output', default='merged_results.csv', help='输出文件（.csv 或 .xlsx）')
+
+    preview = sub.add_parser('preview', help='查看Excel中各分片的记录数')
+    preview.add_argument('excel', help='Excel文件')
+    preview.add_argument('column', help='用于分片的列名，如 资产编号')
+    preview.add_argument('count', type=int, help='分片数')
+
+    options = parser.parse_args(args)
+
+    if options.command == 'merge':
+        inputs = sorted({f for pattern in options.inputs for f in (glob.glob(pattern) or [pattern])})
+        start = time.time()
+        merged = merge_results(inputs, options.output)
+        counts = {}
+        for row in merged:
+            counts[row['status']] = counts.get(row['status'], 0) + 1
+        print(f"已合并 {len(inputs)} 个文件，共 {len(merged)} 条记录（{time.time() - start:.1f}s）")
+        for status, count in sorted(counts.items()):
+            print(f"  {status}: {count} 条")
+        print(f"保存到: {options.output}")
+
+    elif options.command == 'preview':
+        import pandas as pd
+        df = pd.read_excel(options.excel).dropna(subset=[options.column])
+        for index in range(1, options.count + 1):
+            print(f"分片 {index}/{options.count}: {len(select_shard(df, options.column, index, options.count))} 条")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
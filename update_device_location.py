@@ -5,7 +5,11 @@
 用途：从Excel文件读取设备信息，批量更新内网资产管理系统的"学院存放地"字段
 """
 
+import argparse
+import contextlib
+import itertools
 import json
+import sys
 import time
 import logging
 from datetime import datetime
@@ -14,10 +18,20 @@ from pathlib import Path
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
+
+from network_idle import start_network_tracker
+from webdriver_trace import CommandTracer
+from sharding import ResultWriter, add_shard_argument, result_filename, select_shard
+from work_queue import WorkQueue, add_queue_arguments, default_worker_id
+from progress_dashboard import Dashboard, ProgressTracker
+from diagnostics import FailureDiagnostics, enable_console_log
+from locator_preflight import PreflightReport
+from locator_chain import LocatorChain, describe, to_by
+from locator_health import REPORT_FILE, check_locators, load_report, log_report, merge_reports, save_report
+from dom_snapshots import Snapshot, take_snapshot
+from profiling_hook import RecordProfiler, add_profile_arguments
 
 
 # ==================== 配置区域 ====================
@@ -41,6 +55,27 @@ MANUAL_LOGIN = True
 WAIT_TIME = 3
 PAGE_LOAD_TIMEOUT = 30
 
+# 是否用网络空闲检测（CDP）代替固定等待，不可用时自动回退为 WAIT_TIME
+USE_NETWORK_IDLE = True
+# 连续多少毫秒没有进行中的请求视为页面就绪
+NETWORK_IDLE_MS = 500
+
+# 是否统计WebDriver命令往返次数和耗时（每条记录输出一行统计，结束时保存JSON）
+TRACE_WEBDRIVER = False
+
+# 是否在终端显示实时进度面板（吞吐率、预计剩余时间等）
+LIVE_DASHBOARD = False
+# 本地HTTP状态页端口（None=不开启），如 8765 → http://127.0.0.1:8765/
+DASHBOARD_HTTP_PORT = None
+
+# 记录失败时保存诊断包（截图、页面HTML、控制台日志、最近的网络请求和步骤）
+CAPTURE_FAILURES = True
+FAILURE_DIR = "failures"
+
+# 批量处理前用第一条记录预检所有定位器（短超时），有定位器失效时立即停止，而不是每条记录都等满超时
+PREFLIGHT = True
+PREFLIGHT_TIMEOUT = 5
+
 # ==================== Cookie配置 ====================
 # TODO: 用户需要从浏览器中复制Cookie并更新此配置
 # 获取Cookie方法：
@@ -109,6 +144,19 @@ ELEMENT_LOCATORS = {
     },
 }
 
+# 备用定位器：与主定位器一起轮流试探，实际最快找到元素的定位器会被记住（locator_stats.json）
+LOCATOR_FALLBACKS = {
+    # 'location_input': [
+    #     {'by': By.XPATH, 'value': '//label[contains(text(),"学院存放地")]/following-sibling::div//input'},
+    # ],
+}
+
+# 可选元素：找不到不影响处理（预检时不会因此停止）
+OPTIONAL_LOCATORS = {'success_message'}
+
+# DOM快照目录（健康检查时保存每个页面的HTML，之后可离线检查定位器）
+SNAPSHOT_DIR = 'dom_snapshots'
+
 # ==================== Excel列名配置 ====================
 # 根据Excel文件的实际列名配置
 COLUMN_NAMES = {
@@ -139,8 +187,19 @@ class DeviceLocationUpdater:
 
     def __init__(self):
         self.driver = None
-        self.wait = None
         self.data_df = None
+        self.network = None
+        self.tracer = CommandTracer() if TRACE_WEBDRIVER else None
+        self.progress = ProgressTracker()
+        self.failed_records = []
+        self.diagnostics = None
+        self.profiler = None
+        self.last_error = None
+        self.preflight_report = None    # 预检期间收集定位器结果
+        self.locator_chain = LocatorChain()
+        # 定位器健康检查报告（运行模式4 / --health-check 生成，可选）：按报告进入元素所在的iframe，优先用最快的定位器
+        self.health = load_report()
+        self._step_start = time.perf_counter()
 
     def init_driver(self):
         """初始化Chrome浏览器驱动"""
@@ -152,16 +211,26 @@ class DeviceLocationUpdater:
             chrome_options.add_argument('--disable-dev-shm-usage')
             chrome_options.add_argument('--disable-gpu')
             chrome_options.add_argument('--window-size=1920,1080')
+            if CAPTURE_FAILURES:
+                enable_console_log(chrome_options)
 
             if CHROME_DRIVER_PATH:
                 self.driver = webdriver.Chrome(executable_path=CHROME_DRIVER_PATH, options=chrome_options)
             else:
                 self.driver = webdriver.Chrome(options=chrome_options)
 
+            if self.tracer:
+                self.tracer.install(self.driver)
+
             # 设置页面加载超时（在driver创建后设置）
             self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
 
-            self.wait = WebDriverWait(self.driver, PAGE_LOAD_TIMEOUT)
+            if USE_NETWORK_IDLE:
+                self.network = start_network_tracker(self.driver)
+
+            if CAPTURE_FAILURES:
+                self.diagnostics = FailureDiagnostics(self.driver, FAILURE_DIR, network=self.network)
+
             logger.info("Chrome浏览器启动成功")
             return True
         except Exception as e:
@@ -169,6 +238,34 @@ class DeviceLocationUpdater:
             logger.error("请检查ChromeDriver是否已正确安装")
             return False
 
+    def pause(self, seconds):
+        """固定等待（开启命令追踪时计入等待时间）"""
+        time.sleep(seconds)
+        if self.tracer:
+            self.tracer.add_wait('sleep', seconds)
+
+    def wait_ready(self, fallback_seconds):
+        """等待页面请求完成；网络空闲检测不可用（或CDP会话中途断开）时退回固定等待"""
+        if self.network is not None and self.network.session.closed:
+            logger.warning("CDP会话已断开，之后改为固定等待")
+            self.network = None
+        if self.network is None:
+            self.pause(fallback_seconds)
+            return
+        started = time.perf_counter()
+        if not self.network.wait_for_idle(NETWORK_IDLE_MS, PAGE_LOAD_TIMEOUT):
+            logger.warning("等待网络空闲超时，继续执行")
+        if self.tracer:
+            self.tracer.add_wait('idle', time.perf_counter() - started)
+
+    def step_done(self, name):
+        """记录一个步骤的耗时（从上一个步骤结束算起）"""
+        now = time.perf_counter()
+        self.progress.step(name, now - self._step_start)
+        if self.diagnostics:
+            self.diagnostics.note(name, seconds=round(now - self._step_start, 2))
+        self._step_start = now
+
     def load_cookies(self):
         """加载Cookie到浏览器"""
         try:
@@ -209,17 +306,20 @@ class DeviceLocationUpdater:
             return False
 
     def find_element(self, element_name):
-        """查找页面元素"""
+        """查找页面元素（预检期间使用短超时，并尝试备用定位器）"""
         try:
             locator = ELEMENT_LOCATORS[element_name]
-            element = self.wait.until(
-                EC.presence_of_element_located((locator['by'], locator['value']))
-            )
+            if self.diagnostics:
+                self.diagnostics.note('find', element=element_name)
+            element = self._resolve(element_name)
+            if element is None:
+                raise TimeoutException()
             # 滚动到元素可见
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-            time.sleep(0.5)
+            self.pause(0.5)
             return element
         except TimeoutException:
+            self.last_error = f"找不到元素: {element_name} ({locator['by']} = {locator['value']})"
             logger.error(f"找不到元素: {element_name}")
             logger.error(f"定位方式: {locator['by']} = {locator['value']}")
             return None
@@ -227,10 +327,50 @@ class DeviceLocationUpdater:
             logger.error(f"查找元素 {element_name} 时出错: {e}")
             return None
 
+    def _locator_candidates(self, element_name):
+        """主定位器和备用定位器（健康检查报告中的最佳候选排在最前）"""
+        candidates = [ELEMENT_LOCATORS[element_name]] + LOCATOR_FALLBACKS.get(element_name, [])
+        entry = self.health['locators'].get(element_name) if self.health else None
+        if entry and entry['best_index'] and entry['best_index'] < len(candidates) \
+                and describe(candidates[entry['best_index']]) == entry['best']:
+            candidates.insert(0, candidates.pop(entry['best_index']))
+        return candidates
+
+    def _enter_reported_frame(self, element_name):
+        """按健康检查报告直接切换到元素所在的iframe，切换后找到元素时返回True"""
+        entry = self.health['locators'].get(element_name) if self.health else None
+        if not entry or not entry['frame']:
+            return False
+        try:
+            for index in entry['frame']:
+                self.driver.switch_to.frame(index)
+            if any(self.driver.find_elements(*to_by(loc)) for loc in self._locator_candidates(element_name)):
+                logger.debug(f"按健康检查报告进入iframe {entry['frame']}")
+                return True
+        except Exception as e:
+            logger.debug(f"按健康检查报告进入iframe失败: {e}")
+        self.driver.switch_to.default_content()
+        return False
+
+    def _resolve(self, element_name):
+        """轮流试探主定位器和备用定位器，历史上最快成功的优先（预检期间使用短超时）"""
+        candidates = self._locator_candidates(element_name)
+        timeout = PREFLIGHT_TIMEOUT if self.preflight_report is not None else PAGE_LOAD_TIMEOUT
+        element, used, count = self.locator_chain.resolve(self.driver, candidates, timeout, key=element_name)
+
+        if self.preflight_report is not None:
+            if element is None:
+                self.preflight_report.missing(element_name, describe(candidates[0]))
+            else:
+                self.preflight_report.found(element_name, describe(used), count, candidates.index(used))
+        return element
+
     def update_device_location(self, asset_number, new_location):
         """更新单条设备的存放地"""
         try:
             logger.info(f"开始处理资产编号: {asset_number}")
+            self.last_error = None
+            self._step_start = time.perf_counter()
 
             # 1. 输入资产编号并搜索
             search_input = self.find_element('search_input')
@@ -241,7 +381,7 @@ class DeviceLocationUpdater:
             search_input.send_keys(asset_number)
             logger.debug(f"已输入资产编号: {asset_number}")
 
-            time.sleep(WAIT_TIME)
+            self.wait_ready(WAIT_TIME)
 
             search_button = self.find_element('search_button')
             if not search_button:
@@ -249,7 +389,8 @@ class DeviceLocationUpdater:
             search_button.click()
             logger.debug("已点击搜索按钮")
 
-            time.sleep(WAIT_TIME * 2)
+            self.wait_ready(WAIT_TIME * 2)
+            self.step_done('search')
 
             # 2. 点击编辑按钮
             edit_button = self.find_element('edit_button')
@@ -258,21 +399,23 @@ class DeviceLocationUpdater:
             edit_button.click()
             logger.debug("已点击编辑按钮")
 
-            time.sleep(WAIT_TIME * 2)
+            self.wait_ready(WAIT_TIME * 2)
+            self.step_done('open_edit')
 
             # 检查是否有弹窗/iframe
             try:
-                # 尝试切换到iframe（很多弹窗使用iframe）
-                iframes = self.driver.find_elements(By.TAG_NAME, "iframe")
+                # 尝试切换到iframe（很多弹窗使用iframe），健康检查报告记录了所在的iframe时直接进入
+                iframes = [] if self._enter_reported_frame('location_input') else \
+                    self.driver.find_elements(By.TAG_NAME, "iframe")
                 if iframes:
                     logger.debug(f"发现 {len(iframes)} 个iframe，尝试切换...")
                     for i, iframe in enumerate(iframes):
                         try:
                             self.driver.switch_to.frame(iframe)
-                            time.sleep(0.5)
+                            self.pause(0.5)
                             # 检查是否能找到存放地输入框
-                            test_locator = ELEMENT_LOCATORS['location_input']
-                            test_elem = self.driver.find_elements(test_locator['by'], test_locator['value'])
+                            test_elem = any(self.driver.find_elements(*to_by(loc))
+                                            for loc in self._locator_candidates('location_input'))
                             if test_elem:
                                 logger.debug(f"在第{i+1}个iframe中找到存放地输入框")
                                 break
@@ -285,7 +428,7 @@ class DeviceLocationUpdater:
 
             # 滚动弹窗内容
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            time.sleep(1)
+            self.pause(1)
 
             # 3. 修改学院存放地
             location_input = self.find_element('location_input')
@@ -294,11 +437,11 @@ class DeviceLocationUpdater:
 
             # 先点击激活输入框
             location_input.click()
-            time.sleep(0.5)
+            self.pause(0.5)
 
             # 清空并输入新值
             location_input.clear()
-            time.sleep(0.5)
+            self.pause(0.5)
             location_input.send_keys(new_location)
 
             # 使用JavaScript确保值被设置（针对特殊输入框）
@@ -309,7 +452,8 @@ class DeviceLocationUpdater:
 
             logger.debug(f"已设置新的存放地: {new_location}")
 
-            time.sleep(WAIT_TIME)
+            self.wait_ready(WAIT_TIME)
+            self.step_done('set_location')
 
             # 4. 点击保存按钮
             save_button = self.find_element('save_button')
@@ -319,14 +463,15 @@ class DeviceLocationUpdater:
             logger.debug("已点击保存按钮")
 
             # 5. 等待保存成功
-            time.sleep(WAIT_TIME * 2)
+            self.wait_ready(WAIT_TIME * 2)
+            self.step_done('save')
 
             # 处理可能的弹窗
             try:
                 alert = self.driver.switch_to.alert
                 alert.accept()
                 logger.debug("已接受弹窗")
-                time.sleep(1)
+                self.pause(1)
             except:
                 pass
 
@@ -343,11 +488,25 @@ class DeviceLocationUpdater:
             return True
 
         except Exception as e:
+            self.last_error = e
             logger.error(f"更新资产编号 {asset_number} 时出错: {e}")
             return False
 
-    def run(self, start_index=0, end_index=None):
-        """执行批量更新"""
+    def run(self, start_index=0, end_index=None, shard=None, queue_path=None, worker_id=None,
+            dashboard=LIVE_DASHBOARD, status_port=DASHBOARD_HTTP_PORT, profile=None, profile_engine='sampling'):
+        """
+        执行批量更新
+
+        Args:
+            start_index / end_index: 处理范围（在分片筛选之后的记录中计算）
+            shard: (i, N)，只处理按资产编号哈希分到第i片的记录
+            queue_path: 共享工作队列文件；指定后把记录加入队列，再逐条领取处理
+            worker_id: 在工作队列中的worker标识
+            dashboard: 是否显示实时进度面板
+            status_port: 本地HTTP状态页端口
+            profile: ('every', N) 或 ('slowest', K)，对部分记录做性能分析
+            profile_engine: 'sampling' 或 'cprofile'
+        """
         logger.info("=" * 50)
         logger.info("开始批量更新设备存放地")
         logger.info("=" * 50)
@@ -380,7 +539,7 @@ class DeviceLocationUpdater:
             if admin_button:
                 admin_button.click()
                 logger.info("已点击'管理员资产管理'")
-                time.sleep(WAIT_TIME * 2)
+                self.wait_ready(WAIT_TIME * 2)
             else:
                 logger.warning("未找到'管理员资产管理'按钮，请手动点击")
                 time.sleep(WAIT_TIME * 5)
@@ -394,6 +553,14 @@ class DeviceLocationUpdater:
         if not self.read_excel():
             return False
 
+        # 分片：只保留分配给本机的记录
+        skipped = 0     # 本次不处理的记录数（进度面板显示为跳过）
+        if shard:
+            before = len(self.data_df)
+            self.data_df = select_shard(self.data_df, COLUMN_NAMES['asset_number'], *shard)
+            skipped += before - len(self.data_df)
+            logger.info(f"分片 {shard[0]}/{shard[1]}: 本机负责 {len(self.data_df)} 条记录")
+
         # 设置处理范围
         if end_index is None:
             end_index = len(self.data_df)
@@ -402,6 +569,30 @@ class DeviceLocationUpdater:
         total = len(records_to_process)
 
         logger.info(f"准备处理第 {start_index + 1} 到第 {end_index} 条记录，共 {total} 条")
+        skipped += len(self.data_df) - total
+
+        asset_col = COLUMN_NAMES['asset_number']
+        location_col = COLUMN_NAMES['new_location']
+        records = (
+            (str(row[asset_col]).strip(), str(row[location_col]).strip(), None)
+            for _, row in records_to_process.iterrows()
+        )
+
+        # 工作队列模式：加入队列（已存在的记录不会重复加入），然后领取处理
+        if queue_path:
+            queue = WorkQueue(queue_path)
+            worker_id = worker_id or default_worker_id()
+            added = queue.enqueue(
+                (asset, {'asset_number': asset, 'new_location': location}) for asset, location, _ in records
+            )
+            counts = queue.counts()
+            total = counts['pending']
+            skipped += counts['done'] + counts['failed']     # 队列中已处理过的记录不再处理
+            logger.info(f"工作队列 {queue_path}: 新加入 {added} 条，待处理 {total} 条，worker: {worker_id}")
+            records = (
+                (lease.payload['asset_number'], lease.payload['new_location'], lease)
+                for lease in queue.claims(worker_id)
+            )
 
         # 如果不是手动登录模式，访问系统页面
         if not MANUAL_LOGIN:
@@ -415,7 +606,7 @@ class DeviceLocationUpdater:
                 if admin_button:
                     admin_button.click()
                     logger.info("已点击'管理员资产管理'")
-                    time.sleep(WAIT_TIME * 2)
+                    self.wait_ready(WAIT_TIME * 2)
                 else:
                     logger.warning("未找到'管理员资产管理'按钮，可能已经在该页面")
 
@@ -423,52 +614,127 @@ class DeviceLocationUpdater:
                 logger.error(f"访问系统页面失败: {e}")
                 return False
 
-        # 统计结果
-        success_count = 0
-        failed_count = 0
-        failed_records = []
+        # 逐条写入结果文件（分片运行时各机器的结果用 sharding.py merge 合并）
+        results = ResultWriter(result_filename('update_results', shard), shard)
+        logger.info(f"处理结果将写入: {results.filename}")
 
-        # 遍历处理每条记录
-        for idx, row in records_to_process.iterrows():
-            asset_number = str(row[COLUMN_NAMES['asset_number']]).strip()
-            new_location = str(row[COLUMN_NAMES['new_location']]).strip()
+        # 进度统计从这里开始计时（不含登录时间）
+        worker = worker_id or 'main'
+        self.progress = ProgressTracker(total)
+        self.progress.skip(skipped)
+        live = Dashboard(self.progress, live=dashboard, http_port=status_port).start()
 
-            logger.info(f"\n[{idx - start_index + 1}/{total}] 处理资产: {asset_number}")
+        if profile:
+            self.profiler = RecordProfiler(Path(LOG_FILE).with_suffix(''), *profile, engine=profile_engine)
 
-            if self.update_device_location(asset_number, new_location):
-                success_count += 1
-            else:
-                failed_count += 1
-                failed_records.append({
-                    'index': idx - start_index + 1,
-                    'asset_number': asset_number,
-                    'location': new_location
-                })
+        self.failed_records = []
+        positions = itertools.count(1)
 
-            # 等待一段时间再处理下一条
-            time.sleep(WAIT_TIME)
+        # 遍历处理每条记录（先用第一条记录预检定位器）
+        try:
+            if not PREFLIGHT or self.preflight(records, total, worker, results, positions):
+                self._process_records(records, total, worker, results, positions)
+        finally:
+            self.progress.worker_state(worker, '已结束')
+            live.stop()
+            results.close()
+            self.locator_chain.save()
+            if self.profiler:
+                self.profiler.write()
 
         # 输出统计结果
+        snap = self.progress.snapshot()
         logger.info("\n" + "=" * 50)
         logger.info("批量更新完成")
         logger.info("=" * 50)
-        logger.info(f"总计: {total} 条")
-        logger.info(f"成功: {success_count} 条")
-        logger.info(f"失败: {failed_count} 条")
+        logger.info(f"总计: {snap['processed']} 条")
+        logger.info(f"成功: {snap['success']} 条")
+        logger.info(f"失败: {snap['failed']} 条")
+        logger.info(f"平均速率: {snap['processed'] / max(snap['elapsed'], 1) * 60:.1f} 条/分钟")
 
-        if failed_records:
+        if self.failed_records:
             logger.info("\n失败记录列表:")
-            for record in failed_records:
+            for record in self.failed_records:
                 logger.info(f"  [{record['index']}] {record['asset_number']} -> {record['location']}")
 
+        if self.tracer:
+            self.tracer.log_summary()
+            self.tracer.save(Path(LOG_FILE).with_suffix('.trace.json'))
+
         # 保持浏览器打开一段时间供用户查看
         logger.info(f"\n浏览器将在10秒后关闭...")
         time.sleep(10)
 
         return True
 
+    def preflight(self, records, total, worker, results, positions):
+        """
+        用第一条记录试运行：每个定位器最多等待 PREFLIGHT_TIMEOUT 秒，失效时尝试备用定位器
+
+        Returns:
+            True 表示可以继续处理其余记录；有必需的定位器找不到时返回False
+        """
+        first = next(records, None)
+        if first is None:
+            return True
+
+        logger.info(f"定位器预检：用第一条记录试运行（每个定位器最多等待 {PREFLIGHT_TIMEOUT} 秒）")
+        self.preflight_report = PreflightReport()
+        try:
+            self._process_records([first], total, worker, results, positions)
+        finally:
+            report, self.preflight_report = self.preflight_report, None
+
+        report.log(expected=[name for name in ELEMENT_LOCATORS if name != 'admin_asset_management'],
+                   optional=OPTIONAL_LOCATORS)
+        missing = report.missing_names(OPTIONAL_LOCATORS)
+        if missing:
+            logger.error(f"以下元素找不到且没有可用的备用定位器，停止批量处理: {', '.join(missing)}")
+            logger.error("请用 get_locators_helper.py 重新获取定位，或在 LOCATOR_FALLBACKS 中添加备用定位器")
+            return False
+        return True
+
+    def _process_records(self, records, total, worker, results, positions):
+        """逐条处理记录，结果写入results并计入进度统计"""
+        for asset_number, new_location, lease in records:
+            position = next(positions)
+            logger.info(f"\n[{position}/{total}] 处理资产: {asset_number}")
+            self.progress.worker_state(worker, '处理中', asset_number)
+
+            if self.tracer:
+                self.tracer.start_record(asset_number)
+
+            record_start = time.time()
+            with self.profiler.record(asset_number) if self.profiler else contextlib.nullcontext():
+                success = self.update_device_location(asset_number, new_location)
+            if success:
+                results.write(asset_number, new_location, 'success', seconds=time.time() - record_start)
+            else:
+                self.failed_records.append({
+                    'index': position,
+                    'asset_number': asset_number,
+                    'location': new_location
+                })
+                results.write(asset_number, new_location, 'failed', seconds=time.time() - record_start)
+                if self.diagnostics:
+                    self.diagnostics.capture(asset_number, self.last_error)
+            self.progress.record_done('success' if success else 'failed')
+
+            if lease:
+                lease.complete(success)
+
+            # 等待页面请求完成再处理下一条
+            self.wait_ready(WAIT_TIME)
+
+            if self.tracer:
+                logger.info(f"本条记录: {self.tracer.end_record()}")
+
     def close(self):
         """关闭浏览器"""
+        if self.diagnostics:
+            self.diagnostics.close()
+        if self.network:
+            self.network.stop()
         if self.driver:
             self.driver.quit()
             logger.info("浏览器已关闭")
@@ -483,31 +749,38 @@ class ElementLocatorTester:
         self.driver = None
 
     def test_locators(self):
-        """测试元素定位是否正确"""
-        print("元素定位测试工具")
+        """
+        定位器健康检查：每个frame执行一次页面内脚本，检查全部定位器（含备用定位器）的匹配数量和耗时，
+        元素分布在多个页面时可以逐页检查，结果合并保存到 locator_health.REPORT_FILE，每个页面的DOM快照保存到 SNAPSHOT_DIR
+        """
+        print("定位器健康检查")
         print("=" * 50)
         print("请在浏览器中手动登录系统后，运行此测试")
 
         if not self.init_driver():
             return
 
-        # 让用户手动登录
-        print("\n请手动登录系统，登录完成后按回车继续...")
-        input()
-
-        # 测试每个元素定位
-        for element_name, locator in ELEMENT_LOCATORS.items():
-            print(f"\n测试元素: {element_name}")
-            print(f"  定位方式: {locator['by']}")
-            print(f"  定位值: {locator['value']}")
-
-            try:
-                element = self.driver.find_element(locator['by'], locator['value'])
-                print(f"  ✓ 找到元素: {element.tag_name}")
-            except NoSuchElementException:
-                print(f"  ✗ 未找到元素，请检查定位方式")
+        report = None
+        try:
+            for page in itertools.count(1):
+                answer = input("\n打开需要检查的页面（如编辑弹窗）后输入页面名称（如 search / edit）并回车，"
+                               "输入 q 结束: ").strip()
+                if answer.lower() == 'q':
+                    break
+                current = check_locators(self.driver, all_locators())
+                log_report(current)
+                report = merge_reports(report, current)
+                # 同时保存DOM快照，之后可以离线检查（--offline-check）和对比
+                try:
+                    take_snapshot(self.driver, answer or f"page{page}", SNAPSHOT_DIR)
+                except Exception as e:
+                    logger.warning(f"DOM快照保存失败: {e}")
+        finally:
+            self.driver.quit()
 
-        self.driver.quit()
+        if report:
+            save_report(report)
+            print(f"\n检查报告已保存到: {REPORT_FILE}（批量更新时自动读取）")
 
     def init_driver(self):
         """初始化Chrome浏览器驱动"""
@@ -522,6 +795,28 @@ class ElementLocatorTester:
             return False
 
 
+def all_locators():
+    """元素名 → 主定位器和备用定位器"""
+    return {name: [locator] + LOCATOR_FALLBACKS.get(name, []) for name, locator in ELEMENT_LOCATORS.items()}
+
+
+def offline_check(snapshots):
+    """用保存的DOM快照离线检查全部定位器（不需要浏览器）"""
+    report = None
+    for directory in snapshots:
+        try:
+            current = Snapshot(directory).evaluate(all_locators())
+        except (OSError, ValueError, RuntimeError) as e:
+            logger.error(f"快照 {directory} 检查失败: {e}")
+            continue
+        logger.info(f"\n快照: {directory}")
+        log_report(current)
+        report = merge_reports(report, current)
+    if report and len(snapshots) > 1:
+        logger.info("\n合并结果:")
+        log_report(report)
+
+
 # ==================== 配置导出工具 ====================
 
 def export_config_template():
@@ -584,11 +879,29 @@ def load_config_from_file(filename='config_template.json'):
 
 # ==================== 主程序 ====================
 
+def parse_args(argv):
+    """解析命令行参数（带参数运行时不再询问运行模式）"""
+    parser = argparse.ArgumentParser(description='浙江大学设备存放地批量更新脚本')
+    add_shard_argument(parser)
+    add_queue_arguments(parser)
+    add_profile_arguments(parser)
+    parser.add_argument('--start', type=int, default=0, help='起始索引（从0开始）')
+    parser.add_argument('--end', type=int, default=None, help='结束索引（不包含）')
+    parser.add_argument('--dashboard', action='store_true', default=LIVE_DASHBOARD, help='显示实时进度面板')
+    parser.add_argument('--status-port', type=int, default=DASHBOARD_HTTP_PORT, help='开启本地HTTP状态页的端口')
+    parser.add_argument('--health-check', action='store_true', help='检查定位器并生成健康检查报告（不处理记录）')
+    parser.add_argument('--offline-check', nargs='+', metavar='SNAPSHOT',
+                        help='用保存的DOM快照离线检查定位器（不打开浏览器）')
+    return parser.parse_args(argv)
+
+
 def main():
     """主函数"""
     print("浙江大学设备存放地批量更新脚本")
     print("=" * 50)
 
+    options = parse_args(sys.argv[1:])
+
     # 检查Excel文件是否存在
     if not Path(EXCEL_FILE).exists():
         print(f"错误: 找不到Excel文件 '{EXCEL_FILE}'")
@@ -599,12 +912,28 @@ def main():
     updater = DeviceLocationUpdater()
 
     try:
+        if options.health_check:
+            ElementLocatorTester().test_locators()
+            return
+
+        if options.offline_check:
+            offline_check(options.offline_check)
+            return
+
+        # 命令行指定了参数：非交互运行（用于多台电脑分片运行）
+        if len(sys.argv) > 1:
+            updater.run(start_index=options.start, end_index=options.end, shard=options.shard,
+                        queue_path=options.queue, worker_id=options.worker_id,
+                        dashboard=options.dashboard, status_port=options.status_port,
+                        profile=options.profile, profile_engine=options.profile_engine)
+            return
+
         # 询问用户处理范围
         print("\n请选择运行模式:")
         print("1. 测试模式（只处理前3条记录）")
         print("2. 批量处理（处理所有记录）")
         print("3. 自定义范围")
-        print("4. 测试元素定位（用于调试）")
+        print("4. 定位器健康检查（生成 locator_health.json）")
 
         choice = input("请输入选项 (1-4): ").strip()
 
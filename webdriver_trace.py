@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WebDriver命令追踪
+包装driver的命令执行入口，按命令类型统计每条记录的往返次数和耗时，
+同时统计固定等待和网络空闲等待的时间，用于找出最"啰嗦"的操作路径
+"""
+
+import json
+import logging
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+def _new_stats():
+    return {
+        'commands': defaultdict(lambda: {'count': 0, 'seconds': 0.0}),
+        'waits': defaultdict(float),
+    }
+
+
+class CommandTracer:
+    """统计WebDriver命令往返次数与耗时"""
+
+    def __init__(self):
+        self.totals = _new_stats()
+        self.current = None        # 当前记录的统计
+        self.current_key = None
+        self.record_count = 0
+        self.record_seconds = 0.0
+        self._record_start = None
+
+    def install(self, driver):
+        """包装driver.execute，WebElement上的操作也经由此入口"""
+        original_execute = driver.execute
+
+        def traced_execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return original_execute(driver_command, params)
+            finally:
+                self._add_command(driver_command, time.perf_counter() - start)
+
+        driver.execute = traced_execute
+        return driver
+
+    def _add_command(self, command, seconds):
+        for stats in (self.totals, self.current):
+            if stats is not None:
+                entry = stats['commands'][command]
+                entry['count'] += 1
+                entry['seconds'] += seconds
+
+    def add_wait(self, kind, seconds):
+        """记录一段等待时间，kind 如 'sleep'、'idle'"""
+        for stats in (self.totals, self.current):
+            if stats is not None:
+                stats['waits'][kind] += seconds
+
+    def start_record(self, key):
+        """开始统计一条记录"""
+        self.current = _new_stats()
+        self.current_key = key
+        self._record_start = time.perf_counter()
+
+    def end_record(self):
+        """结束当前记录的统计，返回摘要文本"""
+        if self.current is None:
+            return ''
+        elapsed = time.perf_counter() - self._record_start
+        self.record_count += 1
+        self.record_seconds += elapsed
+
+        text = self.format_stats(self.current, elapsed)
+        self.current = None
+        return text
+
+    @staticmethod
+    def format_stats(stats, elapsed, divisor=1):
+        """格式化为 "27 个命令, WebDriver 3.1s, 等待 12.0s (sleep 9.0s, idle 3.0s)" """
+        commands = stats['commands']
+        count = sum(c['count'] for c in commands.values()) / divisor
+        driver_seconds = sum(c['seconds'] for c in commands.values()) / divisor
+        waits = {k: v / divisor for k, v in stats['waits'].items()}
+        wait_detail = ', '.join(f"{k} {v:.1f}s" for k, v in sorted(waits.items()))
+        text = (f"{count:.0f} 个命令, WebDriver {driver_seconds:.1f}s, "
+                f"等待 {sum(waits.values()):.1f}s")
+        if wait_detail:
+            text += f" ({wait_detail})"
+        return text + f", 总耗时 {elapsed / divisor:.1f}s"
+
+    def summary(self):
+        """整体统计（可保存为JSON，用于对比不同版本的性能）"""
+        records = max(self.record_count, 1)
+        commands = sorted(self.totals['commands'].items(), key=lambda kv: kv[1]['seconds'], reverse=True)
+        return {
+            'records': self.record_count,
+            'seconds_per_record': round(self.record_seconds / records, 3),
+            'commands_per_record': round(sum(c['count'] for _, c in commands) / records, 2),
+            'webdriver_seconds_per_record': round(sum(c['seconds'] for _, c in commands) / records, 3),
+            'wait_seconds_per_record': {k: round(v / records, 3) for k, v in self.totals['waits'].items()},
+            'commands': {
+                name: {
+                    'count': c['count'],
+                    'per_record': round(c['count'] / records, 2),
+                    'seconds': round(c['seconds'], 3),
+                    'avg_ms': round(c['seconds'] / c['count'] * 1000, 1) if c['count'] else 0,
+                }
+                for name, c in commands
+            },
+        }
+
+    def log_summary(self, top=8):
+        """在日志中输出平均每条记录的统计及最耗时的命令类型"""
+        if not self.record_count:
+            return
+        logger.info("WebDriver命令统计（平均每条记录）: " + self.format_stats(
+            self.totals, self.record_seconds, divisor=self.record_count))
+        for name, c in list(self.summary()['commands'].items())[:top]:
+            logger.info(f"  {name:28s} {c['per_record']:6.1f} 次/条  平均 {c['avg_ms']:7.1f} ms  合计 {c['seconds']:.1f}s")
+
+    def save(self, filename):
+        """保存统计结果为JSON"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        logger.info(f"WebDriver命令统计已保存到: {filename}")
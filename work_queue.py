@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于租约的共享工作队列
+多台电脑（或同一台电脑上的多个进程）从同一个SQLite文件（可放在共享盘上）领取记录：
+每次领取是一个有时限的租约，处理期间后台线程定时续约；
+进程或浏览器崩溃后租约过期，记录自动回到队列由其他worker处理
+
+使用方法：
+    python update_device_location.py --queue \\\\share\\assets\\queue.db   # 每台电脑都运行
+    python work_queue.py status queue.db
+    python work_queue.py retry-failed queue.db
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# 租约时长（秒），处理一条记录的时间应远小于此值
+LEASE_SECONDS = 120
+
+# 每条记录最多被领取的次数（超过后标记为失败，避免一条"毒记录"反复拖垮worker）
+MAX_ATTEMPTS = 3
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    key         TEXT PRIMARY KEY,
+    payload     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',   -- pending / leased / done / failed
+    owner       TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    error       TEXT,
+    updated     REAL
+)
+"""
+
+
+def default_worker_id():
+    """默认worker标识：主机名-进程号"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Lease:
+    """一次领取：持有期间自动续约，处理完后调用 complete()"""
+
+    def __init__(self, queue, key, payload, worker_id):
+        self.queue = queue
+        self.key = key
+        self.payload = payload
+        self.worker_id = worker_id
+        self.finished = False
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name=f'lease-{key}', daemon=True)
+        self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        interval = self.queue.lease_seconds / 3
+        while not self._stop.wait(interval):
+            try:
+                if not self.queue.heartbeat(self.key, self.worker_id):
+                    logger.warning(f"记录 {self.key} 的租约已失效（可能已被其他worker接管）")
+                    return
+            except sqlite3.Error as e:
+                logger.warning(f"续约失败，稍后重试: {e}")
+
+    def complete(self, success, error=''):
+        """结束租约，记录处理结果"""
+        self._stop.set()
+        self.finished = True
+        self.queue.complete(self.key, self.worker_id, success, error)
+
+    def release(self):
+        """放弃租约，记录回到队列"""
+        self._stop.set()
+        self.finished = True
+        self.queue.release(self.key, self.worker_id)
+
+
+class WorkQueue:
+    """SQLite工作队列"""
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = str(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._conn().execute(SCHEMA)
+
+    def _conn(self):
+        """每个线程使用独立连接（续约在后台线程中进行）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: 手动控制事务；共享盘上不能用WAL模式
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=DELETE")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, func):
+        """在写事务中执行func(conn)，BEGIN IMMEDIATE 保证多进程领取互斥"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(conn)
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, items):
+        """
+        加入记录，已存在的key不会重复加入（多台电脑可以各自加入同一份Excel）
+
+        Args:
+            items: 可迭代的 (key, payload字典)
+
+        Returns:
+            新加入的记录数
+        """
+        now = time.time()
+        rows = [(str(key), json.dumps(payload, ensure_ascii=False, default=str), now) for key, payload in items]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO items (key, payload, updated) VALUES (?, ?, ?)", rows)
+            return conn.total_changes - before
+
+        return self._transaction(insert)
+
+    def claim(self, worker_id):
+        """领取一条待处理（或租约已过期）的记录，没有可领取的记录时返回None"""
+        def take(conn):
+            now = time.time()
+            # 租约过期且次数用尽的记录直接标记失败
+            conn.execute(
+                "UPDATE items SET status='failed', error='租约多次过期', owner=NULL, updated=? "
+                "WHERE status='leased' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts))
+
+            row = conn.execute(
+                "SELECT key, payload, status, owner FROM items "
+                "WHERE status='pending' OR (status='leased' AND lease_until < ?) "
+                "ORDER BY status='leased', rowid LIMIT 1",
+                (now,)).fetchone()
+            if row is None:
+                return None
+
+            key, payload, status, owner = row
+            if status == 'leased':
+                logger.warning(f"记录 {key} 的租约已过期（原worker: {owner}），重新领取")
+            conn.execute(
+                "UPDATE items SET status='leased', owner=?, lease_until=?, attempts=attempts+1, updated=? "
+                "WHERE key=?",
+                (worker_id, now + self.lease_seconds, now, key))
+            return key, json.loads(payload)
+
+        return self._transaction(take)
+
+    def heartbeat(self, key, worker_id):
+        """续约，返回False表示租约已不属于该worker"""
+        def extend(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE items SET lease_until=?, updated=? WHERE key=? AND owner=? AND status='leased'",
+                (now + self.lease_seconds, now, key, worker_id))
+            return cursor.rowcount == 1
+
+        return self._transaction(extend)
+
+    def complete(self, key, worker_id, success, error=''):
+        """记录处理结果"""
+        def finish(conn):
+            conn.execute(
+                "UPDATE items SET status=?, error=?, owner=NULL, lease_until=NULL, updated=? "
+                "WHERE key=? AND owner=?",
+                ('done' if success else 'failed', error, time.time(), key, worker_id))
+
+        self._transaction(finish)
+
+    def release(self, key, worker_id):
+        """放弃租约，记录回到待处理状态"""
+        def give_back(conn):
+            conn.execute(
+                "UPDATE items SET status='pending', owner=NULL, lease_until=NULL, "
+                "attempts=MAX(attempts-1, 0), updated=? WHERE key=? AND owner=?",
+                (time.time(), key, worker_id))
+
+        self._transaction(give_back)
+
+    def retry_failed(self):
+        """把失败的记录重新放回队列，返回记录数"""
+        def reset(conn):
+            cursor = conn.execute(
+                "UPDATE items SET status='pending', attempts=0, error=NULL, updated=? WHERE status='failed'",
+                (time.time(),))
+            return cursor.rowcount
+
+        return self._transaction(reset)
+
+    def counts(self):
+        """各状态的记录数"""
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall()
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def claims(self, worker_id, idle_poll=5):
+        """
+        持续领取记录直到队列处理完毕，逐个产出 Lease
+
+        队列暂时为空但仍有其他worker持有租约时继续等待：
+        若对方崩溃，租约过期后记录会被本worker接管
+        """
+        while True:
+            claimed = self.claim(worker_id)
+            if claimed is None:
+                if self.counts()['leased'] == 0:
+                    return
+                time.sleep(idle_poll)
+                continue
+
+            lease = Lease(self, claimed[0], claimed[1], worker_id)
+            try:
+                yield lease
+            finally:
+                # 调用方未提交结果（异常或中断）时放回队列
+                if not lease.finished:
+                    lease.release()
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def add_queue_arguments(parser):
+    """为批量脚本的命令行添加 --queue / --worker-id 参数"""
+    parser.add_argument('--queue', metavar='DB',
+                        help='从共享的SQLite工作队列领取记录（多台电脑协同处理）')
+    parser.add_argument('--worker-id', default=default_worker_id(),
+                        help='worker标识，默认为 主机名-进程号')
+
+
+def main(args):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='共享工作队列管理')
+    parser.add_argument('command', choices=['status', 'retry-failed'])
+    parser.add_argument('db', help='队列文件')
+    options = parser.parse_args(args)
+
+    queue = WorkQueue(options.db)
+    if options.command == 'retry-failed':
+        print(f"已将 {queue.retry_failed()} 条失败记录放回队列")
+
+    counts = queue.counts()
+    print(f"待处理: {counts['pending']}  处理中: {counts['leased']}  "
+          f"完成: {counts['done']}  失败: {counts['failed']}")
+
+    if counts['leased']:
+        print("\n处理中的记录:")
+        now = time.time()
+        for key, owner, lease_until in queue._conn().execute(
+                "SELECT key, owner, lease_until FROM items WHERE status='leased' ORDER BY owner"):
+            state = '租约剩余' if lease_until >= now else '已过期'
+            print(f"  {key}  {owner}  {state} {abs(lease_until - now):.0f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])